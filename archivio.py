@@ -0,0 +1,226 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                      archivio                     #
+#    file con l'archivio su disco dei singoli passi #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import json
+
+import numpy as np
+
+from motori import BIT_PER_BYTE
+
+from kernel import accumulaTraiettorie
+from kernel import occupazioneTraiettorie
+
+
+
+#------------------------------------------
+#    Archivio dei passi impacchettati in bit
+#------------------------------------------
+
+# numero di palline lette dal disco per blocco
+DIM_BLOCCO_ARCHIVIO = 100000
+
+class ArchivioPassi:
+    """
+    Archivio su disco dei singoli passi delle palline, un bit per passo e per asse
+    (1 -> passo verso destra). I passi di ogni pallina occupano nAssi righe di
+    ceil(nPassi/8) byte, impacchettati come np.packbits(..., bitorder="little"), e
+    sono aggiunti in coda al file blocco per blocco; la lettura avviene con np.memmap,
+    per cui traiettorie, occupazione e conteggi sono calcolati a blocchi senza
+    caricare in memoria tutti i passi. Numero di passi e di assi sono salvati nel
+    file percorso.json, così che l'archivio possa essere riaperto in seguito.
+
+        ArchivioPassi(percorso, nPassi=None, nAssi=1)
+
+    Parametri
+    ---------
+        percorso:   file dei passi impacchettati
+        nPassi:     numero di passi di ogni pallina
+                        se None l'archivio esistente viene riaperto, altrimenti ne
+                        viene creato uno nuovo (vuoto) sovrascrivendo il file
+        nAssi:      numero di assi lungo cui si muove ogni pallina
+
+    Metodi
+    ------
+        impacchetta(passi)          byte dei passi di un asse, da matrice booleana o parole di passiBit()
+        aggiungi(*assi)             aggiunge in coda i passi di un blocco di palline, una matrice per asse
+        numeroPalle()               numero di palline nell'archivio
+        mappa()                     array (nPalle, nAssi, nByte) dei byte mappato dal file
+        passi(inizio, fine, asse)   matrice booleana dei passi delle palline da inizio a fine
+        blocchi(asse, dimBlocco)    generatore dei passi a blocchi di dimBlocco palline
+        passiDestra(asse)           numero di passi verso destra di ogni pallina
+        occupazione(asse)           numero di palline passate per ogni posizione ad ogni piolo
+        traiettorie(asse, n)        posizioni piolo per piolo delle prime n palline
+
+    """
+    def __init__(self, percorso, nPassi=None, nAssi=1):
+        self.percorso = percorso
+
+        if nPassi is None:
+            with open(f"{percorso}.json") as file:
+                info = json.load(file)
+            nPassi, nAssi = info["nPassi"], info["nAssi"]
+        else:
+            with open(f"{percorso}.json", "w") as file:
+                json.dump({"nPassi": int(nPassi), "nAssi": int(nAssi)}, file)
+            open(percorso, "wb").close()
+
+        self.nPassi = nPassi
+        self.nAssi = nAssi
+        self.nByte = (nPassi + 7) // 8
+
+
+    def impacchetta(self, passi):
+        """
+        Byte (n, nByte) dei passi di un asse. Le parole uint64 di passiBit() sono già
+        impacchettate nello stesso ordine: i loro byte little-endian sono copiati senza
+        passare dalla matrice booleana.
+
+        """
+        if passi.dtype == np.uint64:
+            return passi.astype("<u8", copy=False).view(np.uint8)[:, :self.nByte]
+
+        return np.packbits(passi, axis=1, bitorder="little")
+
+
+    def aggiungi(self, *assi):
+        """
+        Aggiunge in coda all'archivio i passi di un blocco di palline.
+
+            archivio.aggiungi(passiX, passiY)
+
+        Parametri
+        ---------
+            assi:   Una matrice per asse, booleana (n, nPassi) o di parole di passiBit().
+
+        """
+        if len(assi) != self.nAssi:
+            raise ValueError(f"L'archivio ha {self.nAssi} assi, ricevuti i passi di {len(assi)}")
+
+        blocco = np.stack([self.impacchetta(passi) for passi in assi], axis=1)
+
+        with open(self.percorso, "ab") as file:
+            file.write(blocco.tobytes())
+
+
+    def numeroPalle(self):
+        """
+        Numero di palline nell'archivio, ricavato dalla dimensione del file.
+
+        """
+        with open(self.percorso, "rb") as file:
+            file.seek(0, 2)
+            return file.tell() // (self.nAssi * self.nByte)
+
+
+    def mappa(self):
+        """
+        Byte dei passi mappati dal file, forma (nPalle, nAssi, nByte), in sola lettura.
+
+        """
+        nPalle = self.numeroPalle()
+
+        # np.memmap non può mappare un file vuoto
+        if nPalle == 0:
+            return np.zeros((0, self.nAssi, self.nByte), dtype=np.uint8)
+
+        return np.memmap(self.percorso, dtype=np.uint8, mode="r", shape=(nPalle, self.nAssi, self.nByte))
+
+
+    def passi(self, inizio=0, fine=None, asse=None):
+        """
+        Matrice booleana dei passi delle palline da inizio a fine (esclusa).
+
+        Restituisce:
+            numpy.ndarray: Passi (n, nAssi, nPassi), oppure (n, nPassi) dell'asse scelto.
+
+        """
+        byte = self.mappa()[inizio:fine]
+
+        if asse is not None:
+            byte = byte[:, asse]
+
+        return np.unpackbits(byte, axis=-1, count=self.nPassi, bitorder="little").astype(bool)
+
+
+    def blocchi(self, asse=0, dimBlocco=DIM_BLOCCO_ARCHIVIO):
+        """
+        Generatore dei passi (n, nPassi) lungo un asse, a blocchi di dimBlocco palline.
+
+        """
+        nPalle = self.numeroPalle()
+
+        for inizio in range(0, nPalle, dimBlocco):
+            yield self.passi(inizio, min(inizio + dimBlocco, nPalle), asse)
+
+
+    def passiDestra(self, asse=0, dimBlocco=DIM_BLOCCO_ARCHIVIO):
+        """
+        Numero di passi verso destra di ogni pallina lungo un asse, contando i bit
+        a 1 dei byte senza spacchettarli.
+
+        Restituisce:
+            numpy.ndarray: Passi verso destra, forma (nPalle,).
+
+        """
+        mappa = self.mappa()
+        conteggi = np.empty(len(mappa), dtype=np.int64)
+
+        for inizio in range(0, len(mappa), dimBlocco):
+            byte = np.asarray(mappa[inizio:inizio + dimBlocco, asse])
+            bit = np.bitwise_count(byte) if hasattr(np, "bitwise_count") else BIT_PER_BYTE[byte]
+            conteggi[inizio:inizio + len(byte)] = np.sum(bit, axis=1, dtype=np.int64)
+
+        return conteggi
+
+
+    def occupazione(self, asse=0, dimBlocco=DIM_BLOCCO_ARCHIVIO):
+        """
+        Numero di palline passate per ogni posizione ad ogni piolo lungo un asse,
+        accumulato a blocchi con occupazioneTraiettorie().
+
+        Restituisce:
+            numpy.ndarray: Occupazione (nPassi, 2*nPassi-1).
+
+        """
+        occupazione = np.zeros((self.nPassi, 2 * self.nPassi - 1), dtype=np.int64)
+
+        for passi in self.blocchi(asse, dimBlocco):
+            occupazioneTraiettorie(passi, occupazione)
+
+        return occupazione
+
+
+    def traiettorie(self, asse=0, n=None):
+        """
+        Posizioni piolo per piolo delle prime n palline (di default tutte) lungo un asse.
+
+        Restituisce:
+            numpy.ndarray: Posizioni (n, nPassi), come da accumulaTraiettorie().
+
+        """
+        return accumulaTraiettorie(self.passi(0, n, asse))
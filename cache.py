@@ -0,0 +1,224 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                       cache                       #
+#    file con la cache su disco delle simulazioni   #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import os
+import json
+import hashlib
+import zipfile
+
+import numpy as np
+
+
+
+#------------------------------------------
+#    Impostazioni della cache
+#------------------------------------------
+
+# versione del formato dei risultati: cambiandola i risultati già salvati
+# non vengono più letti
+VERSIONE_CACHE = 2
+
+# dimensione massima predefinita della cartella della cache, in byte
+DIMENSIONE_MASSIMA = 1024**3
+
+# impostazioni della cache, None -> nessun risultato viene letto o salvato
+CACHE = None
+
+def attivaCache(cartella, dimensioneMassima=DIMENSIONE_MASSIMA):
+    """
+    Attiva la cache su disco: da questo momento le macchine di Galton con seme
+    fissato leggono i risultati di una configurazione già simulata invece di
+    ripetere simulazione e fit. Quando i file superano dimensioneMassima sono
+    eliminati quelli usati meno di recente.
+
+        attivaCache(cartella, dimensioneMassima=DIMENSIONE_MASSIMA)
+
+    Parametri
+    ---------
+        cartella (str):             Cartella dei risultati, creata se non esiste.
+        dimensioneMassima (int):    Dimensione massima dei file della cache in byte.
+
+    """
+    global CACHE
+
+    if dimensioneMassima <= 0:
+        raise ValueError(f"Dimensione massima della cache non valida: {dimensioneMassima}")
+
+    os.makedirs(cartella, exist_ok=True)
+
+    CACHE = {"cartella": cartella, "dimensioneMassima": int(dimensioneMassima), "dimensione": 0}
+
+    liberaCache()
+
+
+def cacheAttiva():
+    """
+    True se la cache su disco è stata attivata con attivaCache().
+
+    """
+    return CACHE is not None
+
+
+def disattivaCache():
+    """
+    Disattiva la cache su disco, senza eliminare i risultati salvati.
+
+    """
+    global CACHE
+
+    CACHE = None
+
+
+
+#------------------------------------------
+#    Lettura e scrittura dei risultati
+#------------------------------------------
+
+def chiaveCache(**parametri):
+    """
+    Chiave di una configurazione nella cache: l'impronta SHA-256 dei parametri,
+    così che configurazioni uguali abbiano lo stesso file qualunque sia l'ordine
+    dei parametri o il tipo (Python o NumPy) dei valori.
+
+        chiaveCache(classe="Galton2D", nPassi=20, nPalle=10**6, probDX=0.5, seed=1)
+
+    Restituisce:
+        str: Chiave esadecimale, nome del file dei risultati.
+
+    """
+    testo = json.dumps({"versione": VERSIONE_CACHE, **parametri}, sort_keys=True,
+                       default=lambda valore: np.asarray(valore).tolist())
+
+    return hashlib.sha256(testo.encode()).hexdigest()
+
+
+def percorsoCache(chiave):
+    """
+    Percorso del file dei risultati con la chiave indicata.
+
+    """
+    return os.path.join(CACHE["cartella"], f"{chiave}.npz")
+
+
+def leggiCache(chiave):
+    """
+    Legge i risultati salvati con la chiave indicata e li segna come usati
+    di recente. Un file illeggibile (ad esempio interrotto durante la scrittura)
+    viene eliminato e trattato come assente.
+
+        leggiCache(chiave)
+
+    Restituisce:
+        dict: {nome: numpy.ndarray} dei risultati, None se la cache non è attiva
+              o la configurazione non è mai stata salvata.
+
+    """
+    if CACHE is None:
+        return None
+
+    percorso = percorsoCache(chiave)
+
+    if not os.path.exists(percorso):
+        return None
+
+    try:
+        with np.load(percorso) as file:
+            risultati = {nome: file[nome] for nome in file.files}
+    except (OSError, ValueError, zipfile.BadZipFile):
+        os.remove(percorso)
+        return None
+
+    # la data di modifica indica l'ultimo utilizzo per l'eliminazione dei file
+    os.utime(percorso)
+
+    return risultati
+
+
+def scriviCache(chiave, risultati):
+    """
+    Salva i risultati compressi con la chiave indicata, poi elimina i file usati
+    meno di recente se la cache supera la dimensione massima. Il file è scritto
+    con un nome temporaneo e poi rinominato, così che un file incompleto non
+    venga mai letto.
+
+        scriviCache(chiave, risultati)
+
+    Parametri
+    ---------
+        chiave (str):       Chiave data da chiaveCache().
+        risultati (dict):   {nome: array o numero} da salvare.
+
+    """
+    if CACHE is None:
+        return
+
+    percorso = percorsoCache(chiave)
+    temporaneo = f"{percorso}.{os.getpid()}.tmp"
+
+    with open(temporaneo, "wb") as file:
+        np.savez_compressed(file, **risultati)
+
+    if os.path.exists(percorso):
+        CACHE["dimensione"] -= os.path.getsize(percorso)
+
+    os.replace(temporaneo, percorso)
+
+    # la cartella viene letta di nuovo solo quando supera la dimensione massima
+    CACHE["dimensione"] += os.path.getsize(percorso)
+    if CACHE["dimensione"] > CACHE["dimensioneMassima"]:
+        liberaCache()
+
+
+def liberaCache(dimensioneMassima=None):
+    """
+    Elimina i file della cache usati meno di recente finché la loro dimensione
+    totale non scende sotto dimensioneMassima (di default quella di attivaCache())
+    e aggiorna la dimensione totale della cache.
+
+    """
+    if CACHE is None:
+        return
+
+    if dimensioneMassima is None:
+        dimensioneMassima = CACHE["dimensioneMassima"]
+
+    file = []
+    for voce in os.scandir(CACHE["cartella"]):
+        if voce.name.endswith(".npz"):
+            stato = voce.stat()
+            file.append((stato.st_mtime, stato.st_size, voce.path))
+
+    totale = sum(dimensione for _, dimensione, _ in file)
+
+    for _, dimensione, percorso in sorted(file):
+        if totale <= dimensioneMassima:
+            break
+        os.remove(percorso)
+        totale -= dimensione
+
+    CACHE["dimensione"] = totale
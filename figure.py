@@ -0,0 +1,226 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                       figure                      #
+#    file con lo stile e l'esportazione dei grafici #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import os
+import re
+import atexit
+import pickle
+
+from multiprocessing import Pool
+
+# matplotlib viene importato solo al primo grafico, così che le simulazioni
+# senza grafici non ne paghino il caricamento
+
+
+
+#------------------------------------------
+#    Modifica dei plot in stile LaTeX
+#------------------------------------------
+
+STILE_LATEX = {
+    "text.usetex": True,
+    "font.family": "serif",
+    "font.serif": ["Latin Modern Roman"],
+    "font.size": 12,
+    "axes.titlesize": 14,
+    "axes.labelsize": 12,
+    "xtick.labelsize": 10,
+    "ytick.labelsize": 10,
+}
+
+# lo stile viene applicato una sola volta, al primo grafico
+STILE_APPLICATO = False
+
+def pyplot():
+    """
+    Importa matplotlib.pyplot al primo grafico e applica lo stile LaTeX.
+
+        plt = pyplot()
+
+    Restituisce:
+        module: matplotlib.pyplot
+
+    """
+    global STILE_APPLICATO
+
+    import matplotlib.pyplot as plt
+
+    if not STILE_APPLICATO:
+        plt.rcParams.update(STILE_LATEX)
+        STILE_APPLICATO = True
+
+    return plt
+
+
+
+#------------------------------------------
+#    Esportazione delle figure
+#------------------------------------------
+
+# formati in cui possono essere salvate le figure
+FORMATI_FIGURE = ("png", "pdf", "svg")
+
+# impostazioni dell'esportazione, None -> le figure sono mostrate con plt.show()
+ESPORTAZIONE = None
+
+def esportaFigure(cartella, formati=("png",), processi=2):
+    """
+    Attiva l'esportazione delle figure: da questo momento mostraFigura() non apre
+    finestre ma salva ogni figura nella cartella, con il backend non interattivo Agg.
+    Il salvataggio avviene in un gruppo di processi, così che il disegno delle figure
+    si sovrapponga alla simulazione successiva.
+
+        esportaFigure(cartella, formati=("png",), processi=2)
+
+    Parametri
+    ---------
+        cartella (str):     Cartella in cui salvare le figure, creata se non esiste.
+        formati (tuple):    Formati dei file tra "png", "pdf" e "svg".
+        processi (int):     Numero di processi che salvano le figure
+                                (0 -> salvate direttamente dal processo principale).
+
+    """
+    global ESPORTAZIONE
+
+    for formato in formati:
+        if formato not in FORMATI_FIGURE:
+            raise ValueError(f"Formato non valido: {formato} (scegliere tra {', '.join(FORMATI_FIGURE)})")
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    os.makedirs(cartella, exist_ok=True)
+
+    chiudiEsportazione()
+
+    ESPORTAZIONE = {
+        "cartella": cartella,
+        "formati": tuple(formati),
+        "pool": Pool(processi) if processi > 0 else None,
+        "salvataggi": [],   # risultati dei salvataggi in corso
+        "nomi": {},         # numero di figure già salvate con ogni nome
+    }
+
+    # le figure ancora in coda vengono salvate prima della chiusura del programma
+    atexit.unregister(chiudiEsportazione)
+    atexit.register(chiudiEsportazione)
+
+
+def nomeFigura(tipo, **parametri):
+    """
+    Costruisce il nome del file di una figura dal tipo di grafico e dai parametri
+    della simulazione, es. nomeFigura("proiezioni3D", nPassi=20, probX=0.3)
+    -> "proiezioni3D_nPassi=20_probX=0.3".
+
+    """
+    parti = [tipo]
+
+    for nome, valore in parametri.items():
+        if hasattr(valore, "__len__") and not isinstance(valore, str):
+            valore = "-".join(str(v) for v in valore)     # liste di probabilità
+        parti.append(f"{nome}={valore}")
+
+    # solo caratteri validi nei nomi dei file
+    return re.sub(r"[^\w=.+-]+", "-", "_".join(parti)).strip("-")
+
+
+def salvaFigura(figura, percorso, formati):
+    """
+    Salva la figura, serializzata con pickle, in ognuno dei formati.
+    Eseguita dai processi dell'esportazione.
+
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    figura = pickle.loads(figura)
+
+    for formato in formati:
+        figura.savefig(f"{percorso}.{formato}")
+
+    plt.close(figura)
+
+
+def mostraFigura(nome="figura"):
+    """
+    Mostra la figura corrente con plt.show() oppure, se è attiva l'esportazione
+    (esportaFigure()), la salva con il nome indicato e la chiude. Se il nome è già
+    stato usato viene aggiunto un numero progressivo.
+
+        mostraFigura(nome="figura")
+
+    Parametri
+    ---------
+        nome (str): Nome del file senza estensione, es. da nomeFigura().
+
+    """
+    plt = pyplot()
+
+    if ESPORTAZIONE is None:
+        plt.show()
+        return
+
+    usati = ESPORTAZIONE["nomi"].get(nome, 0)
+    ESPORTAZIONE["nomi"][nome] = usati + 1
+    if usati:
+        nome = f"{nome}_{usati + 1}"
+
+    percorso = os.path.join(ESPORTAZIONE["cartella"], nome)
+    figura = plt.gcf()
+
+    if ESPORTAZIONE["pool"] is None:
+        for formato in ESPORTAZIONE["formati"]:
+            figura.savefig(f"{percorso}.{formato}")
+    else:
+        salvataggio = ESPORTAZIONE["pool"].apply_async(salvaFigura, (pickle.dumps(figura), percorso, ESPORTAZIONE["formati"]))
+        ESPORTAZIONE["salvataggi"].append(salvataggio)
+
+    plt.close(figura)
+
+
+def chiudiEsportazione():
+    """
+    Attende il salvataggio delle figure in coda e chiude i processi dell'esportazione.
+    Gli errori dei salvataggi vengono sollevati qui.
+
+    """
+    global ESPORTAZIONE
+
+    if ESPORTAZIONE is None:
+        return
+
+    esportazione, ESPORTAZIONE = ESPORTAZIONE, None
+
+    if esportazione["pool"] is not None:
+        esportazione["pool"].close()
+        try:
+            for salvataggio in esportazione["salvataggi"]:
+                salvataggio.get()
+        finally:
+            esportazione["pool"].join()
@@ -0,0 +1,791 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                        fit                        #
+#     file con i modelli e i fit delle frequenze    #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import numpy as np
+
+from kernel import NUMBA_DISPONIBILE
+from kernel import kernelNumba
+
+from util import EPSILON
+from util import logBinomiale
+from util import momentiIstogramma
+
+# scipy è importato solo dalle funzioni che lo usano, così che importare
+# fit non lo carichi
+
+
+
+#------------------------------------------
+#    Modello binomiale in spazio logaritmico
+#------------------------------------------
+
+def modelloBinomiale(x, n, p, amp):
+    """
+    Distribuzione binomiale amplificata, calcolata in spazio logaritmico.
+
+        modelloBinomiale(x, n, p, amp)
+
+    Parametri
+    ---------
+        x (numpy.ndarray):  Numero di successi (anche non interi).
+        n (float):          Numero di prove.
+        p (float):          Probabilità di successo.
+        amp (float):        Fattore di amplificazione.
+
+    Restituisce:
+        numpy.ndarray:  amp * C(n, x) p^x (1-p)^(n-x)
+
+    """
+    return amp * np.exp(logBinomiale(np.asarray(x, dtype=float), n, p))
+
+
+def jacobianoBinomiale(x, n, p, amp):
+    """
+    Jacobiano analitico di modelloBinomiale() rispetto a (n, p, amp), forma (..., len(x), 3):
+
+        ∂f/∂n   = f [ψ(n+1) - ψ(n-x+1) + log(1-p)]
+        ∂f/∂p   = f [x/p - (n-x)/(1-p)]
+        ∂f/∂amp = f / amp
+
+    con ψ la funzione digamma.
+
+    """
+    from scipy.special import digamma
+
+    x = np.asarray(x, dtype=float)
+    p = np.minimum(np.maximum(p, EPSILON), 1 - EPSILON)
+    
+    forma = np.exp(logBinomiale(x, n, p))
+    f = amp * forma
+    
+    # dove il modello è nullo (oltre il supporto, x > n) anche le derivate lo sono
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dn = np.where(f != 0, f * (digamma(n + 1) - digamma(n - x + 1) + np.log1p(-p)), 0.0)
+    
+    dp = f * (x / p - (n - x) / (1 - p))
+    
+    return np.stack(np.broadcast_arrays(dn, dp, forma), axis=-1)
+
+
+
+#------------------------------------------
+#    Modello gaussiano
+#------------------------------------------
+
+def modelloGaussiano(x, mu, sigma, amp):
+    """
+    Distribuzione gaussiana amplificata (non normalizzata).
+
+        modelloGaussiano(x, mu, sigma, amp)
+
+    Restituisce:
+        numpy.ndarray:  amp * exp(-(x-mu)² / 2sigma²)
+
+    """
+    sigma = np.maximum(sigma, EPSILON)
+    
+    return amp * np.exp(-0.5 * ((np.asarray(x, dtype=float) - mu) / sigma) ** 2)
+
+
+def jacobianoGaussiano(x, mu, sigma, amp):
+    """
+    Jacobiano analitico di modelloGaussiano() rispetto a (mu, sigma, amp), forma (..., len(x), 3):
+
+        ∂f/∂mu    = f z / sigma
+        ∂f/∂sigma = f z² / sigma
+        ∂f/∂amp   = f / amp
+
+    con z = (x - mu) / sigma.
+
+    """
+    sigma = np.maximum(sigma, EPSILON)
+    
+    z = (np.asarray(x, dtype=float) - mu) / sigma
+    forma = np.exp(-0.5 * z * z)
+    dmu = amp * forma * z / sigma
+    
+    return np.stack(np.broadcast_arrays(dmu, dmu * z, forma), axis=-1)
+
+
+# modelli disponibili: (funzione, jacobiano), nello stesso ordine dei modelli
+# del kernel compilato di levenbergMarquardt()
+MODELLI = {
+    "binomiale": (modelloBinomiale, jacobianoBinomiale),
+    "gaussiana": (modelloGaussiano, jacobianoGaussiano),
+}
+
+# domini dei parametri dei modelli, (minimi, massimi): i passi dei fit vi sono
+# riportati, così che p resti in (0, 1), n e sigma positivi e amp non negativa
+# anche partendo lontano dal minimo (i modelli altrimenti limitano p e sigma
+# solo al loro interno e i parametri restituiti uscirebbero dal dominio)
+LIMITI = {
+    "binomiale": (np.array([EPSILON, EPSILON, 0.0]), np.array([np.inf, 1 - EPSILON, np.inf])),
+    "gaussiana": (np.array([-np.inf, EPSILON, 0.0]), np.array([np.inf, np.inf, np.inf])),
+}
+
+
+
+#------------------------------------------
+#    Fit delle frequenze
+#------------------------------------------
+
+# tolleranze relative sulla somma dei quadrati e sui parametri (come in curve_fit)
+TOLLERANZA = 1.49012e-8
+
+# numero massimo di iterazioni di levenbergMarquardt() e newtonPoisson()
+ITERAZIONI_MASSIME = 200
+
+# stimatori dei parametri dei fit:
+#   "momenti"         metodo dei momenti raffinato con la verosimiglianza di Poisson dei bin
+#   "minimiQuadrati"  minimi quadrati con levenbergMarquardt()
+#   "curve_fit"       minimi quadrati con scipy.optimize.curve_fit, per confronto
+STIMATORI = ("momenti", "minimiQuadrati", "curve_fit")
+
+def levenbergMarquardtNumpy(funzione, jacobiano, x, y, p0, limiti):
+    """
+    levenbergMarquardt() in numpy, usato quando Numba non è installato. Ogni
+    iterazione valuta modello e jacobiano su tutti i bin con alcune operazioni
+    vettoriali: un fit richiede circa 0.5-2 ms, quanto curve_fit, e il vantaggio
+    di levenbergMarquardt() viene dal kernel compilato.
+
+    Parametri
+    ---------
+        funzione, jacobiano:    Modello e jacobiano (vedi MODELLI).
+        x, y:                   Punti e valori da approssimare.
+        p0 (list):              Valori iniziali dei 3 parametri.
+        limiti (tuple):         Minimi e massimi dei parametri (vedi LIMITI).
+
+
+    Restituisce:
+        tuple:  (parametri, modello e jacobiano in x).
+
+    """
+    # l'ampiezza è lineare: si parte dal suo valore ottimo per la forma iniziale
+    forma = funzione(x, p0[0], p0[1], 1.0)
+    norma = forma @ forma
+    par = np.array([p0[0], p0[1], (forma @ y) / norma if norma > 0 else p0[2]], dtype=float)
+
+    residui = y - funzione(x, *par)
+    somma = residui @ residui
+    smorzamento = 1e-3
+
+    for _ in range(ITERAZIONI_MASSIME):
+        J = jacobiano(x, *par)
+        A = J.T @ J
+        g = J.T @ residui
+        diagonale = np.diag(A.diagonal() + TOLLERANZA)
+
+        # aumenta lo smorzamento finché il passo non riduce la somma dei quadrati
+        while True:
+            try:
+                passo = np.linalg.solve(A + smorzamento * diagonale, g)
+            except np.linalg.LinAlgError:
+                passo = np.linalg.lstsq(A + smorzamento * diagonale, g, rcond=None)[0]
+
+            nuovi = np.clip(par + passo, *limiti)
+            nuoviResidui = y - funzione(x, *nuovi)
+            nuovaSomma = nuoviResidui @ nuoviResidui
+
+            if nuovaSomma <= somma or smorzamento > 1e10:
+                break
+            smorzamento *= 10
+
+        if nuovaSomma > somma:
+            break   # nessun passo migliora: minimo raggiunto
+
+        convergenza = (somma - nuovaSomma <= TOLLERANZA * somma or
+                       np.all(np.abs(nuovi - par) <= TOLLERANZA * (np.abs(par) + TOLLERANZA)))
+
+        par, residui, somma = nuovi, nuoviResidui, nuovaSomma
+        smorzamento = max(smorzamento / 10, 1e-12)
+
+        if convergenza:
+            break
+
+    return par, funzione(x, *par), jacobiano(x, *par)
+
+
+def levenbergMarquardt(modello, x, y, p0):
+    """
+    Minimi quadrati non lineari con il metodo di Levenberg-Marquardt e jacobiano
+    analitico: con 3 parametri ogni iterazione risolve un sistema 3x3, senza il
+    costo fisso di curve_fit. L'ampiezza, lineare, parte dal suo valore ottimo
+    per la forma data dagli altri due parametri iniziali, risparmiando gran parte
+    delle iterazioni. Con Numba usa il kernel compilato, che calcola modello e
+    jacobiano nello stesso ciclo.
+
+        levenbergMarquardt(modello, x, y, p0)
+
+    Parametri
+    ---------
+        modello (str):  "binomiale" o "gaussiana" (vedi MODELLI).
+        x, y:           Punti e valori da approssimare.
+        p0 (list):      Valori iniziali dei 3 parametri.
+
+
+    Restituisce:
+        tuple:  (parametri che minimizzano Σ (y - modello(x))², modello e jacobiano in x).
+
+    """
+    p0 = np.clip(np.array(p0, dtype=float), *LIMITI[modello])
+    
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("levenbergMarquardt")(list(MODELLI).index(modello), x, y, p0,
+                                                 *LIMITI[modello], TOLLERANZA, ITERAZIONI_MASSIME)
+    return levenbergMarquardtNumpy(*MODELLI[modello], x, y, p0, LIMITI[modello])
+
+
+def stimaMomenti(modello, frequenze):
+    """
+    Stima dei parametri con il metodo dei momenti dell'istogramma dei valori interi
+    0, 1, ..., len(frequenze)-1:
+        
+        gaussiana:  µ = media,  𝜎 = deviazione standard,  amp = N / (𝜎 sqrt(2π))
+        binomiale:  p = 1 - varianza/media,  n = media/p,  amp = N
+    
+    con N il numero totale di conteggi. Per la binomiale n non scende sotto il
+    valore più alto osservato (p = media/n in tal caso), dato che oltre n il
+    modello è nullo e la verosimiglianza di partenza sarebbe -inf. Con frequenze
+    di forma (K, nBins) stima i parametri di ogni riga e restituisce un array (K, 3).
+    
+    """
+    frequenze = np.asarray(frequenze, dtype=float)
+    
+    if frequenze.ndim == 1:
+        nTot = np.sum(frequenze)
+        media, devStd = momentiIstogramma(frequenze)
+    else:
+        valori = np.arange(frequenze.shape[1])
+        nTot = np.sum(frequenze, axis=1)
+        media = frequenze @ valori / nTot
+        devStd = np.sqrt(np.sum((valori - media[:, None]) ** 2 * frequenze, axis=1) / nTot)
+    
+    if modello == "gaussiana":
+        devStd = np.maximum(devStd, EPSILON)
+        return np.stack((media, devStd, nTot / (devStd * np.sqrt(2 * np.pi))), axis=-1)
+    
+    p = np.minimum(np.maximum(1 - devStd ** 2 / np.maximum(media, EPSILON), EPSILON), 1 - EPSILON)
+    
+    # valore più alto con conteggi, per riga
+    massimo = frequenze.shape[-1] - 1 - np.argmax(frequenze[..., ::-1] > 0, axis=-1)
+    n = np.maximum(media / p, massimo)
+    p = np.minimum(np.maximum(media / n, EPSILON), 1 - EPSILON)
+    
+    return np.stack((n, p, nTot), axis=-1)
+
+
+def logVerosimiglianza(frequenze, val):
+    """
+    Logaritmo della verosimiglianza di Poisson dei bin, a meno di una costante.
+    
+    """
+    positivi = val > 0
+    if np.any(frequenze[~positivi] > 0):
+        return -np.inf
+    return np.sum(frequenze[positivi] * np.log(val[positivi]) - val[positivi])
+
+
+def newtonPoissonNumpy(funzione, jacobiano, x, y, p0, limiti):
+    """
+    newtonPoisson() in numpy, usato quando Numba non è installato. Come per
+    levenbergMarquardtNumpy() un fit richiede circa 0.5-1.5 ms, non meno di
+    curve_fit: il guadagno di newtonPoisson() viene dal kernel compilato.
+
+    Parametri
+    ---------
+        funzione, jacobiano:    Modello e jacobiano (vedi MODELLI).
+        x, y:                   Punti e conteggi dei bin.
+        p0 (list):              Valori iniziali dei 3 parametri.
+        limiti (tuple):         Minimi e massimi dei parametri (vedi LIMITI).
+
+
+    Restituisce:
+        tuple:  (parametri, modello e jacobiano in x).
+
+    """
+    par = np.array(p0, dtype=float)
+    val, J = funzione(x, *par), jacobiano(x, *par)
+    logL = logVerosimiglianza(y, val)
+    
+    for _ in range(ITERAZIONI_MASSIME):
+        # punteggio g = Σ (y/µ - 1) ∂µ e informazione di Fisher F = Σ ∂µ ∂µᵀ / µ
+        # (i bin con valore atteso trascurabile sono esclusi, 1/µ vi traboccherebbe)
+        peso = np.divide(1, val, out=np.zeros_like(val), where=val > EPSILON)
+        g = J.T @ (y * peso - (peso > 0))
+        F = (J.T * peso) @ J
+        
+        try:
+            passo = np.linalg.solve(F, g)
+        except np.linalg.LinAlgError:
+            break
+        
+        # il passo viene dimezzato finché la verosimiglianza non aumenta
+        t = 1.0
+        while True:
+            nuovi = np.clip(par + t * passo, *limiti)
+            nuoviVal = funzione(x, *nuovi)
+            nuovaLogL = logVerosimiglianza(y, nuoviVal)
+            if nuovaLogL >= logL or t < 1e-3:
+                break
+            t *= 0.5
+        
+        if not nuovaLogL >= logL:
+            break   # nessun passo migliora: massimo raggiunto
+        
+        convergenza = np.all(np.abs(nuovi - par) <= TOLLERANZA * (np.abs(par) + TOLLERANZA))
+        
+        par, val, logL = nuovi, nuoviVal, nuovaLogL
+        J = jacobiano(x, *par)
+        
+        if convergenza:
+            break
+    
+    return par, val, J
+
+
+def newtonPoisson(modello, x, y, p0):
+    """
+    Massimizza la verosimiglianza di Poisson dei bin, Σ y log µ(x) - µ(x), con il
+    metodo di Newton nella forma di Fisher (hessiana sostituita dall'informazione
+    di Fisher Jᵀ diag(1/µ) J, che richiede solo il jacobiano). Partendo dalle stime
+    dei momenti bastano pochi passi. Con Numba usa il kernel compilato.
+        
+        newtonPoisson(modello, x, y, p0)
+    
+    Parametri
+    ---------
+        modello (str):  "binomiale" o "gaussiana" (vedi MODELLI).
+        x, y:           Punti e conteggi dei bin.
+        p0 (list):      Valori iniziali dei 3 parametri, es. da stimaMomenti().
+    
+    
+    Restituisce:
+        tuple:  (parametri di massima verosimiglianza, modello e jacobiano in x).
+    
+    """
+    p0 = np.clip(np.array(p0, dtype=float), *LIMITI[modello])
+    
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("newtonPoisson")(list(MODELLI).index(modello), x, y, p0,
+                                            *LIMITI[modello], TOLLERANZA, ITERAZIONI_MASSIME)
+    return newtonPoissonNumpy(*MODELLI[modello], x, y, p0, LIMITI[modello])
+
+
+def inversa3(M):
+    """
+    Inversa di una matrice 3x3, pseudo-inversa se singolare.
+    
+    """
+    try:
+        return np.linalg.inv(M)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(M)
+
+
+def fitModello(modello, frequenze, p0, stimatore="minimiQuadrati"):
+    """
+    Fit dell'istogramma dei valori interi 0, 1, ..., len(frequenze)-1 con lo stimatore
+    scelto (vedi STIMATORI):
+        
+        "momenti"         stime dei momenti (stimaMomenti()) raffinate da newtonPoisson();
+                          covarianza dall'informazione di Fisher
+        "minimiQuadrati"  minimi quadrati con jacobiano analitico (levenbergMarquardt())
+        "curve_fit"       minimi quadrati con scipy.optimize.curve_fit, per confronto
+        
+        fitModello(modello, frequenze, p0, stimatore="minimiQuadrati")
+    
+    Parametri
+    ---------
+        modello (str):              "binomiale" o "gaussiana" (vedi MODELLI).
+        frequenze (numpy.ndarray):  Frequenze di ogni valore intero.
+        p0 (list):                  Valori iniziali dei 3 parametri (non usati da "momenti").
+        stimatore (str):            Stimatore dei parametri.
+    
+    
+    Restituisce:
+        tuple:  (parametri, covarianza, χ², gradi di libertà).
+                La covarianza è quella dovuta alle fluttuazioni di Poisson delle frequenze.
+    
+    Solleva ValueError se il fit non ha gradi di libertà (meno di 4 bin con valore atteso non trascurabile).
+    
+    """
+    if stimatore not in STIMATORI:
+        raise ValueError(f"Stimatore non valido: {stimatore} (scegliere tra {', '.join(STIMATORI)})")
+    
+    frequenze = np.asarray(frequenze, dtype=float)
+    centri = np.arange(len(frequenze), dtype=float)
+    
+    if stimatore == "momenti":
+        par, val, J = newtonPoisson(modello, centri, frequenze, stimaMomenti(modello, frequenze))
+    elif stimatore == "curve_fit":
+        from scipy.optimize import curve_fit
+        
+        funzione, jacobiano = MODELLI[modello]
+        par, _ = curve_fit(funzione, centri, frequenze, p0=p0, jac=jacobiano)
+        val, J = funzione(centri, *par), jacobiano(centri, *par)
+    else:
+        par, val, J = levenbergMarquardt(modello, centri, frequenze, p0)
+    
+    gdl = np.sum(val > EPSILON) - 3   # 3 parametri da ottimizzare, bin con valore atteso non trascurabile
+    
+    # con meno di 4 bin utili (istogrammi degeneri, p vicino a 0 o 1, o fit partiti
+    # lontano dai dati) i parametri non sono determinati e il χ² ridotto non ha senso
+    if gdl <= 0:
+        raise ValueError(f"Fit {modello} senza gradi di libertà: {gdl + 3} bin con valore atteso non trascurabile")
+    
+    if stimatore == "momenti":
+        # covarianza di massima verosimiglianza: inversa dell'informazione di Fisher
+        # (i bin con valore atteso trascurabile non contribuiscono)
+        peso = np.divide(1, val, out=np.zeros_like(val), where=val > EPSILON)
+        cov = inversa3((J.T * peso) @ J)
+    else:
+        # il fit non è pesato: la covarianza dei parametri dovuta a frequenze di Poisson
+        # (varianza = valore atteso) è (JᵀJ)⁻¹ Jᵀ diag(val) J (JᵀJ)⁻¹
+        inversa = inversa3(J.T @ J)
+        cov = inversa @ (J.T * np.clip(val, 0, None)) @ J @ inversa
+    
+    mask = val > 0
+
+    chi2 = np.sum((frequenze[mask] - val[mask]) ** 2 / val[mask])
+
+    return par, cov, chi2, gdl
+
+
+def fitBinomialeGaussiana(frequenze, p0Bin, p0Gau, stimatore="minimiQuadrati"):
+    """
+    Fit binomiale e gaussiano dell'istogramma dei valori interi 0, 1, ..., len(frequenze)-1.
+    
+    Parametri
+    ---------
+        frequenze (numpy.ndarray):  Frequenze di ogni valore intero.
+        p0Bin (list):               Valori iniziali (n, p, amp) del fit binomiale.
+        p0Gau (list):               Valori iniziali (mu, sigma, amp) del fit gaussiano.
+        stimatore (str):            Stimatore dei parametri (vedi fitModello()).
+
+
+    Restituisce:
+        tuple:  (parametri, covarianza, χ², gradi di libertà) del fit binomiale e del fit gaussiano.
+
+    """
+    return fitModello("binomiale", frequenze, p0Bin, stimatore), fitModello("gaussiana", frequenze, p0Gau, stimatore)
+
+
+
+#------------------------------------------
+#    Fit di molti istogrammi insieme
+#------------------------------------------
+
+# I fit di K istogrammi sono eseguiti insieme: modelli e jacobiani sono valutati
+# su matrici (K, nBins) e i sistemi 3x3 sono risolti tutti con una chiamata,
+# per cui il costo dipende dalle operazioni sugli array e non dal numero di
+# fit. Le righe che convergono escono dal calcolo.
+
+# numero massimo di dimezzamenti del passo di newtonPoissonLotto()
+DIMEZZAMENTI_MASSIMI = 10
+
+def impilaIstogrammi(frequenze):
+    """
+    Impila K istogrammi, anche di lunghezze diverse, in una matrice (K, nBins)
+    completata con zeri.
+
+    Restituisce:
+        tuple:  (matrice delle frequenze, maschera (K, nBins) dei bin validi).
+
+    """
+    if isinstance(frequenze, np.ndarray) and frequenze.ndim == 2:
+        return frequenze.astype(float), np.ones(frequenze.shape, dtype=bool)
+
+    lunghezze = np.array([len(f) for f in frequenze])
+    validi = np.arange(lunghezze.max()) < lunghezze[:, None]
+
+    matrice = np.zeros(validi.shape)
+    matrice[validi] = np.concatenate(frequenze)
+
+    return matrice, validi
+
+
+def colonne(par):
+    """
+    Parametri (K, 3) come tre colonne (K, 1), da passare ai modelli insieme ai punti x.
+
+    """
+    return par.T[:, :, None]
+
+
+def risolviLotto(M, g):
+    """
+    Risolve i K sistemi 3x3 M[k] passo[k] = g[k], con la pseudo-inversa se qualcuno è singolare.
+
+    """
+    try:
+        return np.linalg.solve(M, g[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return (np.linalg.pinv(M) @ g[..., None])[..., 0]
+
+
+def inversaLotto(M):
+    """
+    Inverse di K matrici 3x3, pseudo-inverse se qualcuna è singolare.
+
+    """
+    try:
+        return np.linalg.inv(M)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(M)
+
+
+def logVerosimiglianzaLotto(Y, val):
+    """
+    logVerosimiglianza() di ogni riga di Y (K, nBins) con valori attesi val.
+
+    """
+    positivi = val > 0
+    termini = np.where(positivi, Y * np.log(np.where(positivi, val, 1)) - val, 0)
+
+    logL = np.sum(termini, axis=1)
+    logL[np.any(~positivi & (Y > 0), axis=1)] = -np.inf
+
+    return logL
+
+
+def levenbergMarquardtLotto(funzione, jacobiano, x, Y, validi, p0, limiti):
+    """
+    levenbergMarquardt() eseguito insieme su tutte le righe di Y (K, nBins),
+    con smorzamento e convergenza indipendenti per ogni riga. I bin non validi
+    (maschera validi) sono esclusi, i passi riportati nei limiti (vedi LIMITI).
+
+    Restituisce:
+        tuple:  (parametri (K, 3), modello (K, nBins) e jacobiano (K, nBins, 3) in x).
+
+    """
+    par = np.array(p0, dtype=float)
+
+    # l'ampiezza è lineare: si parte dal suo valore ottimo per la forma iniziale
+    forma = funzione(x, par[:, 0:1], par[:, 1:2], 1.0) * validi
+    norma = np.sum(forma * forma, axis=1)
+    par[:, 2] = np.where(norma > 0, np.sum(forma * Y, axis=1) / np.where(norma > 0, norma, 1), par[:, 2])
+
+    val = funzione(x, *colonne(par)) * validi
+    J = jacobiano(x, *colonne(par)) * validi[..., None]
+    somma = np.sum((Y - val) ** 2, axis=1)
+
+    smorzamento = np.full(len(Y), 1e-3)
+    attivi = np.ones(len(Y), dtype=bool)
+
+    for _ in range(ITERAZIONI_MASSIME):
+        righe = np.flatnonzero(attivi)
+
+        A = J[righe].transpose(0, 2, 1) @ J[righe]
+        g = np.einsum("kbi,kb->ki", J[righe], Y[righe] - val[righe])
+        diagonale = A.diagonal(axis1=1, axis2=2) + TOLLERANZA
+
+        nuovi = par[righe].copy()
+        nuoviVal = val[righe].copy()
+        nuovaSomma = np.full(len(righe), np.inf)
+
+        # aumenta lo smorzamento delle righe il cui passo non riduce la somma dei quadrati
+        prova = np.ones(len(righe), dtype=bool)
+        while np.any(prova):
+            M = A[prova] + (smorzamento[righe[prova], None] * diagonale[prova])[:, :, None] * np.eye(3)
+
+            candidati = np.clip(par[righe[prova]] + risolviLotto(M, g[prova]), *limiti)
+            v = funzione(x, *colonne(candidati)) * validi[righe[prova]]
+            s = np.sum((Y[righe[prova]] - v) ** 2, axis=1)
+
+            indici = np.flatnonzero(prova)
+            riuscite = s <= somma[righe[prova]]
+
+            nuovi[indici[riuscite]] = candidati[riuscite]
+            nuoviVal[indici[riuscite]] = v[riuscite]
+            nuovaSomma[indici[riuscite]] = s[riuscite]
+
+            smorzamento[righe[indici[~riuscite]]] *= 10
+            prova[indici[riuscite]] = False
+            prova[indici[smorzamento[righe[indici]] > 1e10]] = False
+
+        # le righe che nessun passo migliora hanno raggiunto il minimo
+        migliorati = nuovaSomma <= somma[righe]
+        with np.errstate(invalid="ignore"):
+            convergenza = ((somma[righe] - nuovaSomma <= TOLLERANZA * somma[righe]) |
+                           np.all(np.abs(nuovi - par[righe]) <= TOLLERANZA * (np.abs(par[righe]) + TOLLERANZA), axis=1))
+
+        aggiornate = righe[migliorati]
+        par[aggiornate] = nuovi[migliorati]
+        val[aggiornate] = nuoviVal[migliorati]
+        somma[aggiornate] = nuovaSomma[migliorati]
+        smorzamento[aggiornate] = np.maximum(smorzamento[aggiornate] / 10, 1e-12)
+
+        attivi[righe[~migliorati | convergenza]] = False
+        if not np.any(attivi):
+            break
+
+        J[attivi] = jacobiano(x, *colonne(par[attivi])) * validi[attivi, :, None]
+
+    return par, val, jacobiano(x, *colonne(par)) * validi[..., None]
+
+
+def newtonPoissonLotto(funzione, jacobiano, x, Y, validi, p0, limiti):
+    """
+    newtonPoisson() eseguito insieme su tutte le righe di Y (K, nBins), con
+    dimezzamento del passo e convergenza indipendenti per ogni riga. I bin non
+    validi (maschera validi) sono esclusi, i passi riportati nei limiti (vedi LIMITI).
+
+    Restituisce:
+        tuple:  (parametri (K, 3), modello (K, nBins) e jacobiano (K, nBins, 3) in x).
+
+    """
+    par = np.array(p0, dtype=float)
+
+    val = funzione(x, *colonne(par)) * validi
+    J = jacobiano(x, *colonne(par)) * validi[..., None]
+    logL = logVerosimiglianzaLotto(Y, val)
+
+    attivi = np.ones(len(Y), dtype=bool)
+
+    for _ in range(ITERAZIONI_MASSIME):
+        righe = np.flatnonzero(attivi)
+
+        # punteggio g = Σ (y/µ - 1) ∂µ e informazione di Fisher F = Σ ∂µ ∂µᵀ / µ
+        peso = np.divide(1, val[righe], out=np.zeros((len(righe), len(x))), where=val[righe] > EPSILON)
+        g = np.einsum("kbi,kb->ki", J[righe], Y[righe] * peso - (peso > 0))
+        F = (J[righe] * peso[..., None]).transpose(0, 2, 1) @ J[righe]
+
+        passo = risolviLotto(F, g)
+        candidati = np.clip(par[righe] + passo, *limiti)
+        v = funzione(x, *colonne(candidati)) * validi[righe]
+        l = logVerosimiglianzaLotto(Y[righe], v)
+
+        # il passo delle righe la cui verosimiglianza non aumenta viene dimezzato
+        t = np.ones(len(righe))
+        for _ in range(DIMEZZAMENTI_MASSIMI):
+            peggiori = ~(l >= logL[righe])
+            if not np.any(peggiori):
+                break
+
+            t[peggiori] *= 0.5
+            candidati[peggiori] = np.clip(par[righe[peggiori]] + t[peggiori, None] * passo[peggiori], *limiti)
+            v[peggiori] = funzione(x, *colonne(candidati[peggiori])) * validi[righe[peggiori]]
+            l[peggiori] = logVerosimiglianzaLotto(Y[righe[peggiori]], v[peggiori])
+
+        migliorati = l >= logL[righe]
+        convergenza = np.all(np.abs(candidati - par[righe]) <= TOLLERANZA * (np.abs(par[righe]) + TOLLERANZA), axis=1)
+
+        aggiornate = righe[migliorati]
+        par[aggiornate] = candidati[migliorati]
+        val[aggiornate] = v[migliorati]
+        logL[aggiornate] = l[migliorati]
+
+        attivi[righe[~migliorati | convergenza]] = False
+        if not np.any(attivi):
+            break
+
+        J[attivi] = jacobiano(x, *colonne(par[attivi])) * validi[attivi, :, None]
+
+    return par, val, jacobiano(x, *colonne(par)) * validi[..., None]
+
+
+def fitLotto(modello, frequenze, p0=None, stimatore="momenti"):
+    """
+    Fit di K istogrammi insieme, con gli stessi stimatori di fitModello():
+    Newton sulla verosimiglianza di Poisson ("momenti") o Levenberg-Marquardt
+    ("minimiQuadrati") vettorializzati su tutte le righe. Con "curve_fit" gli
+    istogrammi sono approssimati uno alla volta, per confronto.
+
+        fitLotto(modello, frequenze, p0=None, stimatore="momenti")
+
+    Parametri
+    ---------
+        modello (str):      "binomiale" o "gaussiana" (vedi MODELLI).
+        frequenze:          Matrice (K, nBins) oppure lista di K istogrammi, anche di
+                                lunghezze diverse (i bin mancanti sono esclusi dal fit).
+        p0:                 Valori iniziali (3,) o (K, 3) dei minimi quadrati
+                                (None -> stime dei momenti, non usati da "momenti").
+        stimatore (str):    Stimatore dei parametri (vedi STIMATORI).
+
+
+    Restituisce:
+        tuple:  (parametri (K, 3), covarianze (K, 3, 3), χ² (K,), χ² ridotti (K,), gradi di libertà (K,)).
+
+    Solleva ValueError se qualche istogramma non ha gradi di libertà.
+
+    """
+    if stimatore not in STIMATORI:
+        raise ValueError(f"Stimatore non valido: {stimatore} (scegliere tra {', '.join(STIMATORI)})")
+
+    Y, validi = impilaIstogrammi(frequenze)
+    centri = np.arange(Y.shape[1], dtype=float)
+    funzione, jacobiano = MODELLI[modello]
+
+    if p0 is None or stimatore == "momenti":
+        iniziali = stimaMomenti(modello, Y)
+    else:
+        iniziali = np.broadcast_to(np.asarray(p0, dtype=float), (len(Y), 3))
+    iniziali = np.clip(iniziali, *LIMITI[modello])
+
+    if stimatore == "curve_fit":
+        fit = [fitModello(modello, y[v], p, "curve_fit") for y, v, p in zip(Y, validi, iniziali)]
+        par, cov, chi2, gdl = (np.array(r) for r in zip(*fit))
+
+    else:
+        if stimatore == "momenti":
+            par, val, J = newtonPoissonLotto(funzione, jacobiano, centri, Y, validi, iniziali, LIMITI[modello])
+        else:
+            par, val, J = levenbergMarquardtLotto(funzione, jacobiano, centri, Y, validi, iniziali, LIMITI[modello])
+
+        gdl = np.sum(val > EPSILON, axis=1) - 3   # 3 parametri da ottimizzare, come in fitModello()
+
+        # come in fitModello(), gli istogrammi degeneri non si possono approssimare
+        if np.any(gdl <= 0):
+            raise ValueError(f"Fit {modello} senza gradi di libertà negli istogrammi {np.flatnonzero(gdl <= 0).tolist()}")
+
+        if stimatore == "momenti":
+            # covarianza di massima verosimiglianza: inversa dell'informazione di Fisher
+            peso = np.divide(1, val, out=np.zeros_like(val), where=val > EPSILON)
+            cov = inversaLotto((J * peso[..., None]).transpose(0, 2, 1) @ J)
+        else:
+            # covarianza dovuta alle frequenze di Poisson, come in fitModello()
+            inversa = inversaLotto(J.transpose(0, 2, 1) @ J)
+            cov = inversa @ (J * np.clip(val, 0, None)[..., None]).transpose(0, 2, 1) @ J @ inversa
+
+        mask = val > 0
+        chi2 = np.sum(np.where(mask, (Y - val) ** 2 / np.where(mask, val, 1), 0), axis=1)
+
+    chi2Rid = chi2 / gdl
+
+    return par, cov, chi2, chi2Rid, gdl
+
+
+def fitBinomialeGaussianaLotto(frequenze, p0Bin=None, p0Gau=None, stimatore="momenti"):
+    """
+    Fit binomiale e gaussiano di K istogrammi insieme (vedi fitLotto()).
+
+    Restituisce:
+        tuple:  risultati di fitLotto() del fit binomiale e del fit gaussiano.
+
+    """
+    return fitLotto("binomiale", frequenze, p0Bin, stimatore), fitLotto("gaussiana", frequenze, p0Gau, stimatore)
@@ -26,13 +26,15 @@
 #    Aggiungo moduli aggiuntivi
 #------------------------------------------
 
+import json
+
 import numpy as np
-import matplotlib.pyplot as plt
 
-from scipy.optimize import curve_fit
-from scipy.stats import norm
-from scipy.stats import multivariate_normal
-from scipy.stats import pearsonr, spearmanr
+from multiprocessing import Pool
+from multiprocessing import shared_memory
+
+# matplotlib e scipy sono importati solo quando servono (grafici, fit e
+# probabilità esatte), così che l'avvio non ne paghi il caricamento
 
 # -
 # Moduli propri
@@ -40,26 +42,61 @@ from scipy.stats import pearsonr, spearmanr
 
 from util import binomiale
 from util import gaussiana
+from util import pmfBinomiale
+from util import momentiIstogramma
+from util import correlazioneMomenti
+from util import creaGeneratore
+from util import normaleBivariataCdf
+from util import correlazioneSoglie
+from util import sommaGruppi
+
+from motori import passiBit
+from motori import contaPassi
+from motori import spacchettaPassi
+
+from kernel import NUMBA_DISPONIBILE
+from kernel import passiDestra
+from kernel import istogrammaPassi
+from kernel import istogrammaPassi3D
+from kernel import passiBooleani
+from kernel import accumulaTraiettorie
+from kernel import occupazioneTraiettorie
+
+from fit import fitBinomialeGaussiana
+from fit import fitBinomialeGaussianaLotto
+from fit import STIMATORI
+
+from figure import pyplot
+from figure import nomeFigura
+from figure import mostraFigura
+
+from cache import cacheAttiva
+from cache import chiaveCache
+from cache import leggiCache
+from cache import scriviCache
+
+from archivio import ArchivioPassi
 
-#------------------------------------------
-#    Modifica dei plot in stile LaTeX
-#------------------------------------------
-
-plt.rcParams.update({
-    "text.usetex": True,
-    "font.family": "serif",
-    "font.serif": ["Latin Modern Roman"],
-    "font.size": 12,
-    "axes.titlesize": 14,
-    "axes.labelsize": 12,
-    "xtick.labelsize": 10,
-    "ytick.labelsize": 10,
-})
 
 ##################
 #  CLASSE MADRE  #
 ##################
 
+# numero di palline simulate per blocco se non specificato
+DIM_BLOCCO = 100000
+
+# numero massimo di traiettorie disegnate nei grafici 3D
+TRAIETTORIE_MASSIME = 1000
+
+# numero massimo di barre dei grafici 3D: oltre, i bin vicini vengono sommati
+BARRE_MASSIME = 2000
+
+# lato massimo dei gruppi di bin sommati: oltre, l'istogramma 3D è una superficie
+AGGREGAZIONE_MASSIMA = 4
+
+# numero massimo di palline simulate per raggiungere la precisione se non specificato
+PALLE_MASSIME = 10**8
+
 class GaltonBase:
     """
     Classe base della macchina di Galton
@@ -70,816 +107,2554 @@ class GaltonBase:
     ----------
         nPassi:     numero di passi della macchina
         nPalle:     numero di palle da simulazione
+        dimBlocco:  numero di palline simulate per blocco
+                        se None la simulazione avviene in un solo passaggio
+        workers:    numero di processi tra cui dividere le palline
+        seed:       seme del generatore di numeri casuali (None -> seme casuale)
+        rng:        numpy.random.Generator da usare al posto di uno nuovo creato da seed
+        bitgen:     generatore di bit del Generator: "PCG64", "SFC64" o "Philox"
+        float32:    se True i numeri casuali float sono estratti in singola precisione
+        precisione: errore standard da raggiungere sui parametri µ e 𝜎 dei fit gaussiani
+                        se specificato nPalle è il primo lotto di palline, poi aumentato
+                        finché l'errore non scende sotto la precisione; i lotti aggiunti
+                        sono sommati solo all'istogramma (RISULTATI_PALLINE restano None)
+        grafici:    se False non viene creato nessun grafico: si eseguono solo simulazione
+                        e fit, i cui risultati sono restituiti da risultati()
+        stimatore:  stimatore dei parametri dei fit (vedi fit.STIMATORI): "momenti" (momenti
+                        raffinati con la verosimiglianza di Poisson dei bin), "minimiQuadrati"
+                        oppure "curve_fit" per confronto; None -> nessun fit, ad esempio per
+                        eseguire insieme i fit di molte simulazioni con fit.fitLotto()
+        archivio:   file in cui scrivere i singoli passi impacchettati in bit (vedi
+                        archivio.ArchivioPassi), letti poi da disco per traiettorie e
+                        analisi; richiede un motore che simula ogni passo (MOTORI_PASSI)
+                        e in memoria si conserva solo l'istogramma
+        motore:     motore di simulazione, definito dalle classi figlie
+        istogramma: istogramma dei risultati accumulato blocco per blocco
+        marginali:  proiezioni dell'istogramma su ogni asse già calcolate {asse: frequenze},
+                        svuotato ogni volta che l'istogramma cambia
+        generatoreEsterno:  True se rng è stato passato al costruttore: i risultati non
+                                dipendono solo da seed e non vengono salvati nella cache
+    
+    Metodi
+    ------
+        uniformi(forma)                     numeri casuali uniformi dal generatore dell'oggetto
+        simulaBlocchi(nPalle, dimBlocco)    generatore dei risultati di ogni blocco di palline
+        accumulaBlocchi(nPalle, dimBlocco)  simula a blocchi e accumula i risultati nell'istogramma
+        accumulatori()                      forma e tipo dei risultati accumulati dalla simulazione
+        dividiProcessi(nPalle, workers)     divide le palline tra i processi con semi indipendenti
+        accumulaParallelo(nPalle, workers)  simula in parallelo e accumula i risultati nell'istogramma
+        apriArchivio(nAssi)                 crea l'archivio su disco dei singoli passi, se richiesto
+        archivia(*assi)                     scrive nell'archivio i passi di un blocco di palline, se presente
+        soloIstogramma()                    True se la simulazione conserva solo l'istogramma
+        istogrammaMultinomiale(nPalle)      estrae l'intero istogramma di nPalle palline con una multinomiale
+        simulaIstogramma(nPalle)            simula le palline conservando solo l'istogramma
+        scartaRisultatiPalline()            elimina i risultati di ogni pallina, conservando solo l'istogramma
+        aggiungiPalle(n, soloIstogramma)    simula n palline in più e ripete il fit partendo dai parametri precedenti
+        simulaPrecisione(precisione)        aggiunge palline finché l'errore dei fit non scende sotto la precisione
+        marginale(asse)                     proiezione dell'istogramma su un asse, calcolata una volta sola
+        calcolaMarginale(asse)              calcola la proiezione dell'istogramma su un asse
+        risultati()                         dizionario con conteggi e risultati dei fit, senza grafici
+        daRisultati(risultati, **parametri) macchina ricostruita da risultati(), senza simulare, per i grafici
+        chiaveRisultati(traiettorie)        chiave della configurazione nella cache su disco
+        simulaFit(simula, stampa)           simula ed esegue i fit, oppure ne legge i risultati dalla cache
+        mostraTraiettorie()                 grafico delle traiettorie conservate (TRAIETTORIE)
+        salvaRisultati(chiave)              salva nella cache lo stato dopo simulazione e fit
+        caricaRisultati(chiave)             ripristina dalla cache lo stato dopo simulazione e fit
     
     """
-    def __init__(self, nPassi, nPalle):
-        self.nPassi = nPassi
-        self.nPalle = nPalle
-
-
-
-###################
-#  CLASSI FIGLIE  #
-###################
-
-
-#---------------------------
-#    Macchina di Galton 2D
-#---------------------------
-
-class Galton2D(GaltonBase):
-    """
-    Classe per la simulazione della macchina di Galton 2D
     
-        Galton2D(GaltonBase)
+    # parametri comuni a tutte le macchine che, insieme a PARAMETRI_FIGURA delle
+    # classi figlie, identificano una configurazione nella cache
+    PARAMETRI_CACHE = ("motore", "seed", "bitgen", "float32", "dimBlocco", "workers", "precisione", "stimatore")
     
-    Parametri
-    ---------
-        nPassi, nPalle: derivati dalla classe GaltonBase
-        probDX:         probabilità della palla di andare a destra 
-        passiDX:        array dei bins con frequenze
+    # motori che simulano ogni passo e possono scriverli nell'archivio, definiti dalle classi figlie
+    MOTORI_PASSI = ()
     
-    Metodi
-    ------
-        simula2D()          simula e restituisce il numero di passi verso destra di ogni pallina
-        mostra2D(stampa)    visualizzazione 2D dei passi verso destra effettuati
-            se stampa==True verranno mostrati i risultati dei fit
+    # attributi con i risultati di ogni pallina, definiti dalle classi figlie
+    RISULTATI_PALLINE = ()
+    
+    # attributi con i dati dei grafici delle traiettorie, conservati con stampa e
+    # grafici e salvati nella cache insieme ai risultati, definiti dalle classi figlie
+    TRAIETTORIE = ()
 
-    """
+    def __init__(self, nPassi, nPalle, dimBlocco=None, workers=1, seed=None, rng=None, bitgen="PCG64", float32=False,
+                 precisione=None, grafici=True, stimatore="momenti", archivio=None):
+        self.nPassi = nPassi
+        self.nPalle = nPalle
+        self.dimBlocco = dimBlocco
+        self.workers = workers
+        self.seed = seed
+        self.bitgen = bitgen
+        self.rng = rng if rng is not None else creaGeneratore(seed, bitgen)
+        self.generatoreEsterno = rng is not None
+        self.float32 = float32
+        self.precisione = precisione
+        self.grafici = grafici
+        self.percorsoArchivio = archivio
+        self.archivio = None
+        self.motore = None
+        self.istogramma = None
+        self.marginali = {}
+        
+        if stimatore is not None and stimatore not in STIMATORI:
+            raise ValueError(f"Stimatore dei fit non valido: {stimatore}")
+        if stimatore is None and precisione is not None:
+            raise ValueError("La precisione richiede i fit: lo stimatore non può essere None")
+        self.stimatore = stimatore
+    
     
-    def __init__(self, nPassi, nPalle, probDX, stampa=True):
+    def uniformi(self, forma):
         """
-        Costruttore della classe Galton2D.
-        Crea un'istanza della classe e inizializza l'oggetto
+        Estrae numeri casuali uniformi in [0, 1) dal generatore dell'oggetto,
+        in singola precisione se float32 == True.
         
         """
-        super().__init__(nPassi, nPalle)
-        self.probDX = probDX
-        self.passiDX = None
-        
-        self.parBin = None
-        self.parGau = None
+        return self.rng.random(forma, dtype=np.float32 if self.float32 else np.float64)
+    
+    
+    def simulaBlocchi(self, nPalle=None, dimBlocco=None):
+        """
+        Generatore che simula le palline a blocchi e restituisce i risultati
+        di un blocco alla volta, così come prodotti da simulaBlocco().
         
-        self.gdlBin = None
-        self.gdlGau = None
+            for blocco in G.simulaBlocchi(10**9, 10**6): ...
         
-        self.chi2Bin = None
-        self.chi2Gau = None
+        La memoria occupata dipende solo da dimBlocco e non da nPalle.
         
-        self.chi2RidBin = None
-        self.chi2RidGau = None
+        """
+        if nPalle is None:
+            nPalle = self.nPalle
+        if dimBlocco is None:
+            dimBlocco = self.dimBlocco if self.dimBlocco is not None else DIM_BLOCCO
         
+        for inizio in range(0, nPalle, dimBlocco):
+            yield self.simulaBlocco(min(dimBlocco, nPalle - inizio))
+    
+    
+    def accumulaBlocchi(self, nPalle=None, dimBlocco=None):
+        """
+        Simula le palline a blocchi sommando ogni blocco all'istogramma corrente.
         
-        self.simula2D(stampa)
-        self.mostra2D(stampa)
+        Con il motore "jit" e Numba installato il kernel compilato simula e
+        accumula tutte le palline in un solo passaggio, senza blocchi, a meno
+        che i passi non vadano scritti nell'archivio.
         
+        """
+        if self.motore == "jit" and NUMBA_DISPONIBILE and self.archivio is None:
+            self.accumulaKernel(self.nPalle if nPalle is None else nPalle)
+            return
         
-    def simula2D(self, stampa):
+        for blocco in self.simulaBlocchi(nPalle, dimBlocco):
+            self.accumula(blocco)
+    
+    
+    def accumulatori(self):
         """
-        Simula il numero di passi verso destra che ogni palline effettua e
-        li restituisce in un array
+        Restituisce un dizionario {attributo: (forma, tipo)} dei risultati
+        che accumula() somma blocco per blocco.
         
         """
-        pDX = np.random.rand(self.nPalle, self.nPassi) < self.probDX
-        self.passiDX = np.sum(pDX, axis = 1) # somma lungo il primo asse -> dim di self.nPalle
+        return {"istogramma": ((self.nPassi + 1,), np.int64)}
+    
+    
+    def dividiProcessi(self, nPalle, workers):
+        """
+        Divide nPalle palline tra i processi e crea un seme indipendente per ognuno.
         
-        if stampa:
-            self.mostraTraiettoria2D(pDX)
-
+        Restituisce:
+            tuple: (palline per processo, lista di numpy.random.SeedSequence)
         
-    def mostra2D(self, stampa=True):
         """
-        Mostra la distribuzione dei passi verso destro effettuati da ogni pallina
-        con sovrapposto il fit della distribuzione binomiale e gaussiana
+        # palline per processo: le prime nPalle % workers ne ricevono una in più
+        palleProcesso = np.full(workers, nPalle // workers)
+        palleProcesso[:nPalle % workers] += 1
+        
+        # semi indipendenti derivati dal generatore dell'oggetto: con seed fissato
+        # anche la simulazione in parallelo è riproducibile
+        semi = np.random.SeedSequence(self.rng.integers(0, 2**32, size=4)).spawn(workers)
         
+        return palleProcesso, semi
+    
+    
+    def accumulaParallelo(self, nPalle=None, workers=None):
         """
+        Divide le palline tra più processi. Ogni processo ha un seme indipendente
+        e accumula i propri risultati in una riga di un array in memoria condivisa,
+        così che nessun risultato per pallina venga trasferito tra i processi.
+        Alla fine le righe sono sommate nei risultati dell'oggetto.
         
-        bordiBins = np.arange(-0.5, self.nPassi + 1, 1)
-        istogr, Bordi = np.histogram(self.passiDX, bins=bordiBins,)
-        centriBins = (bordiBins[:-1] + bordiBins[1:]) / 2
+        """
+        if nPalle is None:
+            nPalle = self.nPalle
+        if workers is None:
+            workers = self.workers
+        
+        palleProcesso, semi = self.dividiProcessi(nPalle, workers)
+        
+        memorie = {}
+        condivise = {}
+        try:
+            for nome, (forma, tipo) in self.accumulatori().items():
+                dimensione = workers * int(np.prod(forma)) * np.dtype(tipo).itemsize
+                shm = shared_memory.SharedMemory(create=True, size=dimensione)
+                condivise[nome] = shm
+                memorie[nome] = (shm.name, (workers,) + forma, tipo)
+                np.ndarray((workers,) + forma, dtype=tipo, buffer=shm.buf)[:] = 0
+            
+            argomenti = [(self, int(palleProcesso[i]), semi[i], memorie, i) for i in range(workers)]
+            
+            with Pool(workers) as pool:
+                pool.starmap(lavoratoreGalton, argomenti)
+            
+            for nome, (_, forma, tipo) in memorie.items():
+                totale = np.ndarray(forma, dtype=tipo, buffer=condivise[nome].buf).sum(axis=0)
+                
+                if getattr(self, nome) is None:
+                    setattr(self, nome, totale)
+                else:
+                    setattr(self, nome, getattr(self, nome) + totale)
+            
+            self.marginali = {}
+        finally:
+            for shm in condivise.values():
+                shm.close()
+                shm.unlink()
+    
+    
+    def apriArchivio(self, nAssi):
+        """
+        Crea l'archivio su disco dei singoli passi, se richiesto con il parametro archivio.
+        Chiamata dai costruttori delle classi figlie dopo la scelta del motore.
         
+        """
+        if self.percorsoArchivio is None:
+            return
         
-        fig, axs = plt.subplots(2, 1, figsize=(8, 10))
+        if not self.MOTORI_PASSI:
+            raise ValueError(f"L'archivio dei passi non è disponibile per {type(self).__name__}")
+        if self.motore not in self.MOTORI_PASSI:
+            raise ValueError(f"L'archivio dei passi richiede un motore che simula ogni passo ({', '.join(self.MOTORI_PASSI)}): {self.motore}")
+        if self.workers > 1:
+            raise ValueError("L'archivio dei passi non è compatibile con workers > 1")
         
-        ############
-        # SENZA FIT
-        ############
+        self.archivio = ArchivioPassi(self.percorsoArchivio, self.nPassi, nAssi)
+    
+    
+    def archivia(self, *assi):
+        """
+        Scrive nell'archivio, se presente, i passi di un blocco di palline: una
+        matrice booleana o di parole di passiBit() per asse.
         
-        axs[0].bar(centriBins, istogr, width=1, color='skyblue', edgecolor='black', alpha=0.7, label=f"Osservata\n$n_{{\\mathrm{{PALLE}}}}$={self.nPalle}")
-        axs[0].set_title("Senza fit")
-        axs[0].set_xlabel("Passi verso DX")
-        axs[0].set_ylabel("Frequenza")
-        axs[0].legend()
+        """
+        if self.archivio is not None:
+            self.archivio.aggiungi(*assi)
 
-        ############
-        #  CON FIT
-        ############
 
-        axs[1].bar(centriBins, istogr, width=1, color='skyblue', edgecolor='black', alpha=0.7, label=f"Osservata\n$n_{{\\mathrm{{PALLE}}}}$={self.nPalle}")
+    def soloIstogramma(self):
+        """
+        True se la simulazione avviene a blocchi, in parallelo, con il motore
+        "istogramma" o con l'archivio dei passi e quindi non conserva i risultati
+        di ogni pallina ma solo l'istogramma.
         
+        """
+        return (self.dimBlocco is not None or self.workers > 1 or self.motore == "istogramma"
+                or self.archivio is not None)
+    
+    
+    def istogrammaMultinomiale(self, nPalle=None):
+        """
+        Estrae l'istogramma di nPalle palline con una sola estrazione multinomiale
+        sulle probabilità esatte dei bin date da probabilitaBin().
         
+        Il costo dipende solo dal numero di bin e non da nPalle.
         
-        #-----------------------------
-        # BINOMIALE tramite curve_fit
-        #-----------------------------
+        """
+        if nPalle is None:
+            nPalle = self.nPalle
         
+        prob = self.probabilitaBin()
+        prob = prob / np.sum(prob)   # evita che la somma superi 1 per arrotondamento
         
-        self.parBin, _ = curve_fit(binomiale, centriBins, istogr, 
-                                   p0=[self.nPassi, self.probDX, np.max(istogr)], 
-                                   absolute_sigma=True)
+        return self.rng.multinomial(nPalle, prob.ravel()).reshape(prob.shape)
+    
+    
+    def simulaIstogramma(self, nPalle=None):
+        """
+        Simula le palline (di default tutte) sommandole all'istogramma corrente,
+        conservando solo l'istogramma: con una sola multinomiale per il motore
+        "istogramma", in parallelo se workers > 1, altrimenti a blocchi.
         
-        xFit = np.linspace(min(centriBins), max(centriBins), 1000)
+        """
+        if self.motore == "istogramma":
+            nuovo = self.istogrammaMultinomiale(nPalle)
+            self.istogramma = nuovo if self.istogramma is None else self.istogramma + nuovo
+            self.marginali = {}
+        elif self.workers > 1:
+            self.accumulaParallelo(nPalle)
+        else:
+            self.accumulaBlocchi(nPalle)
+    
+    
+    def scartaRisultatiPalline(self):
+        """
+        Elimina i risultati di ogni pallina (attributi RISULTATI_PALLINE), che da
+        questo momento non descriverebbero più tutte le palline dell'istogramma.
         
-        fitBinom = binomiale(xFit, self.parBin[0], self.parBin[1], self.parBin[2])
+        """
+        for nome in self.RISULTATI_PALLINE:
+            setattr(self, nome, None)
+    
+    
+    def aggiungiPalle(self, n, soloIstogramma=False):
+        """
+        Simula solo n palline in più, le unisce ai risultati già simulati e ripete
+        il fit usando i parametri precedenti come valori iniziali.
         
+            G.aggiungiPalle(10**6)
         
-        axs[1].plot(xFit, fitBinom, 'orange', label=f"Fit Binomiale\n$n={self.parBin[0]:.1f}, p={self.parBin[1]:.2f}$")
+        Le palline sono simulate a blocchi come in accumulaBlocchi(), così che la
+        memoria dei passi non dipenda da n; i risultati di ogni pallina dei blocchi
+        sono uniti a quelli già simulati una sola volta alla fine. Con
+        soloIstogramma=True le palline sono solo sommate all'istogramma e i
+        risultati di ogni pallina vengono eliminati con scartaRisultatiPalline().
         
-        binVal = binomiale(centriBins, self.parBin[0], self.parBin[1], self.parBin[2])
+        """
+        if soloIstogramma and not self.soloIstogramma():
+            self.scartaRisultatiPalline()
         
-        maskBin = binVal > 0
+        if soloIstogramma or self.soloIstogramma():
+            self.simulaIstogramma(n)
+        else:
+            blocchi = []
+            for blocco in self.simulaBlocchi(n):
+                self.accumula(blocco)
+                blocchi.append(blocco)
+            
+            if blocchi:
+                self.aggiungiRisultati(unisciBlocchi(blocchi))
         
-        self.chi2Bin = np.sum((istogr[maskBin] - binVal[maskBin]) ** 2 / binVal[maskBin])
-        self.gdlBin = np.sum(maskBin) - 3 # 3 parametri da ottimizzare: n, prob, amp
+        self.nPalle += n
+        if self.stimatore is not None:
+            self.fit(precedenti=True)
+    
+    
+    def simulaPrecisione(self, precisione=None, palleMassime=PALLE_MASSIME):
+        """
+        Aggiunge palline a lotti crescenti finché l'errore standard dei parametri
+        controllati dalle classi figlie (erroriParametri()) non scende sotto la precisione.
         
-        self.chi2RidBin = self.chi2Bin / self.gdlBin
+        L'errore decresce come 1/sqrt(nPalle): ad ogni lotto si stimano le palline
+        ancora necessarie, senza però più che raddoppiare quelle già simulate.
+        I lotti, fino a PALLE_MASSIME palline, sono sommati solo all'istogramma
+        e simulati a blocchi: i risultati di ogni pallina vengono eliminati,
+        dato che la loro memoria crescerebbe con le palline aggiunte.
         
+        Restituisce:
+            int: Numero di palline utilizzate.
         
-        #-----------------------------
-        # GAUSSIANA tramite curve_fit
-        #-----------------------------
+        """
+        if precisione is None:
+            precisione = self.precisione
         
-        self.parGau, _ = curve_fit(gaussiana, centriBins, istogr, 
-                                   p0=[np.mean(self.passiDX), np.std(self.passiDX), np.max(istogr)], 
-                                   absolute_sigma=True)
+        errore = np.max(self.erroriParametri())
         
+        while not errore <= precisione and self.nPalle < palleMassime:
+            stima = np.ceil(self.nPalle * ((errore / precisione) ** 2 - 1)) if np.isfinite(errore) else self.nPalle
+            nuove = int(np.clip(stima, self.nPalle // 10 + 1, self.nPalle))
+            
+            self.aggiungiPalle(min(nuove, palleMassime - self.nPalle), soloIstogramma=True)
+            errore = np.max(self.erroriParametri())
         
-        fitGauss = gaussiana(xFit, self.parGau[0], self.parGau[1], self.parGau[2])
+        if errore <= precisione:
+            print(f"Precisione {precisione} raggiunta con {self.nPalle} palline (errore = {errore:.3g})\n")
+        else:
+            print(f"Precisione {precisione} non raggiunta con {self.nPalle} palline (errore = {errore:.3g})\n")
         
-        axs[1].plot(xFit, fitGauss, 'blue', label= f"Fit Gaussiana\n$\\mu={self.parGau[0]:.2f}, \\sigma={self.parGau[1]:.2f}$")
+        return self.nPalle
+    
+    
+    def marginale(self, asse=0):
+        """
+        Proiezione dell'istogramma sull'asse scelto. È calcolata una sola volta
+        per simulazione e conservata in marginali, così che fit e grafici la riutilizzino.
         
-        gauVal = gaussiana(centriBins, self.parGau[0], self.parGau[1], self.parGau[2])
+        """
+        if asse not in self.marginali:
+            self.marginali[asse] = self.calcolaMarginale(asse)
         
-        maskGau = gauVal > 0
-
-        self.chi2Gau = np.sum((istogr[maskGau] - gauVal[maskGau]) ** 2 / gauVal[maskGau])
-        self.gdlGau = np.sum(maskGau) - 3  # 3 parametri da ottimizzare: media, sigma, amp
+        return self.marginali[asse]
+    
+    
+    def calcolaMarginale(self, asse):
+        """
+        Calcola la proiezione dell'istogramma denso sull'asse scelto, sommando su tutti gli altri.
         
-        self.chi2RidGau = self.chi2Gau / self.gdlGau
-
-        axs[1].set_title("Con fit")
-        axs[1].set_xlabel("Passi verso DX")
-        axs[1].set_ylabel("Frequenza")
-        axs[1].legend()
+        """
+        altri = tuple(a for a in range(self.istogramma.ndim) if a != asse)
         
-        fig.suptitle(f"Distribuzione dei passi verso DX della Macchina di Galton 2D\nnPassi={self.nPassi},  nPalle={self.nPalle},  probDX={self.probDX}")
-        plt.tight_layout()
+        return np.sum(self.istogramma, axis=altri)
+    
+    
+    def risultati(self):
+        """
+        Restituisce i risultati della simulazione e dei fit senza creare grafici:
+        un dizionario {nome: valore} con gli attributi elencati in RISULTATI
+        dalle classi figlie (conteggi, parametri, χ² e gradi di libertà).
         
+            G = Galton2D(20, 10**6, 0.5, False, grafici=False)
+            G.risultati()["parGau"]
         
-        if stampa:
-            print("Parametri teorici:")
-            print("  Binomiale:")
-            print(f"    n={self.nPassi}")
-            print(f"    p={self.probDX}")
-            print("  Gaussiana:")
-            print(f"    µ={(self.nPassi*self.probDX):.1f}")
-            print(f"    𝜎={(np.sqrt(self.nPassi*self.probDX*(1-self.probDX))):.2f}")
-
-            print("\nRisultati dei fit:")
-            print("  Binomiale:")
-            print(f"    n = {self.parBin[0]:.2f}")
-            print(f"    p = {self.parBin[1]:.3f}\n")
-            print(f"    GdL = {self.gdlBin}")
-            print(f"    χ² = {self.chi2Bin:.2f}")
-            print(f"    χ² rid = {self.chi2RidBin:.2f}")
-
-            print("  Gaussiana:")
-            print(f"    µ = {self.parGau[0]:.2f}")
-            print(f"    𝜎 = {self.parGau[1]:.2f}\n")
-            print(f"    GdL = {self.gdlGau}")
-            print(f"    χ² = {self.chi2Gau:.2f}")
-            print(f"    χ² rid = {self.chi2RidGau:.2f}")
-            print("\n---")
-            plt.show()
-        else:
-            plt.draw()
-            plt.close()
+        """
+        return {nome: getattr(self, nome) for nome in self.RISULTATI}
     
     
-    def mostraTraiettoria2D(self, passiX):
+    @classmethod
+    def daRisultati(cls, risultati, **parametri):
         """
-        Visualizzazione 2D delle traiettorie delle palline lungo l'asse X.
+        Ricostruisce una macchina dai risultati() di una simulazione e dai parametri
+        della configurazione, senza simulare: i grafici di una macchina simulata in
+        un altro processo possono così essere disegnati senza trasferirne i risultati
+        per pallina né il generatore.
+        
+            R = Galton3Dcorr(10, 2000, 0.5, 0.5, M, False, grafici=False, seed=1).risultati()
+            G = Galton3Dcorr.daRisultati(R, nPassi=10, probX=0.5, probY=0.5, matriceCorrelazione=M, seed=1)
+            G.mostraMatrice()
         
         """
-        passiX = np.where(passiX, 1, -1)
+        galton = cls.__new__(cls)
+        galton.marginali = {}
         
-        traietX = np.zeros((self.nPalle, self.nPassi))
+        for nome, valore in {**parametri, **risultati}.items():
+            setattr(galton, nome, valore)
         
-        for i in range(1,self.nPassi):
-            traietX[:, i] = traietX[:, i-1] + passiX[:, i]
+        return galton
+    
+    
+    def chiaveRisultati(self, traiettorie=False):
+        """
+        Chiave della configurazione nella cache su disco (vedi cache.attivaCache()),
+        costruita dalla classe e dagli attributi di PARAMETRI_FIGURA e PARAMETRI_CACHE.
+        Le simulazioni che conservano le traiettorie (traiettorie=True) hanno una chiave
+        diversa, dato che simulano ogni passo e ne salvano anche le TRAIETTORIE.
         
-        plt.figure(figsize=(10, 7))
-        plt.title(f'Traiettorie delle palline nella macchina di Galton 2D\nnPassi={self.nPassi},  nPalle={self.nPalle},  probDX={self.probDX}')
-        plt.xlabel('Passi lungo X')
-        plt.ylabel('nPassi (pioli)')
+        Restituisce:
+            str: Chiave dei risultati, None se la cache non è attiva, se i risultati non
+                 sono riproducibili (seme casuale o generatore passato con rng) o se i
+                 passi vanno scritti nell'archivio.
         
-        for i in range(self.nPalle):
-            plt.plot(traietX[i], np.arange(self.nPassi), alpha=0.6)
+        """
+        if not cacheAttiva() or self.generatoreEsterno or not isinstance(self.seed, (int, np.integer)):
+            return None
+        if self.archivio is not None:
+            return None
         
-        plt.show()
-    
-
-
-#---------------------------
-#    Macchina di Galton 3D
-#---------------------------
-
-class Galton3D(GaltonBase):
-    """
-    Classe per la simulazione della macchina di Galton 3D.
+        parametri = {nome: getattr(self, nome) for nome in self.PARAMETRI_FIGURA + self.PARAMETRI_CACHE}
+        if traiettorie:
+            parametri["traiettorie"] = True
+        
+        return chiaveCache(classe=type(self).__name__, **parametri)
     
-    Galton3D(GaltonBase)
     
-    Parametri
-    ---------
-        nPassi, nPalle: derivati dalla classe GaltonBase
-        probX:          probabilità della pallina di andare a destra lungo l'asse X
-        probY:          probabilità della pallina di andare a destra lungo l'asse Y
-        risultatiX:     array di passi simulati verso destra da ogni palline lungo X
-        risultatiY:     array di passi simulati verso destra da ogni palline lungo Y
+    def simulaFit(self, simula, stampa):
+        """
+        Esegue la simulazione con la funzione simula, i fit e la ricerca della precisione,
+        salvandone i risultati nella cache su disco. Se la stessa configurazione è già
+        stata simulata con lo stesso seme i risultati sono letti dalla cache.
+        
+        Con stampa e grafici la simulazione conserva i dati delle traiettorie (TRAIETTORIE),
+        salvati nella cache con i risultati: il grafico delle traiettorie è disegnato
+        alla fine, sia dopo la simulazione che dopo la lettura dalla cache.
+            
+            self.simulaFit(lambda: self.simula2D(stampa), stampa)
+        
+        """
+        traiettorie = bool(stampa and self.grafici and self.TRAIETTORIE)
+        chiave = self.chiaveRisultati(traiettorie)
+        
+        if chiave is not None and self.caricaRisultati(chiave):
+            if stampa:
+                print("Risultati letti dalla cache\n")
+        else:
+            simula()
+            
+            if self.stimatore is not None:
+                self.fit()
+                if self.precisione is not None:
+                    self.simulaPrecisione()
+            
+            if chiave is not None:
+                self.salvaRisultati(chiave)
+        
+        if traiettorie:
+            self.mostraTraiettorie()
     
     
-    Metodi
-    ------
-        simula3D(stampa)        simula il numero di passi verso destra di ogni pallina
-                                    Se stampa==True fa vedere la traiettoria
-        mostra3D()              visualizzazione 3D dei passi verso destra effettuati
-        proiezioni3D(stampa)    visualizzazione 2D dei passi verso destra effettuati lungo X e lungo Y
-        mostraMatrice()         visualizzazione di una matrice di frequenze delle palline nei bin
+    def mostraTraiettorie(self):
+        """
+        Grafico delle traiettorie conservate dalla simulazione o lette dalla cache
+        (TRAIETTORIE), definito dalle classi figlie.
         
-    """
+        """
+        pass
     
-    def __init__(self, nPassi, nPalle, probX, probY, stampa=True):
+    
+    def salvaRisultati(self, chiave):
         """
-        Costruttore della classe Galton3D.
-        Crea un'istanza della classe e inizializza l'oggetto
+        Salva nella cache i risultati (RISULTATI), le traiettorie (TRAIETTORIE), gli
+        accumulatori (accumulatori()) e lo stato del generatore, così che anche
+        aggiungiPalle() dopo la lettura prosegua come dopo la simulazione. I risultati
+        per pallina non sono salvati.
         
         """
-        super().__init__(nPassi, nPalle)
-        self.probX = probX
-        self.probY = probY
-        self.risultatiX, self.risultatiY = None, None
-        
-        self.parBinX = None
-        self.parBinY = None
-        
-        self.parGauX = None
-        self.parGauY = None
+        nomi = dict.fromkeys(self.RISULTATI + self.TRAIETTORIE + tuple(self.accumulatori()))
+        risultati = {nome: getattr(self, nome) for nome in nomi if getattr(self, nome, None) is not None}
         
-        self.gdlBinX = None
-        self.gdlBinY = None
+        stato = self.rng.bit_generator.state
+        risultati["statoGeneratore"] = json.dumps(stato, default=lambda valore: valore.tolist())
         
-        self.gdlGauX = None
-        self.gdlGauY = None
+        scriviCache(chiave, risultati)
+    
+    
+    def caricaRisultati(self, chiave):
+        """
+        Ripristina lo stato salvato da salvaRisultati().
         
-        self.chi2BinX = None
-        self.chi2BinY = None
+        Restituisce:
+            bool: True se i risultati erano nella cache.
         
-        self.chi2GauX = None
-        self.chi2GauY = None
+        """
+        risultati = leggiCache(chiave)
         
-        self.chi2RidBinX = None
-        self.chi2RifBinY = None
+        if risultati is None:
+            return False
         
-        self.chi2RidGauX = None
-        self.chi2RidGauY = None
+        self.rng.bit_generator.state = json.loads(str(risultati.pop("statoGeneratore")))
         
+        for nome, valore in risultati.items():
+            setattr(self, nome, valore[()] if valore.ndim == 0 else valore)
         
+        self.marginali = {}
         
-        if type(self) == Galton3D:
-            print("Avviata la simulazione della macchina di Galton 3D\n\n")
-            
-            self.simula3D(stampa)
-            if stampa:
-                self.mostra3D()
-                self.mostraMatrice()
-            self.proiezioni3D(stampa)
-
+        return True
     
-    def simula3D(self, stampa):
+    
+    def nomeFigura(self, tipo):
         """
-        Simula il numero di passi verso destra che ogni palline effettua lungo l'asse X e Y
-        in base alla probabilità probX e probY di andare verso destra.
+        Nome del file di una figura esportata (vedi figure.esportaFigure()), costruito
+        dal tipo di grafico e dagli attributi elencati in PARAMETRI_FIGURA dalle classi figlie.
+        Il seme compare solo se specificato.
         
         """
-        # array casuali [nPalle, nPassi] con valori tra 0 e 1
-        passiX = np.random.rand(self.nPalle, self.nPassi) < self.probX
-        passiY = np.random.rand(self.nPalle, self.nPassi) < self.probY
+        parametri = {nome: getattr(self, nome) for nome in self.PARAMETRI_FIGURA + ("seed",)}
         
-        # somma di tutti i passi in X e Y
-        self.risultatiX = np.sum(passiX, axis=1)
-        self.risultatiY = np.sum(passiY, axis=1)
-        
-        if stampa:
-            self.mostraTraiettoria3D(passiX, passiY)
+        if parametri["seed"] is None:
+            del parametri["seed"]
         
+        return nomeFigura(tipo, **parametri)
+
+
+
+def unisciBlocchi(blocchi):
+    """
+    Unisce i risultati di più blocchi di simulaBlocco(), un array o una tupla di
+    array per blocco, concatenandoli lungo le palline.
+    
+    """
+    if isinstance(blocchi[0], tuple):
+        return tuple(np.concatenate(parti) for parti in zip(*blocchi))
+    
+    return np.concatenate(blocchi)
+
+
+def lavoratoreGalton(galton, nPalle, seme, memorie, riga):
+    """
+    Funzione eseguita da ogni processo di accumulaParallelo().
+    
+    Collega i risultati accumulati dell'oggetto alla propria riga degli array
+    in memoria condivisa e vi simula nPalle palline a blocchi.
+    
+    Parametri
+    ---------
+        galton:     oggetto della macchina di Galton da simulare
+        nPalle:     numero di palline simulate dal processo
+        seme:       numpy.random.SeedSequence indipendente del processo
+        memorie:    {attributo: (nome della memoria condivisa, forma, tipo)}
+        riga:       indice della riga riservata al processo
+    
+    """
+    galton.rng = creaGeneratore(seme, galton.bitgen)
+    
+    condivise = []
+    for nome, (nomeMemoria, forma, tipo) in memorie.items():
+        shm = shared_memory.SharedMemory(name=nomeMemoria)
+        condivise.append(shm)
+        setattr(galton, nome, np.ndarray(forma, dtype=tipo, buffer=shm.buf)[riga])
+    
+    galton.accumulaBlocchi(nPalle)
+    
+    # le viste devono essere rilasciate prima di chiudere la memoria condivisa
+    for nome in memorie:
+        setattr(galton, nome, None)
+    
+    for shm in condivise:
+        shm.close()
+
+
+
+###################
+#  CLASSI FIGLIE  #
+###################
+
+
+#---------------------------
+#    Macchina di Galton 2D
+#---------------------------
+
+class Galton2D(GaltonBase):
+    """
+    Classe per la simulazione della macchina di Galton 2D
+    
+        Galton2D(GaltonBase)
+    
+    Parametri
+    ---------
+        nPassi, nPalle: derivati dalla classe GaltonBase
+        probDX:         probabilità della palla di andare a destra 
+        passiDX:        array dei bins con frequenze
+        motore:         motore di simulazione dei passi
+                            "binomiale" estrae direttamente il numero di passi a DX di ogni pallina
+                            "matrice"   simula ogni passo (necessario per le traiettorie)
+                            "bit"       simula ogni passo come singolo bit casuale, 64 passi per parola
+                            "istogramma" estrae l'intero istogramma con una multinomiale sulla binomiale
+                            "jit"       simula ogni passo con i kernel compilati di Numba, senza array
+                                        intermedi (se Numba non è installato usa le versioni NumPy)
+                            se None si usa "matrice" solo se stampa==True
+        dimBlocco:      derivato dalla classe GaltonBase
+                            se specificato passiDX resta None e si conserva solo l'istogramma
+        workers:        derivato dalla classe GaltonBase
+                            se maggiore di 1 passiDX resta None e si conserva solo l'istogramma
+        archivio:       derivato dalla classe GaltonBase
+                            i passi sono scritti su disco e passiDX resta None
+    
+    Metodi
+    ------
+        simula2D()          simula e restituisce il numero di passi verso destra di ogni pallina
+        simulaPassi(n)      simula i singoli passi di n palline
+        simulaBlocco(n)     simula il numero di passi verso destra di n palline
+        accumula(passiDX)   somma i passi verso destra di un blocco all'istogramma
+        accumulaKernel(n)   simula n palline e le somma all'istogramma con il kernel compilato
+        aggiungiRisultati(passiDX)  unisce i passi verso destra di nuove palline a passiDX
+        fit(precedenti)     fit binomiale e gaussiano dell'istogramma
+            se precedenti==True parte dai parametri del fit precedente
+        erroriParametri()   errori standard di µ e 𝜎 del fit gaussiano
+        stampaFit()         stampa i parametri teorici e i risultati dei fit
+        probabilitaBin()    probabilità binomiali esatte di ogni bin
+        mostra2D(stampa)    visualizzazione 2D dei passi verso destra effettuati
+            se stampa==True verranno mostrati i risultati dei fit
+
+    """
+    
+    # motori di simulazione disponibili
+    MOTORI = ("binomiale", "matrice", "bit", "istogramma", "jit")
+    
+    # motori che simulano ogni passo, utilizzabili con l'archivio
+    MOTORI_PASSI = ("matrice", "bit", "jit")
+
+    # attributi con i risultati di ogni pallina
+    RISULTATI_PALLINE = ("passiDX",)
+
+    # attributi restituiti da risultati()
+    RISULTATI = ("nPalle", "istogramma",
+                 "parBin", "parGau", "covBin", "covGau",
+                 "chi2Bin", "chi2Gau", "gdlBin", "gdlGau", "chi2RidBin", "chi2RidGau")
+    
+    # occupazione delle traiettorie, salvata nella cache con stampa e grafici
+    TRAIETTORIE = ("occupazione",)
+    
+    # parametri nei nomi delle figure esportate
+    PARAMETRI_FIGURA = ("nPassi", "nPalle", "probDX")
+    
+    def __init__(self, nPassi, nPalle, probDX, stampa=True, motore=None, **opzioni):
+        """
+        Costruttore della classe Galton2D.
+        Crea un'istanza della classe e inizializza l'oggetto
+        
+        Le opzioni (dimBlocco, workers, seed, rng, bitgen, float32, precisione, grafici, stimatore, archivio) sono passate a GaltonBase.
+        
+        """
+        super().__init__(nPassi, nPalle, **opzioni)
+        self.probDX = probDX
+        self.passiDX = None
+        self.occupazione = None
+        
+        # la matrice dei passi serve solo per mostrare le traiettorie, l'archivio
+        # riceve direttamente le parole di bit
+        if motore is None and self.percorsoArchivio is not None:
+            motore = "bit"
+        elif motore is None:
+            motore = "matrice" if stampa and self.grafici else "binomiale"
+        
+        if motore not in self.MOTORI:
+            raise ValueError(f"Motore di simulazione non valido: {motore}")
+        
+        self.motore = motore
+        self.apriArchivio(1)
+        
+        self.parBin = None
+        self.parGau = None
+        
+        self.covBin = None
+        self.covGau = None
+        
+        self.gdlBin = None
+        self.gdlGau = None
+        
+        self.chi2Bin = None
+        self.chi2Gau = None
+        
+        self.chi2RidBin = None
+        self.chi2RidGau = None
+        
+        
+        # simulazione e fit, letti dalla cache se già eseguiti con lo stesso seme
+        self.simulaFit(lambda: self.simula2D(stampa), stampa)
+        
+        # senza stimatore i fit sono lasciati al chiamante
+        if self.stimatore is None:
+            return
+        
+        # senza stampa il grafico non verrebbe mostrato: non viene nemmeno creato
+        if stampa and self.grafici:
+            self.mostra2D(stampa)
+        elif stampa:
+            self.stampaFit()
+        
+        
+    def simula2D(self, stampa):
+        """
+        Simula il numero di passi verso destra che ogni palline effettua e
+        li restituisce in un array
+        
+        Con il motore "binomiale" il numero di passi a DX di ogni pallina è
+        estratto direttamente dalla distribuzione binomiale: memoria O(nPalle)
+        invece della matrice (nPalle, nPassi).
+        
+        Se dimBlocco è specificato le palline sono simulate a blocchi, se
+        workers > 1 in parallelo: in entrambi i casi si conserva solo l'istogramma.
+        
+        """
+        self.istogramma = None
+        
+        if self.soloIstogramma():
+            self.simulaIstogramma()
+            
+            # con l'archivio l'occupazione delle traiettorie è letta a blocchi dal disco
+            if self.archivio is not None and stampa and self.grafici:
+                self.occupazione = self.archivio.occupazione()
+            return
+        
+        if stampa and self.grafici and self.motore in ("matrice", "bit", "jit"):
+            # i passi sono simulati a blocchi e sommati all'occupazione delle
+            # traiettorie, senza conservare la matrice (nPalle, nPassi)
+            occupazione = np.zeros((self.nPassi, 2 * self.nPassi - 1), dtype=np.int64)
+            passiDX = []
+            
+            for inizio in range(0, self.nPalle, DIM_BLOCCO):
+                pDX = self.simulaPassi(min(DIM_BLOCCO, self.nPalle - inizio))
+                passiDX.append(np.sum(pDX, axis = 1)) # somma lungo il primo asse -> dim del blocco
+                occupazioneTraiettorie(pDX, occupazione)
+            
+            self.passiDX = np.concatenate(passiDX)
+            self.occupazione = occupazione
+        else:
+            self.passiDX = self.simulaBlocco(self.nPalle)
+        
+        self.accumula(self.passiDX)
+    
+    
+    def simulaPassi(self, n):
+        """
+        Simula i singoli passi di n palline, scrivendoli nell'archivio se presente.
+        Restituisce la matrice booleana (n, nPassi) dei passi verso destra.
+        
+        """
+        if self.motore == "bit":
+            parole = passiBit(n, self.nPassi, self.probDX, self.rng)
+            self.archivia(parole)
+            return spacchettaPassi(parole, self.nPassi)
+        
+        if self.motore == "jit":
+            passi = passiBooleani(n, self.nPassi, self.probDX, self.rng)
+        else:
+            passi = self.uniformi((n, self.nPassi)) < self.probDX
+        
+        self.archivia(passi)
+        
+        return passi
+    
+    
+    def simulaBlocco(self, n):
+        """
+        Simula il numero di passi verso destra di n palline con il motore scelto.
+        
+        """
+        if self.motore == "binomiale":
+            return self.rng.binomial(self.nPassi, self.probDX, n)
+        
+        if self.motore == "bit":
+            parole = passiBit(n, self.nPassi, self.probDX, self.rng)
+            self.archivia(parole)
+            return contaPassi(parole)
+        
+        # con l'archivio servono i singoli passi, non solo il loro numero
+        if self.motore == "jit" and self.archivio is None:
+            return passiDestra(n, self.nPassi, self.probDX, self.rng)
+        
+        return np.sum(self.simulaPassi(n), axis=1)
+    
+    
+    def accumula(self, passiDX):
+        """
+        Somma all'istogramma i passi verso destra di un blocco di palline.
+        
+        """
+        if self.istogramma is None:
+            self.istogramma = np.zeros(self.nPassi + 1, dtype=np.int64)
+        
+        self.istogramma += np.bincount(passiDX, minlength=self.nPassi + 1)
+        self.marginali = {}
+    
+    
+    def accumulaKernel(self, n):
+        """
+        Simula n palline e somma i loro passi verso destra all'istogramma
+        in un solo passaggio con il kernel compilato.
+        
+        """
+        if self.istogramma is None:
+            self.istogramma = np.zeros(self.nPassi + 1, dtype=np.int64)
+        
+        istogrammaPassi(n, self.nPassi, self.probDX, self.rng, self.istogramma)
+        self.marginali = {}
+    
+    
+    def aggiungiRisultati(self, passiDX):
+        """
+        Unisce i passi verso destra di nuove palline a quelli già simulati.
+        
+        """
+        if self.passiDX is not None:
+            self.passiDX = np.concatenate((self.passiDX, passiDX))
+    
+    
+    def probabilitaBin(self):
+        """
+        Probabilità esatte di ogni numero di passi verso destra (distribuzione binomiale),
+        lette dalla tabella condivisa di pmfBinomiale().
+        
+        """
+        return pmfBinomiale(self.nPassi, self.probDX)
+    
+    
+    def fit(self, precedenti=False):
+        """
+        Fit binomiale e gaussiano dell'istogramma dei passi verso destra.
+        Calcola parametri, covarianze, χ², gradi di libertà e χ² ridotto.
+        
+        Se precedenti==True e un fit è già stato fatto, i parametri precedenti
+        sono usati come valori iniziali (l'ampiezza è ripresa dall'istogramma).
+        
+        """
+        istogr = self.istogramma
+        
+        if precedenti and self.parBin is not None:
+            p0Bin = [self.parBin[0], self.parBin[1], np.max(istogr)]
+            p0Gau = [self.parGau[0], self.parGau[1], np.max(istogr)]
+        else:
+            p0Bin = [self.nPassi, self.probDX, np.max(istogr)]
+            p0Gau = [*momentiIstogramma(istogr), np.max(istogr)]
+        
+        fitBin, fitGau = fitBinomialeGaussiana(istogr, p0Bin, p0Gau, self.stimatore)
+        
+        self.parBin, self.covBin, self.chi2Bin, self.gdlBin = fitBin
+        self.parGau, self.covGau, self.chi2Gau, self.gdlGau = fitGau
+        
+        self.chi2RidBin = self.chi2Bin / self.gdlBin
+        self.chi2RidGau = self.chi2Gau / self.gdlGau
+    
+    
+    def erroriParametri(self):
+        """
+        Errori standard di µ e 𝜎 del fit gaussiano, usati da simulaPrecisione().
+        
+        """
+        return np.sqrt(np.diag(self.covGau)[:2])
+
+        
+    def mostra2D(self, stampa=True):
+        """
+        Mostra la distribuzione dei passi verso destro effettuati da ogni pallina
+        con sovrapposto il fit della distribuzione binomiale e gaussiana calcolato da fit()
+        
+        """
+        plt = pyplot()
+        
+        istogr = self.istogramma
+        centriBins = np.arange(self.nPassi + 1, dtype=float)
+        
+        
+        fig, axs = plt.subplots(2, 1, figsize=(8, 10))
+        
+        ############
+        # SENZA FIT
+        ############
+        
+        axs[0].bar(centriBins, istogr, width=1, color='skyblue', edgecolor='black', alpha=0.7, label=f"Osservata\n$n_{{\\mathrm{{PALLE}}}}$={self.nPalle}")
+        axs[0].set_title("Senza fit")
+        axs[0].set_xlabel("Passi verso DX")
+        axs[0].set_ylabel("Frequenza")
+        axs[0].legend()
+
+        ############
+        #  CON FIT
+        ############
+
+        axs[1].bar(centriBins, istogr, width=1, color='skyblue', edgecolor='black', alpha=0.7, label=f"Osservata\n$n_{{\\mathrm{{PALLE}}}}$={self.nPalle}")
+        
+        
+        
+        #--------------------------------
+        # BINOMIALE dal fit (vedi fit())
+        #--------------------------------
+        
+        xFit = np.linspace(min(centriBins), max(centriBins), 1000)
+        
+        fitBinom = binomiale(xFit, self.parBin[0], self.parBin[1], self.parBin[2])
+        
+        
+        axs[1].plot(xFit, fitBinom, 'orange', label=f"Fit Binomiale\n$n={self.parBin[0]:.1f}, p={self.parBin[1]:.2f}$")
+        
+        
+        #--------------------------------
+        # GAUSSIANA dal fit (vedi fit())
+        #--------------------------------
+        
+        fitGauss = gaussiana(xFit, self.parGau[0], self.parGau[1], self.parGau[2])
+        
+        axs[1].plot(xFit, fitGauss, 'blue', label= f"Fit Gaussiana\n$\\mu={self.parGau[0]:.2f}, \\sigma={self.parGau[1]:.2f}$")
+
+        axs[1].set_title("Con fit")
+        axs[1].set_xlabel("Passi verso DX")
+        axs[1].set_ylabel("Frequenza")
+        axs[1].legend()
+        
+        fig.suptitle(f"Distribuzione dei passi verso DX della Macchina di Galton 2D\nnPassi={self.nPassi},  nPalle={self.nPalle},  probDX={self.probDX}")
+        plt.tight_layout()
+        
+        
+        if stampa:
+            self.stampaFit()
+            mostraFigura(self.nomeFigura("distribuzione2D"))
+        else:
+            plt.draw()
+            plt.close()
+    
+    
+    def stampaFit(self):
+        """
+        Stampa i parametri teorici e i risultati dei fit binomiale e gaussiano.
+        
+        """
+        print("Parametri teorici:")
+        print("  Binomiale:")
+        print(f"    n={self.nPassi}")
+        print(f"    p={self.probDX}")
+        print("  Gaussiana:")
+        print(f"    µ={(self.nPassi*self.probDX):.1f}")
+        print(f"    𝜎={(np.sqrt(self.nPassi*self.probDX*(1-self.probDX))):.2f}")
+        
+        print("\nRisultati dei fit:")
+        print("  Binomiale:")
+        print(f"    n = {self.parBin[0]:.2f}")
+        print(f"    p = {self.parBin[1]:.3f}\n")
+        print(f"    GdL = {self.gdlBin}")
+        print(f"    χ² = {self.chi2Bin:.2f}")
+        print(f"    χ² rid = {self.chi2RidBin:.2f}")
+        
+        print("  Gaussiana:")
+        print(f"    µ = {self.parGau[0]:.2f}")
+        print(f"    𝜎 = {self.parGau[1]:.2f}\n")
+        print(f"    GdL = {self.gdlGau}")
+        print(f"    χ² = {self.chi2Gau:.2f}")
+        print(f"    χ² rid = {self.chi2RidGau:.2f}")
+        print("\n---")
+    
+    
+    def mostraTraiettorie(self):
+        """
+        Grafico dell'occupazione delle traiettorie, se conservata dalla simulazione.
+        
+        """
+        if self.occupazione is not None:
+            self.mostraTraiettoria2D(self.occupazione)
+    
+    
+    def mostraTraiettoria2D(self, occupazione):
+        """
+        Visualizzazione 2D delle traiettorie delle palline lungo l'asse X, come mappa
+        del numero di palline passate per ogni posizione ad ogni piolo.
+        
+        Parametri
+        ---------
+            occupazione (numpy.ndarray): Occupazione (nPassi, 2*nPassi-1) calcolata
+                                         da occupazioneTraiettorie().
+        
+        """
+        plt = pyplot()
+        
+        limite = self.nPassi - 0.5
+        
+        # le palline delle traiettorie, senza quelle aggiunte da simulaPrecisione()
+        nPalle = int(np.sum(occupazione[0]))
+        
+        plt.figure(figsize=(10, 7))
+        plt.title(f'Traiettorie delle palline nella macchina di Galton 2D\nnPassi={self.nPassi},  nPalle={nPalle},  probDX={self.probDX}')
+        plt.xlabel('Passi lungo X')
+        plt.ylabel('nPassi (pioli)')
+        
+        # scala logaritmica: al primo piolo passano tutte le palline, ai bordi poche
+        plt.imshow(np.ma.masked_equal(occupazione, 0), origin='lower', aspect='auto', cmap='Blues', norm='log',
+                   extent=[-limite, limite, -0.5, self.nPassi - 0.5], interpolation='nearest')
+        plt.colorbar(label='Numero di palline')
+        
+        mostraFigura(self.nomeFigura("traiettorie2D"))
+    
+
+
+#---------------------------
+#    Macchina di Galton 3D
+#---------------------------
+
+class Galton3D(GaltonBase):
+    """
+    Classe per la simulazione della macchina di Galton 3D.
+    
+    Galton3D(GaltonBase)
+    
+    Parametri
+    ---------
+        nPassi, nPalle: derivati dalla classe GaltonBase
+        probX:          probabilità della pallina di andare a destra lungo l'asse X
+        probY:          probabilità della pallina di andare a destra lungo l'asse Y
+        risultatiX:     array di passi simulati verso destra da ogni palline lungo X
+        risultatiY:     array di passi simulati verso destra da ogni palline lungo Y
+        motore:         motore di simulazione dei passi
+                            "matrice"   confronta un numero casuale float con la probabilità ad ogni passo
+                            "bit"       simula ogni passo come singolo bit casuale, 64 passi per parola
+                            "istogramma" estrae l'intero istogramma congiunto con una multinomiale
+                                        sul prodotto delle due binomiali
+                            "jit"       simula ogni passo con i kernel compilati di Numba, senza array
+                                        intermedi (se Numba non è installato usa le versioni NumPy)
+        dimBlocco:      derivato dalla classe GaltonBase
+                            se specificato risultatiX e risultatiY restano None e si conserva
+                            solo l'istogramma congiunto
+        workers:        derivato dalla classe GaltonBase
+                            se maggiore di 1 si conserva solo l'istogramma congiunto
+    
+    
+    Metodi
+    ------
+        simula3D(stampa)        simula il numero di passi verso destra di ogni pallina
+                                    Se stampa==True fa vedere la traiettoria
+        simulaTraiettorie(n)    simula n palline a blocchi conservando le prime TRAIETTORIE_MASSIME traiettorie
+        simulaPassi(n)          simula i singoli passi di n palline lungo X e Y
+        simulaBlocco(n)         simula il numero di passi verso destra di n palline lungo X e Y
+        accumula(blocco)        somma i risultati di un blocco all'istogramma congiunto
+        accumulaKernel(n)       simula n palline e le somma all'istogramma congiunto con il kernel compilato
+        aggiungiRisultati(blocco)   unisce i risultati di nuove palline a risultatiX e risultatiY
+        fit(precedenti)         fit binomiale e gaussiano delle proiezioni su X e Y
+                                    se precedenti==True parte dai parametri del fit precedente
+        erroriParametri()       errori standard di µ e 𝜎 dei fit gaussiani lungo X e Y
+        risultati()             come GaltonBase.risultati() con le proiezioni su X e Y
+        stampaFit()             stampa i parametri teorici e i risultati dei fit
+        probabilitaBin()        probabilità esatte di ogni bin dell'istogramma congiunto
+        mostra3D()              visualizzazione 3D dei passi verso destra effettuati
+        proiezioni3D(stampa)    visualizzazione 2D dei passi verso destra effettuati lungo X e lungo Y
+        mostraMatrice()         visualizzazione di una matrice di frequenze delle palline nei bin
+        
+    """
+    
+    # motori di simulazione disponibili
+    MOTORI = ("matrice", "bit", "istogramma", "jit")
+    
+    # motori che simulano ogni passo, utilizzabili con l'archivio
+    MOTORI_PASSI = ("matrice", "bit", "jit")
+
+    # attributi con i risultati di ogni pallina
+    RISULTATI_PALLINE = ("risultatiX", "risultatiY")
+
+    # attributi restituiti da risultati(), insieme alle proiezioni su X e Y
+    RISULTATI = ("nPalle", "istogramma",
+                 "parBinX", "parBinY", "parGauX", "parGauY",
+                 "covBinX", "covBinY", "covGauX", "covGauY",
+                 "chi2BinX", "chi2BinY", "chi2GauX", "chi2GauY",
+                 "gdlBinX", "gdlBinY", "gdlGauX", "gdlGauY",
+                 "chi2RidBinX", "chi2RidBinY", "chi2RidGauX", "chi2RidGauY")
+    
+    # passi delle prime TRAIETTORIE_MASSIME palline, salvati nella cache con stampa e grafici
+    TRAIETTORIE = ("traiettorieX", "traiettorieY")
+    
+    # parametri nei nomi delle figure esportate
+    PARAMETRI_FIGURA = ("nPassi", "nPalle", "probX", "probY")
+    
+    def __init__(self, nPassi, nPalle, probX, probY, stampa=True, motore="matrice", **opzioni):
+        """
+        Costruttore della classe Galton3D.
+        Crea un'istanza della classe e inizializza l'oggetto
+        
+        Le opzioni (dimBlocco, workers, seed, rng, bitgen, float32, precisione, grafici, stimatore, archivio) sono passate a GaltonBase.
+        
+        """
+        super().__init__(nPassi, nPalle, **opzioni)
+        self.probX = probX
+        self.probY = probY
+        
+        if motore not in self.MOTORI:
+            raise ValueError(f"Motore di simulazione non valido: {motore}")
+        
+        self.motore = motore
+        self.apriArchivio(2)
+        self.risultatiX, self.risultatiY = None, None
+        self.traiettorieX, self.traiettorieY = None, None
+        
+        self.parBinX = None
+        self.parBinY = None
+        
+        self.parGauX = None
+        self.parGauY = None
+        
+        self.covBinX, self.covBinY = None, None
+        self.covGauX, self.covGauY = None, None
+        
+        self.gdlBinX = None
+        self.gdlBinY = None
+        
+        self.gdlGauX = None
+        self.gdlGauY = None
+        
+        self.chi2BinX = None
+        self.chi2BinY = None
+        
+        self.chi2GauX = None
+        self.chi2GauY = None
+        
+        self.chi2RidBinX = None
+        self.chi2RifBinY = None
+        
+        self.chi2RidGauX = None
+        self.chi2RidGauY = None
+        
+        
+        
+        if type(self) == Galton3D:
+            print("Avviata la simulazione della macchina di Galton 3D\n\n")
+            
+            # simulazione e fit, letti dalla cache se già eseguiti con lo stesso seme
+            self.simulaFit(lambda: self.simula3D(stampa), stampa)
+            
+            # senza stimatore i fit sono lasciati al chiamante
+            if self.stimatore is None:
+                return
+            
+            if stampa and self.grafici:
+                self.mostra3D()
+                self.mostraMatrice()
+            if self.grafici:
+                self.proiezioni3D(stampa)
+            elif stampa:
+                self.stampaFit()
+
+    
+    def simula3D(self, stampa):
+        """
+        Simula il numero di passi verso destra che ogni palline effettua lungo l'asse X e Y
+        in base alla probabilità probX e probY di andare verso destra.
+        
+        Se dimBlocco è specificato le palline sono simulate a blocchi, se
+        workers > 1 in parallelo: in entrambi i casi si conserva solo l'istogramma congiunto.
+        
+        """
+        self.istogramma = None
+        
+        if self.soloIstogramma():
+            self.simulaIstogramma()
+            
+            # con l'archivio le traiettorie sono lette dal disco
+            if self.archivio is not None and stampa and self.grafici:
+                passi = self.archivio.passi(0, TRAIETTORIE_MASSIME)
+                self.traiettorieX, self.traiettorieY = passi[:, 0], passi[:, 1]
+            return
+        
+        if not (stampa and self.grafici):
+            self.risultatiX, self.risultatiY = self.simulaBlocco(self.nPalle)
+            self.accumula((self.risultatiX, self.risultatiY))
+            return
+        
+        self.simulaTraiettorie(self.nPalle)
+    
+    
+    def simulaTraiettorie(self, n):
+        """
+        Simula n palline a blocchi di DIM_BLOCCO con simulaPassi(), sommando ogni
+        blocco all'istogramma e conservando i passi delle sole prime TRAIETTORIE_MASSIME
+        palline (TRAIETTORIE), senza la matrice (n, nPassi) dei passi di tutte.
+        
+        """
+        blocchi = []
+        traiettorie = []
+        conservate = 0
+        
+        for inizio in range(0, n, DIM_BLOCCO):
+            passi = self.simulaPassi(min(DIM_BLOCCO, n - inizio))
+            
+            # somma dei passi in X e Y, più gli eventuali risultati aggiuntivi (Galton3Dcorr)
+            blocco = (np.sum(passi[0], axis=1), np.sum(passi[1], axis=1)) + tuple(passi[2:])
+            self.accumula(blocco)
+            blocchi.append(blocco[:2])
+            
+            if conservate < TRAIETTORIE_MASSIME:
+                traiettorie.append((passi[0][:TRAIETTORIE_MASSIME - conservate], passi[1][:TRAIETTORIE_MASSIME - conservate]))
+                conservate += len(traiettorie[-1][0])
+        
+        self.risultatiX, self.risultatiY = unisciBlocchi(blocchi)
+        self.traiettorieX, self.traiettorieY = unisciBlocchi(traiettorie)
+    
+    
+    def simulaPassi(self, n):
+        """
+        Simula i singoli passi di n palline lungo X e Y, scrivendoli nell'archivio se presente.
+        Restituisce le matrici booleane (n, nPassi) dei passi verso destra.
+        
+        """
+        if self.motore == "bit":
+            paroleX = passiBit(n, self.nPassi, self.probX, self.rng)
+            paroleY = passiBit(n, self.nPassi, self.probY, self.rng)
+            self.archivia(paroleX, paroleY)
+            
+            return spacchettaPassi(paroleX, self.nPassi), spacchettaPassi(paroleY, self.nPassi)
+        
+        if self.motore == "jit":
+            passiX = passiBooleani(n, self.nPassi, self.probX, self.rng)
+            passiY = passiBooleani(n, self.nPassi, self.probY, self.rng)
+        else:
+            # array casuali [n, nPassi] con valori tra 0 e 1
+            passiX = self.uniformi((n, self.nPassi)) < self.probX
+            passiY = self.uniformi((n, self.nPassi)) < self.probY
+        
+        self.archivia(passiX, passiY)
+        
+        return passiX, passiY
+    
+    
+    def simulaBlocco(self, n):
+        """
+        Simula il numero di passi verso destra di n palline lungo X e Y.
+        
+        """
+        if self.motore == "bit":
+            paroleX = passiBit(n, self.nPassi, self.probX, self.rng)
+            paroleY = passiBit(n, self.nPassi, self.probY, self.rng)
+            self.archivia(paroleX, paroleY)
+            
+            return contaPassi(paroleX), contaPassi(paroleY)
+        
+        # con l'archivio servono i singoli passi, non solo il loro numero
+        if self.motore == "jit" and self.archivio is None:
+            return (passiDestra(n, self.nPassi, self.probX, self.rng),
+                    passiDestra(n, self.nPassi, self.probY, self.rng))
+        
+        passiX, passiY = self.simulaPassi(n)
+        
+        return np.sum(passiX, axis=1), np.sum(passiY, axis=1)
+    
+    
+    def accumula(self, blocco):
+        """
+        Somma all'istogramma congiunto (nPassi+1, nPassi+1) i risultati di un blocco di palline.
+        L'istogramma è calcolato con np.bincount sull'indice lineare x*(nPassi+1) + y.
+        
+        """
+        risultatiX, risultatiY = blocco[0], blocco[1]
+        nBin = self.nPassi + 1
+        
+        if self.istogramma is None:
+            self.istogramma = np.zeros((nBin, nBin), dtype=np.int64)
+        
+        indice = risultatiX * nBin + risultatiY
+        self.istogramma += np.bincount(indice, minlength=nBin * nBin).reshape(nBin, nBin)
+        self.marginali = {}
+
+    
+    def accumulaKernel(self, n):
+        """
+        Simula n palline lungo X e Y e le somma all'istogramma congiunto
+        in un solo passaggio con il kernel compilato.
+    
+        """
+        if self.istogramma is None:
+            self.istogramma = np.zeros((self.nPassi + 1, self.nPassi + 1), dtype=np.int64)
+    
+        istogrammaPassi3D(n, self.nPassi, self.probX, self.probY, self.rng, self.istogramma)
+        self.marginali = {}
+    
+
+    def accumulatori(self):
+        """
+        Restituisce un dizionario {attributo: (forma, tipo)} dei risultati accumulati.
+    
+        """
+        return {"istogramma": ((self.nPassi + 1, self.nPassi + 1), np.int64)}
+    
+    
+    def aggiungiRisultati(self, blocco):
+        """
+        Unisce i risultati lungo X e Y di nuove palline a quelli già simulati.
+        
+        """
+        if self.risultatiX is not None:
+            self.risultatiX = np.concatenate((self.risultatiX, blocco[0]))
+            self.risultatiY = np.concatenate((self.risultatiY, blocco[1]))
+    
+    
+    def probabilitaBin(self):
+        """
+        Probabilità esatte di ogni bin dell'istogramma congiunto: gli assi sono
+        indipendenti, quindi è il prodotto esterno delle due binomiali.
+        
+        """
+        return np.outer(pmfBinomiale(self.nPassi, self.probX), pmfBinomiale(self.nPassi, self.probY))
+        
+    
+    
+    def latoBarre(self):
+        """
+        Lato dei gruppi di bin vicini da sommare perché le barre non vuote dei
+        grafici 3D siano al più BARRE_MASSIME. Se supera AGGREGAZIONE_MASSIMA
+        l'istogramma viene mostrato come superficie.
+        
+        """
+        occupati = (self.istogramma > 0).astype(np.int64)
+        
+        lato = 1
+        while lato <= AGGREGAZIONE_MASSIMA and np.count_nonzero(sommaGruppi(occupati, lato)) > BARRE_MASSIME:
+            lato += 1
+        
+        return lato
+    
+    
+    def barre3D(self, lato=1):
+        """
+        Posizioni, larghezze e altezze delle barre di bar3d per l'istogramma congiunto,
+        condivise dai grafici 3D. I bin vuoti sono esclusi e con lato > 1 i bin vicini
+        sono sommati a gruppi lato x lato: l'altezza di ogni barra è la frequenza media
+        per bin del gruppo, confrontabile con la distribuzione attesa.
+        
+        Restituisce:
+            tuple: (xPos, yPos, zPos, dx, dy, dz) array 1D con un elemento per barra.
+        
+        """
+        nBin = self.nPassi + 1
+        somme = sommaGruppi(self.istogramma, lato)
+        
+        iX, iY = np.nonzero(somme)      # solo i gruppi non vuoti
+        xPos = iX * lato - 0.5          # bordi inferiori dei gruppi
+        yPos = iY * lato - 0.5
+        zPos = np.zeros(len(iX))
+        
+        # gli ultimi gruppi di ogni asse possono essere più stretti
+        dx = np.minimum(lato, nBin - 0.5 - xPos)
+        dy = np.minimum(lato, nBin - 0.5 - yPos)
+        
+        return xPos, yPos, zPos, dx, dy, somme[iX, iY] / (dx * dy)
+    
+    
+    def disegnaIstogramma3D(self, ax, **opzioni):
+        """
+        Disegna l'istogramma congiunto sull'asse 3D ax, con un livello di dettaglio
+        scelto da latoBarre(): barre dei soli bin non vuoti, barre di gruppi di bin
+        sommati oppure, per istogrammi molto grandi, superficie dei bin occupati.
+        
+        Parametri
+        ---------
+            ax:         Asse 3D di matplotlib.
+            opzioni:    Opzioni passate a bar3d o plot_surface (es. label).
+        
+        """
+        lato = self.latoBarre()
+        
+        if lato <= AGGREGAZIONE_MASSIMA:
+            xPos, yPos, zPos, dx, dy, dz = self.barre3D(lato)
+            ax.bar3d(xPos, yPos, zPos, dx, dy, dz, color='skyblue', edgecolor='royalblue', alpha=0.5, **opzioni)
+            return
+        
+        # superficie limitata al rettangolo dei bin occupati
+        iX, iY = np.nonzero(self.istogramma)
+        x = np.arange(iX.min(), iX.max() + 1)
+        y = np.arange(iY.min(), iY.max() + 1)
+        X, Y = np.meshgrid(x, y, indexing="ij")
+        
+        ax.plot_surface(X, Y, self.istogramma[np.ix_(x, y)], color='skyblue', edgecolor='none', alpha=0.5, **opzioni)
+    
+    
+    def mostra3D(self):
+        """
+        Mostra la rappresentazione 3D della macchina di Galton 3D.
+        
+        """
+        from scipy.stats import norm
+        
+        plt = pyplot()
+        
+        #----------------
+        # PLOT SENZA FIT
+        #----------------
+        
+        fig = plt.figure(figsize=(10, 7))
+        ax = fig.add_subplot(111, projection='3d')
+        
+        
+        self.disegnaIstogramma3D(ax)
+        
+        ax.set_title(f"Distribuzione 3D della Macchina di Galton\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
+        ax.set_xlabel("Passi verso DX in X")
+        ax.set_ylabel("Passi verso DX in Y")
+        ax.set_zlabel("Frequenza")
+        mostraFigura(self.nomeFigura("distribuzione3D"))
+        
+        #--------------
+        # PLOT CON FIT
+        #--------------
+        
+        # stesso istogramma del grafico senza fit
+        fig = plt.figure(figsize=(10, 7))
+        ax = fig.add_subplot(111, projection='3d')
+        
+        
+        self.disegnaIstogramma3D(ax)
+        
+        
+        # Media e deviazione standard per X e Y
+        muX, sigmaX = self.nPassi * self.probX, np.sqrt(self.nPassi * self.probX * (1 - self.probX))
+        muY, sigmaY = self.nPassi * self.probY, np.sqrt(self.nPassi * self.probY * (1 - self.probY))
+        
+        # Griglia per il fit
+        X = np.linspace(0, self.nPassi, 100)
+        Y = np.linspace(0, self.nPassi, 100)
+        X, Y = np.meshgrid(X, Y)
+        
+        # Distribuzione teorica
+        Z = (norm.pdf(X, muX, sigmaX) * norm.pdf(Y, muY, sigmaY)) * np.sum(self.istogramma)
+        ax.plot_surface(X, Y, Z, rstride=1, cstride=1, color='r', alpha=0.8, edgecolor='none')
+
+        ax.set_title(f"Distribuzione 3D della Macchina di Galton con fit\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
+        ax.set_xlabel("Passi verso DX in X")
+        ax.set_ylabel("Passi verso DX in Y")
+        ax.set_zlabel("Frequenza")
+        plt.tight_layout()
+        mostraFigura(self.nomeFigura("distribuzione3Dfit"))
+    
+    
+    def fit(self, precedenti=False):
+        """
+        Fit binomiale e gaussiano delle proiezioni dell'istogramma congiunto su X e su Y.
+        Calcola parametri, covarianze, χ², gradi di libertà e χ² ridotto per ogni asse.
+        
+        Se precedenti==True e un fit è già stato fatto, i parametri precedenti
+        sono usati come valori iniziali (l'ampiezza è ripresa dall'istogramma).
+        
+        """
+        proiezX = self.marginale(0)
+        proiezY = self.marginale(1)
+        
+        for asse, proiez, prob in (("X", proiezX, self.probX), ("Y", proiezY, self.probY)):
+            parBin = getattr(self, "parBin" + asse)
+            parGau = getattr(self, "parGau" + asse)
+            
+            if precedenti and parBin is not None:
+                p0Bin = [parBin[0], parBin[1], np.max(proiez)]
+                p0Gau = [parGau[0], parGau[1], np.max(proiez)]
+            else:
+                p0Bin = [self.nPassi, prob, np.max(proiez)]
+                p0Gau = [*momentiIstogramma(proiez), np.max(proiez)]
+            
+            fitBin, fitGau = fitBinomialeGaussiana(proiez, p0Bin, p0Gau, self.stimatore)
+            
+            for nome, (par, cov, chi2, gdl) in (("Bin", fitBin), ("Gau", fitGau)):
+                setattr(self, "par" + nome + asse, par)
+                setattr(self, "cov" + nome + asse, cov)
+                setattr(self, "chi2" + nome + asse, chi2)
+                setattr(self, "gdl" + nome + asse, gdl)
+                setattr(self, "chi2Rid" + nome + asse, chi2 / gdl)
+    
+    
+    def erroriParametri(self):
+        """
+        Errori standard di µ e 𝜎 dei fit gaussiani lungo X e Y, usati da simulaPrecisione().
+        
+        """
+        return np.sqrt(np.concatenate((np.diag(self.covGauX)[:2], np.diag(self.covGauY)[:2])))
+    
+    
+    def risultati(self):
+        """
+        Come GaltonBase.risultati(), con in più le proiezioni proiezioneX e proiezioneY.
+        
+        """
+        risultati = super().risultati()
+        risultati["proiezioneX"] = self.marginale(0)
+        risultati["proiezioneY"] = self.marginale(1)
+        
+        return risultati
+    
+    
+    def proiezioni3D(self, stampa):
+        """
+        Funzione per calcolare e visualizzare le due proiezioni 2D.
+        
+            proiezioni3D(stampa=True)
+
+        Se stampa==True, stamperà i fit delle distribuzioni calcolati da fit()
+        
+        """
+        plt = pyplot()
+    
+        
+        # Proiezione X
+        proiezX = self.marginale(0)
+        centriX = np.arange(self.nPassi + 1, dtype=float)
+        
+        # Proiezione Y
+        proiezY = self.marginale(1)
+        centriY = np.arange(self.nPassi + 1, dtype=float)
+        
+        
+        # BINOMIALE (X e Y)
+        
+        # X
+        x_fit = np.linspace(min(centriX), max(centriX), 1000)
+        fitBinomX = binomiale(x_fit, self.parBinX[0], self.parBinX[1], self.parBinX[2])
+        
+        # Y
+        y_fit = np.linspace(min(centriY), max(centriY), 1000)
+        fitBinomY = binomiale(y_fit, self.parBinY[0], self.parBinY[1], self.parBinY[2])
+        
+        
+        # GAUSSIANA (X e Y)
+        
+        fitGaussX = gaussiana(x_fit, self.parGauX[0], self.parGauX[1], self.parGauX[2])
+        fitGaussY = gaussiana(y_fit, self.parGauY[0], self.parGauY[1], self.parGauY[2])
+    
+        
+        fig, ax = plt.subplots(2, 2, figsize=(14, 10), sharey=True) # y condivisa
+
+        # Grafico 1: Proiezione X
+        ax[0, 0].bar(centriX, proiezX, width=1, color='skyblue', edgecolor='royalblue', alpha=0.7, label="Osservata")
+        ax[0, 0].set_title("Proiezione X")
+        ax[0, 0].set_xlabel("Passi in X")
+        ax[0, 0].set_ylabel("Frequenza")
+        ax[0, 0].legend()
+
+        # Grafico 2: Proiezione Y
+        ax[0, 1].bar(centriY, proiezY, width=1, color='lightgreen', edgecolor='green', alpha=0.7, label="Osservata")
+        ax[0, 1].set_title("Proiezione Y")
+        ax[0, 1].set_xlabel("Passi in Y")
+        ax[0, 1].legend()
+
+        # Grafico 3: Fit X
+        ax[1, 0].bar(centriX, proiezX, width=1, color='skyblue', edgecolor='royalblue', alpha=0.7, label="Osservata")
+        ax[1, 0].plot(x_fit, fitBinomX, 'orange', label=f"Binomiale\n$n={self.parBinX[0]:.1f}, p={self.parBinX[1]:.2f}$")
+        ax[1, 0].plot(x_fit, fitGaussX, 'blue', label=f"Guassiana\n$\\mu={self.parGauX[0]:.2f}, \\sigma={self.parGauX[1]:.2f}$")
+        ax[1, 0].set_title("Proiezione X con fit")
+        ax[1, 0].set_xlabel("Passi in X")
+        ax[1, 0].set_ylabel("Frequenza")
+        ax[1, 0].legend()
+
+        # Grafico 4: Fit Y
+        ax[1, 1].bar(centriY, proiezY, width=1, color='lightgreen', edgecolor='green', alpha=0.7, label="Osservata")
+        ax[1, 1].plot(y_fit, fitBinomY, 'orange', label=f"Binomiale\n$n={self.parBinY[0]:.1f}, p={self.parBinY[1]:.2f}$")
+        ax[1, 1].plot(y_fit, fitGaussY, 'blue', label=f"Gaussiana\n$\\mu={self.parGauY[0]:.2f}, \\sigma={self.parGauY[1]:.2f}$")
+        ax[1, 1].set_title("Proiezione Y con fit")
+        ax[1, 1].set_xlabel("Passi in Y")
+        ax[1, 1].legend()
+
+        plt.suptitle(f"Distribuzione delle Proiezioni\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
+        plt.tight_layout()
+        mostraFigura(self.nomeFigura("proiezioni3D"))
+        
+        if stampa:
+            self.stampaFit()
+    
+    
+    
+    def stampaFit(self):
+        """
+        Stampa i parametri teorici e i risultati dei fit delle proiezioni su X e Y.
+        
+        """
+        print("\n---\n")
+        print("Parametri teorici:")
+        print("  Binomiale:")
+        print("             X       |       Y")
+        print("    n:      {:<6}   |    {:<6}".format(self.nPassi, self.nPassi))
+        print("    p:      {:<6.3f}   |    {:<6.3f}".format(self.probX, self.probY))
+        
+        print("  Gaussiana:")
+        print("             X       |       Y")
+        print("    µ:      {:<6.1f}   |    {:<6.1f}".format(self.nPassi * self.probX, self.nPassi * self.probY))
+        print("    𝜎:      {:<6.2f}   |    {:<6.2f}".format(
+            np.sqrt(self.nPassi * self.probX * (1 - self.probX)),
+            np.sqrt(self.nPassi * self.probY * (1 - self.probY))
+        ))
+        
+        print("\n\nRisultati dei fit:")
+        print("  Binomiale:")
+        print("             X       |       Y")
+        print("    n:      {:<6.3f}   |    {:<6.3f}".format(self.parBinX[0], self.parBinY[0]))
+        print("    p:      {:<6.3f}   |    {:<6.3f}".format(self.parBinX[1], self.parBinY[1]))
+        print("    GdL:    {:<6}   |    {:<6}".format(self.gdlBinX, self.gdlBinY))
+        print("    χ²:     {:<6.2f}   |    {:<6.2f}".format(self.chi2BinX, self.chi2BinY))
+        print("    χ²rid:  {:<6.2f}   |    {:<6.2f}".format(self.chi2RidBinX, self.chi2RidBinY))
+        
+        print("\n  Gaussiana:")
+        print("             X       |       Y")
+        print("    µ:      {:<6.2f}   |    {:<6.2f}".format(self.parGauX[0], self.parGauY[0]))
+        print("    𝜎:      {:<6.2f}   |    {:<6.2f}".format(self.parGauX[1], self.parGauY[1]))
+        print("    GdL:    {:<6}   |    {:<6}".format(self.gdlGauX, self.gdlGauY))
+        print("    χ²:     {:<6.2f}   |    {:<6.2f}".format(self.chi2GauX, self.chi2GauY))
+        print("    χ²rid:  {:<6.2f}   |    {:<6.2f}".format(self.chi2RidGauX, self.chi2RidGauY))
+        print("\n---")
+    
+    
+    def mostraMatrice(self):
+        """
+        Mostra una matrice di bin colorati in base alla frequenza di ognuno.
+        
+        """
+        plt = pyplot()
+
+        frequenze = self.istogramma.T  # Trasposta per allineare agli assi X e Y
+
+        plt.figure(figsize=(8, 6))
+        plt.imshow(frequenze, origin='lower', cmap='Blues', extent=[-0.5, self.nPassi + 0.5, -0.5, self.nPassi + 0.5])
+        plt.colorbar(label='Frequenza')  # Barra dei colori
+
+
+        plt.title(f"Matrice dei risultati della Macchina di Galton 3D\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
+        plt.xlabel("Passi verso DX in X")
+        plt.ylabel("Passi verso DX in Y")
+
+        plt.grid(color='gray', linestyle='--', linewidth=0.5, alpha=0.7)
+        mostraFigura(self.nomeFigura("matrice3D"))
+    
+    def mostraTraiettorie(self):
+        """
+        Grafico 3D delle traiettorie, se conservate dalla simulazione.
         
+        """
+        if self.traiettorieX is not None:
+            self.mostraTraiettoria3D(self.traiettorieX, self.traiettorieY)
     
     
-    def mostra3D(self):
+    def mostraTraiettoria3D(self, passiX, passiY):
         """
-        Mostra la rappresentazione 3D della macchina di Galton 3D.
+        Visualizzazione 3D delle traiettorie delle palline lungo gli assi X e Y.
+        Sono disegnate al più TRAIETTORIE_MASSIME palline, in un'unica collezione di linee.
         
         """
-        #----------------
-        # PLOT SENZA FIT
-        #----------------
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+        
+        plt = pyplot()
+        
+        nTraiettorie = min(len(passiX), TRAIETTORIE_MASSIME)
+        
+        traietX = accumulaTraiettorie(passiX[:nTraiettorie])
+        traietY = accumulaTraiettorie(passiY[:nTraiettorie])
+        pioli = np.broadcast_to(np.arange(self.nPassi), traietX.shape)
+        
+        # una spezzata (nPassi, 3) per ogni pallina, colori del ciclo di matplotlib
+        segmenti = np.stack((traietX, traietY, pioli), axis=-1)
+        colori = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+        
+        plt.figure(figsize=(10, 7))
+        ax = plt.axes(projection='3d')
+        ax.set_title(f'Traiettorie delle palline\nnPassi={self.nPassi},  nPalle={self.nPalle},  nTraiettorie={nTraiettorie},  probX={self.probX},  probY={self.probY}')
+        ax.set_xlabel('Passi lungo X')
+        ax.set_ylabel('Passi lungo Y')
+        ax.set_zlabel('nPassi (pioli)')
+        
+        ax.add_collection3d(Line3DCollection(segmenti, colors=colori, alpha=0.6))
         
-        # bordi dei bin
-        bordiBin = np.arange(-0.5, self.nPassi + 1, 1)
+        # la collezione non aggiorna i limiti degli assi
+        ax.set_xlim(traietX.min() - 1, traietX.max() + 1)
+        ax.set_ylim(traietY.min() - 1, traietY.max() + 1)
+        ax.set_zlim(0, max(self.nPassi - 1, 1))
+        
+        mostraFigura(self.nomeFigura("traiettorie3D"))
 
-        # dimensione istogramma bidimensionale
-        istogramma, xBordi, yBordi = np.histogram2d(self.risultatiX, self.risultatiY, bins=[bordiBin, bordiBin])
 
-        xPos, yPos = np.meshgrid(xBordi[:-1], yBordi[:-1], indexing="ij")  # 2 griglie 2D
-        xPos = xPos.ravel()  # rende a 1D
-        yPos = yPos.ravel()
-        zPos = np.zeros_like(xPos)
+    
 
-        dx = dy = 1  # Larghezza bin
-        dz = istogramma.ravel()  # frequenze dell'istogramma
+#-------------------------------------
+#    Macchina di Galton 3D correlata
+#-------------------------------------
 
-        fig = plt.figure(figsize=(10, 7))
-        ax = fig.add_subplot(111, projection='3d')
+class Galton3Dcorr(Galton3D):
+    """
+    Classe per la simulazione della macchina di Galton 3D con correlazione tra le gli assi.
+    
+    Galton3Dcorr(Galton3D)
+    
+    Parametri
+    ---------
+        nPassi, nPalle:             derivati dalla classe GaltonBase
+        probX, probY:               derivati dalla classe Galton3D
+        risultatiX, risultatiY:     derivati dalla classe Galton3D
+        matriceCorrelazione:        matrice di correlazione in input
+        correlazione:               coefficiente di correlazione ρ della matrice in input
+        matriceCorrStimata:         matrice di correlazione stimata dai risultatiX,Y
+        motore:                     motore di simulazione dei passi
+                                        "matrice"       simula i passi gaussiani correlati di ogni pallina
+                                        "multinomiale"  estrae per ogni pallina quanti passi sono (DX,DX), (DX,SX),
+                                                        (SX,DX) e (SX,SX) con una multinomiale: memoria O(nPalle)
+        momenti:                    somme accumulate dei passi gaussiani aggregati [n, Σa, Σb, Σa², Σb², Σab]
+                                        (motore "matrice")
+        conteggiPassi:              numero totale di passi (DX,DX), (DX,SX), (SX,DX) e (SX,SX)
+                                        (motore "multinomiale")
+        dimBlocco, workers:         derivati dalla classe GaltonBase
+    
+    Metodi
+    ------
+        simula3D()              simula il numero di passi verso destra di ogni pallina
+        simulaPassi(n)          simula i singoli passi correlati di n palline lungo X e Y
+        simulaBlocco(n)         simula il numero di passi verso destra di n palline e i passi aggregati
+        accumula(blocco)        somma i risultati di un blocco all'istogramma e ai momenti
+        probabilitaPassi()      probabilità congiunte di un singolo passo lungo X e Y
+        stimaCorrelazione()     matrice di correlazione stimata dai risultati accumulati
+        stampaCorrelazione()    stampa la matrice di correlazione inserita e quella stimata
+        aggiungiPalle(n, soloIstogramma)    simula n palline in più aggiornando fit e correlazione stimata
+        mostra3D()              visualizzazione 3D dei passi verso destra effettuati    
+        proiezioni3D(stampa)    derivato dalla classe Galton3D
+        mostraMatrice()         derivato dalla classe Galton3D
+    
+    """
+    
+    # motori di simulazione disponibili
+    MOTORI = ("matrice", "multinomiale")
+    
+    # motori che simulano ogni passo, utilizzabili con l'archivio
+    MOTORI_PASSI = ("matrice",)
 
+    # attributi restituiti da risultati()
+    RISULTATI = Galton3D.RISULTATI + ("matriceCorrelazioneStimata",)
+    
+    # parametri nei nomi delle figure esportate e nella chiave della cache
+    PARAMETRI_FIGURA = Galton3D.PARAMETRI_FIGURA + ("correlazione",)
+    
+    def __init__(self, nPassi, nPalle, probX, probY, matriceCorrelazione, stampa=True, motore="matrice", **opzioni):
+        """
+        Costruttore della classe Galton3Dcorr.
+        Crea un'istanza della classe e inizializza l'oggetto
         
-        ax.bar3d(xPos, yPos, zPos, dx, dy, dz, color='skyblue', edgecolor='royalblue', alpha=0.5)
+        Le opzioni (dimBlocco, workers, seed, rng, bitgen, float32, precisione, grafici, stimatore, archivio) sono passate a GaltonBase.
         
-        ax.set_title(f"Distribuzione 3D della Macchina di Galton\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
-        ax.set_xlabel("Passi verso DX in X")
-        ax.set_ylabel("Passi verso DX in Y")
-        ax.set_zlabel("Frequenza")
-        plt.show()
+        """
+       
+        super().__init__(nPassi, nPalle, probX, probY, motore=motore, **opzioni)
+        
+        self.matriceCorrelazione = matriceCorrelazione
+        self.matriceCorrStimata = None
+        self.momenti = None
+        self.conteggiPassi = None
+        
+        print("\n----\n")
+        print("Avviata la simulazione della macchina di Galton 3D con correlazione\n\n")
+        
+        # simulazione e fit, letti dalla cache se già eseguiti con lo stesso seme
+        self.simulaFit(lambda: self.simula3D(stampa), stampa)
+        self.stampaCorrelazione()
+        
+        # senza stimatore i fit sono lasciati al chiamante
+        if self.stimatore is None:
+            return
+        
+        if stampa and self.grafici:
+            self.mostra3D()
+        if self.grafici:
+            self.mostraMatrice()
+            self.proiezioni3D(stampa)
+        elif stampa:
+            self.stampaFit()
         
-        #--------------
-        # PLOT CON FIT
-        #--------------
         
-        # bordi dei bin
-        bordiBin = np.arange(-0.5, self.nPassi + 1, 1)
-
-        # dimensione istogramma bidimensionale
-        istogramma, xBordi, yBordi = np.histogram2d(self.risultatiX, self.risultatiY, bins=[bordiBin, bordiBin])
 
-        xPos, yPos = np.meshgrid(xBordi[:-1], yBordi[:-1], indexing="ij")  # 2 griglie 2D
-        xPos = xPos.ravel()  # rende a 1D
-        yPos = yPos.ravel()
-        zPos = np.zeros_like(xPos)
+    def simula3D(self, stampa):
+        """
+        Simula la macchina di Galton 3D influenzata dalla correlazione tra gli assi X e Y
+        dalla matrice di correlazione.
+        
+        Calcola la matrice di correlazione stimata dai passi simulati
+        
+        Calcola il coefficiente di correlazione di Pearson
+        
+        Se dimBlocco è specificato le palline sono simulate a blocchi, se
+        workers > 1 in parallelo: in entrambi i casi si conservano solo
+        l'istogramma congiunto e i momenti dei passi aggregati.
+        
+        """
+        self.istogramma = None
+        self.momenti = None
+        self.conteggiPassi = None
+        
+        if self.soloIstogramma():
+            self.simulaIstogramma()
+            
+            # con l'archivio le traiettorie sono lette dal disco
+            if self.archivio is not None and stampa and self.grafici:
+                passi = self.archivio.passi(0, TRAIETTORIE_MASSIME)
+                self.traiettorieX, self.traiettorieY = passi[:, 0], passi[:, 1]
+        elif stampa and self.grafici and self.motore == "matrice":
+            self.simulaTraiettorie(self.nPalle)
+        else:
+            blocco = self.simulaBlocco(self.nPalle)
+            self.risultatiX, self.risultatiY = blocco[0], blocco[1]
+            
+            self.accumula(blocco)
+        
+        self.matriceCorrelazioneStimata = self.stimaCorrelazione()  # matrice stimata
+    
+    
+    @property
+    def correlazione(self):
+        """
+        Coefficiente di correlazione ρ tra gli assi X e Y della matrice in input.
+        
+        """
+        return float(np.asarray(self.matriceCorrelazione)[0, 1])
+    
+    
+    def stampaCorrelazione(self):
+        """
+        Stampa la matrice di correlazione inserita e quella stimata dai passi,
+        anche quando i risultati sono letti dalla cache.
+        
+        """
+        print("=" * 45)
+        print(" MATRICE DI CORRELAZIONE INSERITA ")
+        print("=" * 45)
+        print("\n".join(["[" + "  ".join([f"{val:.2f}" for val in row]) + "]" for row in self.matriceCorrelazione]))
+        print("\n")
 
-        dx = dy = 1  # Larghezza bin
-        dz = istogramma.ravel()  # frequenze dell'istogramma
+        print("=" * 45)
+        print(" MATRICE DI CORRELAZIONE STIMATA DAI PASSI ")
+        print("=" * 45)
+        print("\n".join(["[" + "  ".join([f"{val:.3f}" for val in row]) + "]" for row in self.matriceCorrelazioneStimata]))
+        print("=" * 45)
+    
+    
+    def simulaPassi(self, n):
+        """
+        Simula i singoli passi correlati di n palline lungo X e Y.
+        Restituisce le matrici booleane (n, nPassi) dei passi verso destra e
+        i passi gaussiani aggregati di ogni pallina, forma (n, 2).
+        
+        """
+        tipo = np.float32 if self.float32 else np.float64
+        
+        # decomposizione di Cholesky -> matrice triangolare inferiore
+        L = np.linalg.cholesky(self.matriceCorrelazione).astype(tipo)
+        
+        
+        passi_indipendenti = self.rng.standard_normal((n, 2, self.nPassi), dtype=tipo)  # forma (n, 2, nPassi)
 
-        fig = plt.figure(figsize=(10, 7))
-        ax = fig.add_subplot(111, projection='3d')
+        # Applicazione della correlazione tramite la decomposizione di Cholesky
+        passi_correlati = np.einsum('ij,njp->nip', L, passi_indipendenti)  # forma (n, 2, nPassi)
 
+        # suddivido
+        passiX = passi_correlati[:, 0, :] < self.probX   # forma (n, nPassi)
+        passiY = passi_correlati[:, 1, :] < self.probY
         
-        ax.bar3d(xPos, yPos, zPos, dx, dy, dz, color='skyblue', edgecolor='royalblue', alpha=0.5)
+        passi_aggregati = passi_correlati.sum(axis=2, dtype=np.float64)  # forma (n, 2) - aggrega sui passi
         
+        self.archivia(passiX, passiY)
         
-        # Media e deviazione standard per X e Y
-        muX, sigmaX = self.nPassi * self.probX, np.sqrt(self.nPassi * self.probX * (1 - self.probX))
-        muY, sigmaY = self.nPassi * self.probY, np.sqrt(self.nPassi * self.probY * (1 - self.probY))
+        return passiX, passiY, passi_aggregati
+    
+    
+    def simulaBlocco(self, n):
+        """
+        Simula il numero di passi verso destra di n palline lungo X e Y
+        e i loro passi gaussiani aggregati.
         
-        # Griglia per il fit
-        X = np.linspace(0, self.nPassi, 100)
-        Y = np.linspace(0, self.nPassi, 100)
-        X, Y = np.meshgrid(X, Y)
+        Con il motore "multinomiale" i passi di ogni pallina sono divisi tra le
+        quattro combinazioni (DX,DX), (DX,SX), (SX,DX) e (SX,SX) con una sola
+        estrazione multinomiale, senza generare i passi gaussiani: al posto dei
+        passi aggregati si restituiscono i conteggi totali delle combinazioni.
         
-        # Distribuzione teorica
-        Z = (norm.pdf(X, muX, sigmaX) * norm.pdf(Y, muY, sigmaY)) * np.sum(istogramma)
-        ax.plot_surface(X, Y, Z, rstride=1, cstride=1, color='r', alpha=0.8, edgecolor='none')
-
-        ax.set_title(f"Distribuzione 3D della Macchina di Galton con fit\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
-        ax.set_xlabel("Passi verso DX in X")
-        ax.set_ylabel("Passi verso DX in Y")
-        ax.set_zlabel("Frequenza")
-        plt.tight_layout()
-        plt.show()
+        """
+        if self.motore == "multinomiale":
+            conteggi = self.rng.multinomial(self.nPassi, self.probabilitaPassi(), size=n)   # forma (n, 4)
+            
+            risultatiX = conteggi[:, 0] + conteggi[:, 1]
+            risultatiY = conteggi[:, 0] + conteggi[:, 2]
+            
+            return risultatiX, risultatiY, np.sum(conteggi, axis=0)
+        
+        passiX, passiY, passi_aggregati = self.simulaPassi(n)
+        
+        return np.sum(passiX, axis=1), np.sum(passiY, axis=1), passi_aggregati
     
     
-    def proiezioni3D(self, stampa):
+    def accumula(self, blocco):
         """
-        Funzione per calcolare e visualizzare le due proiezioni 2D.
+        Somma all'istogramma congiunto i risultati di un blocco di palline e
+        ai momenti le somme dei passi aggregati.
         
-            proiezioni3D(stampa=True)
-
-        Se stampa==True, stamperà i fit delle distribuzioni
+        """
+        super().accumula(blocco)
+        
+        if self.motore == "multinomiale":
+            if self.conteggiPassi is None:
+                self.conteggiPassi = np.zeros(4, dtype=np.int64)
+            
+            self.conteggiPassi += blocco[2]
+            return
+        
+        a, b = blocco[2][:, 0], blocco[2][:, 1]
+        
+        if self.momenti is None:
+            self.momenti = np.zeros(6)
+        
+        self.momenti += [len(a), np.sum(a), np.sum(b), np.sum(a * a), np.sum(b * b), np.sum(a * b)]
+    
+    
+    def accumulatori(self):
+        """
+        Restituisce un dizionario {attributo: (forma, tipo)} dei risultati accumulati:
+        l'istogramma congiunto e i momenti dei passi aggregati.
         
         """
+        accumulatori = super().accumulatori()
+        
+        if self.motore == "multinomiale":
+            accumulatori["conteggiPassi"] = ((4,), np.int64)
+        else:
+            accumulatori["momenti"] = ((6,), np.float64)
+        
+        return accumulatori
     
+    
+    def probabilitaPassi(self):
+        """
+        Probabilità congiunte di un singolo passo: [(DX,DX), (DX,SX), (SX,DX), (SX,SX)].
         
-        # Proiezione X
-        proiezX, bordiX = np.histogram(self.risultatiX, bins=np.arange(-0.5, self.nPassi + 1, 1))
-        centriX = (bordiX[:-1] + bordiX[1:]) / 2
+        Il passo è verso destra lungo X se la componente gaussiana correlata è minore
+        di probX (e lungo Y di probY), quindi le probabilità seguono dalla normale
+        bivariata standard con la correlazione della matrice in input.
         
-        # Proiezione Y
-        proiezY, bordiY = np.histogram(self.risultatiY, bins=np.arange(-0.5, self.nPassi + 1, 1))
-        centriY = (bordiY[:-1] + bordiY[1:]) / 2
+        """
+        from scipy.stats import norm
         
+        pX = norm.cdf(self.probX)
+        pY = norm.cdf(self.probY)
+        pDxDx = normaleBivariataCdf(self.probX, self.probY, self.matriceCorrelazione[0][1])
         
-        # BINOMIALE tramite curve_fit (X e Y)
+        prob = np.array([pDxDx, pX - pDxDx, pY - pDxDx, 1 - pX - pY + pDxDx])
+        prob = np.clip(prob, 0, None)
         
-        # X
-        self.parBinX, _ = curve_fit(binomiale, centriX, proiezX, 
-                                    p0=[self.nPassi, self.probX, np.max(proiezX)],
-                                    absolute_sigma=True)
+        return prob / np.sum(prob)
+    
+    
+    def stimaCorrelazione(self):
+        """
+        Matrice di correlazione stimata dai risultati accumulati.
         
+        Con il motore "matrice" è la correlazione dei passi gaussiani aggregati;
+        con il motore "multinomiale" si stima la correlazione della normale
+        bivariata che riproduce la frequenza osservata dei passi (DX,DX).
         
-        x_fit = np.linspace(min(centriX), max(centriX), 1000)
-        fitBinomX = binomiale(x_fit, self.parBinX[0], self.parBinX[1], self.parBinX[2])
+        """
+        if self.motore == "multinomiale":
+            return correlazioneSoglie(self.conteggiPassi[0] / np.sum(self.conteggiPassi), self.probX, self.probY)
         
+        return correlazioneMomenti(self.momenti)
         
         
+    def aggiungiPalle(self, n, soloIstogramma=False):
+        """
+        Come GaltonBase.aggiungiPalle(), aggiornando anche la matrice di correlazione stimata.
         
-        binVal = binomiale(centriX, self.parBinX[0], self.parBinX[1], self.parBinX[2])
-        maskBx = binVal > 0
+        """
+        super().aggiungiPalle(n, soloIstogramma)
+        self.matriceCorrelazioneStimata = self.stimaCorrelazione()
+    
+
+    def mostra3D(self):
+        """
+        Visualizza la distribuzione 3D delle palline come istogramma.
         
-        self.chi2BinX = np.sum((proiezX[maskBx] - binVal[maskBx]) ** 2 / binVal[maskBx])
-        self.gdlBinX = np.sum(maskBx) - 3 # 3 parametri da ottimizzare: prob e ampiezza
-        self.chi2RidBinX = self.chi2BinX / self.gdlBinX
+        """
+        from scipy.stats import multivariate_normal
         
-        # Y
-        self.parBinY, _ = curve_fit(binomiale, centriY, proiezY, 
-                                    p0 = [self.nPassi, self.probY, np.max(proiezY)],
-                                    absolute_sigma=True)
+        plt = pyplot()
         
+        #----------------
+        # PLOT SENZA FIT
+        #----------------
         
-        y_fit = np.linspace(min(centriY), max(centriY), 1000)
-        fitBinomY = binomiale(y_fit, self.parBinY[0], self.parBinY[1], self.parBinY[2])
+        fig = plt.figure(figsize=(12, 8))
+        ax = fig.add_subplot(111, projection='3d')
         
+        # istogramma 3D
+        self.disegnaIstogramma3D(ax, label='Istogramma Simulato')
+
+        ax.set_title(f"Distribuzione 3D della Macchina di Galton\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
+        ax.set_xlabel("Passi verso DX in X")
+        ax.set_ylabel("Passi verso DX in Y")
+        ax.set_zlabel("Frequenza")
+        ax.legend()
+
+        mostraFigura(self.nomeFigura("distribuzione3Dcorr"))
         
-        binValY = binomiale(centriY, self.parBinY[0], self.parBinY[1], self.parBinY[2])
-        maskBy = binValY > 0
         
-        self.chi2BinY = np.sum((proiezY[maskBy] - binValY[maskBy]) ** 2 / binValY[maskBy])
-        self.gdlBinY = np.sum(maskBy) - 3
-        self.chi2RidBinY = self.chi2BinY / self.gdlBinY
+        #--------------
+        # PLOT CON FIT
+        #--------------
+
         
+        fig = plt.figure(figsize=(12, 8))
+        ax = fig.add_subplot(111, projection='3d')
         
-        # GAUSSIANA tramite curve_fit (X e Y)
+        # istogramma 3D
+        self.disegnaIstogramma3D(ax, label='Istogramma Simulato')
         
-        # X
+        x_range = np.arange(-0.5, self.nPassi + 1, 0.5)
+        y_range = np.arange(-0.5, self.nPassi + 1, 0.5)
+        X, Y = np.meshgrid(x_range, y_range)
         
-        self.parGauX, _ = curve_fit(gaussiana, centriX, proiezX, 
-                                    p0=[np.mean(self.risultatiX), np.std(self.risultatiX), np.max(proiezX)],
-                                    absolute_sigma=True)
         
+        mediaX, stdX = momentiIstogramma(self.marginale(0))
+        mediaY, stdY = momentiIstogramma(self.marginale(1))
+        mean = [mediaX, mediaY]
+        cov = self.matriceCorrelazione * (stdX * stdY)  # matrice di covarianza
         
-        fitGaussX = gaussiana(x_fit, self.parGauX[0], self.parGauX[1], self.parGauX[2])
+        # distribuzione normale multivariata
+        rv = multivariate_normal(mean, cov)
+        Z = rv.pdf(np.dstack((X, Y))) * self.nPalle  # densità di probabilità scalata per il numero di palline
+        
+        # distribuzione attesa
+        ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.6, label='Distribuzione Attesa')
+
+        ax.set_title(f"Distribuzione 3D della Macchina di Galton con fit\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
+        ax.set_xlabel("Passi verso DX in X")
+        ax.set_ylabel("Passi verso DX in Y")
+        ax.set_zlabel("Frequenza")
+        ax.legend()
+        mostraFigura(self.nomeFigura("distribuzione3DcorrFit"))
+
+
+#----------------------------------------
+#    Macchina di Galton a N assi
+#----------------------------------------
+
+class GaltonND(GaltonBase):
+    """
+    Classe per la simulazione della macchina di Galton con un numero qualsiasi
+    di assi indipendenti.
+    
+    GaltonND(GaltonBase)
+    
+    L'istogramma congiunto ha (nPassi+1)^nAssi bin, quasi tutti vuoti: si
+    conservano solo i bin occupati come indici lineari ordinati con i relativi
+    conteggi (formato COO).
+    
+    Parametri
+    ---------
+        nPassi, nPalle: derivati dalla classe GaltonBase
+        probAssi:       probabilità della pallina di andare a destra lungo ogni asse
+        nAssi:          numero di assi
+        risultatiAssi:  array (nPalle, nAssi) di passi simulati verso destra da ogni pallina lungo ogni asse
+        indici:         indici lineari ordinati dei bin occupati dell'istogramma congiunto
+        conteggi:       numero di palline in ogni bin occupato
+        motore:         motore di simulazione dei passi
+                            "binomiale" estrae direttamente il numero di passi a DX lungo ogni asse
+                            "matrice"   confronta un numero casuale float con la probabilità ad ogni passo
+        parBin, parGau, covBin, covGau, chi2Bin, chi2Gau, gdlBin, gdlGau, chi2RidBin, chi2RidGau:
+                        risultati dei fit delle proiezioni, una riga per asse
+        dimBlocco:      derivato dalla classe GaltonBase
+                            se specificato risultatiAssi resta None e si conserva solo l'istogramma sparso
+        workers:        derivato dalla classe GaltonBase
+                            se maggiore di 1 si conserva solo l'istogramma sparso
+    
+    
+    Metodi
+    ------
+        simulaND()                  simula il numero di passi verso destra di ogni pallina lungo ogni asse
+        simulaBlocco(n)             simula il numero di passi verso destra di n palline lungo ogni asse
+        accumula(blocco)            somma i risultati di un blocco all'istogramma sparso
+        unisciConteggi(indici, conteggi)    somma bin occupati e conteggi all'istogramma sparso
+        aggiungiRisultati(blocco)   unisce i risultati di nuove palline a risultatiAssi
+        accumulaParallelo(nPalle, workers)  simula in parallelo e unisce gli istogrammi sparsi dei processi
+        coordinate(asse)            coordinata lungo un asse di ogni bin occupato
+        calcolaMarginale(asse)      calcola la proiezione dell'istogramma sparso su un asse
+                                        (letta con marginale(asse) di GaltonBase)
+        fit(precedenti)             fit binomiale e gaussiano delle proiezioni su ogni asse
+                                        se precedenti==True parte dai parametri del fit precedente
+        erroriParametri()           errori standard di µ e 𝜎 dei fit gaussiani di ogni asse
+        risultati()                 come GaltonBase.risultati() con le proiezioni su ogni asse
+        stampaFit(assi)             stampa i risultati dei fit degli assi scelti
+        proiezioniND(assi)          visualizzazione delle proiezioni con i fit lungo gli assi scelti
         
+    """
+    
+    # motori di simulazione disponibili
+    MOTORI = ("binomiale", "matrice")
+    
+    # attributi con i risultati di ogni pallina
+    RISULTATI_PALLINE = ("risultatiAssi",)
+    
+    # attributi restituiti da risultati(), insieme alle proiezioni su ogni asse
+    RISULTATI = ("nPalle", "indici", "conteggi",
+                 "parBin", "parGau", "covBin", "covGau",
+                 "chi2Bin", "chi2Gau", "gdlBin", "gdlGau", "chi2RidBin", "chi2RidGau")
+    
+    # parametri nei nomi delle figure esportate
+    PARAMETRI_FIGURA = ("nPassi", "nPalle", "probAssi")
+    
+    def __init__(self, nPassi, nPalle, probAssi, stampa=True, motore="binomiale", **opzioni):
+        """
+        Costruttore della classe GaltonND.
+        Crea un'istanza della classe e inizializza l'oggetto
         
+        Le opzioni (dimBlocco, workers, seed, rng, bitgen, float32, precisione, grafici, stimatore, archivio) sono passate a GaltonBase.
         
-        gauVal = gaussiana(centriX, self.parGauX[0], self.parGauX[1], self.parGauX[2])
+        """
+        super().__init__(nPassi, nPalle, **opzioni)
+        self.probAssi = np.asarray(probAssi, dtype=float)
+        self.nAssi = len(self.probAssi)
         
-        maskGx = gauVal > 0
+        if motore not in self.MOTORI:
+            raise ValueError(f"Motore di simulazione non valido: {motore}")
         
-        self.chi2GauX = np.sum((proiezX[maskGx] - gauVal[maskGx]) ** 2 / gauVal[maskGx])
-        self.gdlGauX = np.sum(maskGx) - 3  # 3 parametri da ottimizzare: media, sigma, amp
-        self.chi2RidGauX = self.chi2GauX / self.gdlGauX
+        # gli indici lineari dei bin devono essere rappresentabili in int64
+        if (nPassi + 1) ** self.nAssi >= 2**63:
+            raise ValueError(f"Troppi bin per l'istogramma congiunto: (nPassi+1)^nAssi = {(nPassi + 1) ** self.nAssi}")
         
-        # Y
+        self.motore = motore
+        self.apriArchivio(self.nAssi)
+        self.risultatiAssi = None
+        self.indici, self.conteggi = None, None
         
-        self.parGauY, _ = curve_fit(gaussiana, centriY, proiezY, 
-                                    p0=[np.mean(self.risultatiY), np.std(self.risultatiY), np.max(proiezY)],
-                                    absolute_sigma=True)
+        self.parBin, self.parGau = None, None
+        self.covBin, self.covGau = None, None
+        self.chi2Bin, self.chi2Gau = None, None
+        self.gdlBin, self.gdlGau = None, None
+        self.chi2RidBin, self.chi2RidGau = None, None
         
         
-        fitGaussY = gaussiana(y_fit, self.parGauY[0], self.parGauY[1], self.parGauY[2])
+        print(f"Avviata la simulazione della macchina di Galton a {self.nAssi} assi\n\n")
         
+        # simulazione e fit, letti dalla cache se già eseguiti con lo stesso seme
+        self.simulaFit(self.simulaND, stampa)
         
+        # senza stimatore i fit sono lasciati al chiamante
+        if self.stimatore is None:
+            return
         
-        gauValY = gaussiana(centriY, self.parGauY[0], self.parGauY[1], self.parGauY[2])
+        if stampa and self.grafici:
+            self.proiezioniND()
+        elif stampa:
+            self.stampaFit()
+    
+    
+    def simulaND(self):
+        """
+        Simula il numero di passi verso destra che ogni pallina effettua lungo ogni asse.
         
-        maskGy = gauValY > 0
+        Se dimBlocco è specificato le palline sono simulate a blocchi, se
+        workers > 1 in parallelo: in entrambi i casi si conserva solo l'istogramma sparso.
         
-        self.chi2GauY = np.sum((proiezY[maskGy] - gauValY[maskGy]) ** 2 / gauValY[maskGy])
-        self.gdlGauY = np.sum(maskGy) - 3
-        self.chi2RidGauY = self.chi2GauY / self.gdlGauY
-    
+        """
+        self.indici, self.conteggi = None, None
         
-        fig, ax = plt.subplots(2, 2, figsize=(14, 10), sharey=True) # y condivisa
-
-        # Grafico 1: Proiezione X
-        ax[0, 0].bar(centriX, proiezX, width=1, color='skyblue', edgecolor='royalblue', alpha=0.7, label="Osservata")
-        ax[0, 0].set_title("Proiezione X")
-        ax[0, 0].set_xlabel("Passi in X")
-        ax[0, 0].set_ylabel("Frequenza")
-        ax[0, 0].legend()
-
-        # Grafico 2: Proiezione Y
-        ax[0, 1].bar(centriY, proiezY, width=1, color='lightgreen', edgecolor='green', alpha=0.7, label="Osservata")
-        ax[0, 1].set_title("Proiezione Y")
-        ax[0, 1].set_xlabel("Passi in Y")
-        ax[0, 1].legend()
-
-        # Grafico 3: Fit X
-        ax[1, 0].bar(centriX, proiezX, width=1, color='skyblue', edgecolor='royalblue', alpha=0.7, label="Osservata")
-        ax[1, 0].plot(x_fit, fitBinomX, 'orange', label=f"Binomiale\n$n={self.parBinX[0]:.1f}, p={self.parBinX[1]:.2f}$")
-        ax[1, 0].plot(x_fit, fitGaussX, 'blue', label=f"Guassiana\n$\\mu={self.parGauX[0]:.2f}, \\sigma={self.parGauX[1]:.2f}$")
-        ax[1, 0].set_title("Proiezione X con fit")
-        ax[1, 0].set_xlabel("Passi in X")
-        ax[1, 0].set_ylabel("Frequenza")
-        ax[1, 0].legend()
-
-        # Grafico 4: Fit Y
-        ax[1, 1].bar(centriY, proiezY, width=1, color='lightgreen', edgecolor='green', alpha=0.7, label="Osservata")
-        ax[1, 1].plot(y_fit, fitBinomY, 'orange', label=f"Binomiale\n$n={self.parBinY[0]:.1f}, p={self.parBinY[1]:.2f}$")
-        ax[1, 1].plot(y_fit, fitGaussY, 'blue', label=f"Gaussiana\n$\\mu={self.parGauY[0]:.2f}, \\sigma={self.parGauY[1]:.2f}$")
-        ax[1, 1].set_title("Proiezione Y con fit")
-        ax[1, 1].set_xlabel("Passi in Y")
-        ax[1, 1].legend()
-
-        plt.suptitle(f"Distribuzione delle Proiezioni\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
-        plt.tight_layout()
-        plt.show()
+        if self.soloIstogramma():
+            self.simulaIstogramma()
+            return
         
-        if stampa:
-            print("\n---\n")
-            print("Parametri teorici:")
-            print("  Binomiale:")
-            print("             X       |       Y")
-            print("    n:      {:<6}   |    {:<6}".format(self.nPassi, self.nPassi))
-            print("    p:      {:<6.3f}   |    {:<6.3f}".format(self.probX, self.probY))
-
-            print("  Gaussiana:")
-            print("             X       |       Y")
-            print("    µ:      {:<6.1f}   |    {:<6.1f}".format(self.nPassi * self.probX, self.nPassi * self.probY))
-            print("    𝜎:      {:<6.2f}   |    {:<6.2f}".format(
-                np.sqrt(self.nPassi * self.probX * (1 - self.probX)),
-                np.sqrt(self.nPassi * self.probY * (1 - self.probY))
-            ))
-    
-            print("\n\nRisultati dei fit:")
-            print("  Binomiale:")
-            print("             X       |       Y")
-            print("    n:      {:<6.3f}   |    {:<6.3f}".format(self.parBinX[0], self.parBinY[0]))
-            print("    p:      {:<6.3f}   |    {:<6.3f}".format(self.parBinX[1], self.parBinY[1]))
-            print("    GdL:    {:<6}   |    {:<6}".format(self.gdlBinX, self.gdlBinY))
-            print("    χ²:     {:<6.2f}   |    {:<6.2f}".format(self.chi2BinX, self.chi2BinY))
-            print("    χ²rid:  {:<6.2f}   |    {:<6.2f}".format(self.chi2RidBinX, self.chi2RidBinY))
-    
-            print("\n  Gaussiana:")
-            print("             X       |       Y")
-            print("    µ:      {:<6.2f}   |    {:<6.2f}".format(self.parGauX[0], self.parGauY[0]))
-            print("    𝜎:      {:<6.2f}   |    {:<6.2f}".format(self.parGauX[1], self.parGauY[1]))
-            print("    GdL:    {:<6}   |    {:<6}".format(self.gdlGauX, self.gdlGauY))
-            print("    χ²:     {:<6.2f}   |    {:<6.2f}".format(self.chi2GauX, self.chi2GauY))
-            print("    χ²rid:  {:<6.2f}   |    {:<6.2f}".format(self.chi2RidGauX, self.chi2RidGauY))
-            print("\n---")
+        self.risultatiAssi = self.simulaBlocco(self.nPalle)
+        self.accumula(self.risultatiAssi)
     
     
-    
-    def mostraMatrice(self):
+    def simulaBlocco(self, n):
         """
-        Mostra una matrice di bin colorati in base alla frequenza di ognuno.
+        Simula il numero di passi verso destra di n palline lungo ogni asse.
+        Restituisce un array (n, nAssi).
         
         """
-
-        bordiBin = np.arange(-0.5, self.nPassi + 1, 1)  # Bin centrati su interi
-        istogramma, xBordi, yBordi = np.histogram2d(self.risultatiX, self.risultatiY, bins=[bordiBin, bordiBin])
-
-        frequenze = istogramma.T  # Trasposta per allineare agli assi X e Y
-
-        plt.figure(figsize=(8, 6))
-        plt.imshow(frequenze, origin='lower', cmap='Blues', extent=[-0.5, self.nPassi + 0.5, -0.5, self.nPassi + 0.5])
-        plt.colorbar(label='Frequenza')  # Barra dei colori
-
-
-        plt.title(f"Matrice dei risultati della Macchina di Galton 3D\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
-        plt.xlabel("Passi verso DX in X")
-        plt.ylabel("Passi verso DX in Y")
-
-        plt.grid(color='gray', linestyle='--', linewidth=0.5, alpha=0.7)
-        plt.show()
+        if self.motore == "binomiale":
+            return self.rng.binomial(self.nPassi, self.probAssi, size=(n, self.nAssi))
+        
+        passi = self.uniformi((n, self.nAssi, self.nPassi)) < self.probAssi[:, None]
+        
+        return np.sum(passi, axis=2)
     
-    def mostraTraiettoria3D(self, passiX, passiY):
+    
+    def accumula(self, blocco):
         """
-        Visualizzazione 3D delle traiettorie delle palline lungo gli assi X e Y.
+        Somma all'istogramma sparso i risultati di un blocco di palline, tramite
+        l'indice lineare dei bin nell'istogramma congiunto.
         
         """
-        passiX = np.where(passiX, 1, -1)
-        passiY = np.where(passiY, 1, -1)
+        forma = (self.nPassi + 1,) * self.nAssi
         
-        traietX = np.zeros((self.nPalle, self.nPassi))
-        traietY = np.zeros((self.nPalle, self.nPassi))
+        indici = np.ravel_multi_index(tuple(blocco.T), forma)
+        indici, conteggi = np.unique(indici, return_counts=True)
         
-        for i in range(1,self.nPassi):
-            traietX[:, i] = traietX[:, i-1] + passiX[:, i]
-            traietY[:, i] = traietY[:, i-1] + passiY[:, i]
-            
+        self.unisciConteggi(indici, conteggi)
+    
+    
+    def unisciConteggi(self, indici, conteggi):
+        """
+        Somma all'istogramma sparso i conteggi dei bin di indici lineari dati.
         
+        """
+        self.marginali = {}
         
-        plt.figure(figsize=(10, 7))
-        ax = plt.axes(projection='3d')
-        ax.set_title(f'Traiettorie delle palline\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}')
-        ax.set_xlabel('Passi lungo X')
-        ax.set_ylabel('Passi lungo Y')
-        ax.set_zlabel('nPassi (pioli)')
+        if self.indici is None:
+            self.indici, self.conteggi = indici, conteggi.astype(np.int64)
+            return
         
-        for i in range(self.nPalle):
-            ax.plot(traietX[i], traietY[i], np.arange(self.nPassi), alpha=0.6)
+        self.indici, inverso = np.unique(np.concatenate((self.indici, indici)), return_inverse=True)
         
-        plt.show()
-
-
+        totale = np.zeros(len(self.indici), dtype=np.int64)
+        np.add.at(totale, inverso, np.concatenate((self.conteggi, conteggi)))
+        self.conteggi = totale
     
-
-#-------------------------------------
-#    Macchina di Galton 3D correlata
-#-------------------------------------
-
-class Galton3Dcorr(Galton3D):
-    """
-    Classe per la simulazione della macchina di Galton 3D con correlazione tra le gli assi.
     
-    Galton3Dcorr(Galton3D)
+    def aggiungiRisultati(self, blocco):
+        """
+        Unisce i risultati di nuove palline a quelli già simulati.
+        
+        """
+        if self.risultatiAssi is not None:
+            self.risultatiAssi = np.concatenate((self.risultatiAssi, blocco))
     
-    Parametri
-    ---------
-        nPassi, nPalle:             derivati dalla classe GaltonBase
-        probX, probY:               derivati dalla classe Galton3D
-        risultatiX, risultatiY:     derivati dalla classe Galton3D
-        matriceCorrelazione:        matrice di correlazione in input
-        matriceCorrStimata:         matrice di correlazione stimata dai risultatiX,Y
     
-    Metodi
-    ------
-        simula3D()              simula il numero di passi verso destra di ogni pallina
-        mostra3D()              visualizzazione 3D dei passi verso destra effettuati    
-        proiezioni3D(stampa)    derivato dalla classe Galton3D
-        mostraMatrice()         derivato dalla classe Galton3D
+    def accumulaParallelo(self, nPalle=None, workers=None):
+        """
+        Divide le palline tra più processi come GaltonBase.accumulaParallelo().
+        L'istogramma sparso non ha una forma fissa da condividere: ogni processo
+        restituisce i propri bin occupati, che sono poi uniti a quelli dell'oggetto.
+        
+        """
+        if nPalle is None:
+            nPalle = self.nPalle
+        if workers is None:
+            workers = self.workers
+        
+        palleProcesso, semi = self.dividiProcessi(nPalle, workers)
+        
+        # l'istogramma già accumulato non viene copiato nei processi
+        indici, conteggi = self.indici, self.conteggi
+        self.indici, self.conteggi = None, None
+        try:
+            argomenti = [(self, int(palleProcesso[i]), semi[i]) for i in range(workers)]
+            
+            with Pool(workers) as pool:
+                parziali = pool.starmap(lavoratoreSparso, argomenti)
+        finally:
+            self.indici, self.conteggi = indici, conteggi
+        
+        for indici, conteggi in parziali:
+            if indici is not None:
+                self.unisciConteggi(indici, conteggi)
     
-    """
     
-    def __init__(self, nPassi, nPalle, probX, probY, matriceCorrelazione, stampa=True):
+    def coordinate(self, asse):
         """
-        Costruttore della classe Galton3Dcorr.
-        Crea un'istanza della classe e inizializza l'oggetto
+        Coordinata lungo l'asse scelto (numero di passi a DX) di ogni bin occupato.
         
         """
-       
-        super().__init__(nPassi, nPalle, probX, probY)
-        
-        self.matriceCorrelazione = matriceCorrelazione
-        self.matriceCorrStimata = None
+        nBin = self.nPassi + 1
         
-        print("\n----\n")
-        print("Avviata la simulazione della macchina di Galton 3D con correlazione\n\n")
+        return (self.indici // nBin ** (self.nAssi - 1 - asse)) % nBin
+    
+    
+    def calcolaMarginale(self, asse):
+        """
+        Calcola la proiezione dell'istogramma sparso sull'asse scelto.
         
-        self.simula3D(stampa)
+        """
+        frequenze = np.bincount(self.coordinate(asse), weights=self.conteggi, minlength=self.nPassi + 1)
         
-        if stampa:
-            self.mostra3D()
-        self.mostraMatrice()
-        self.proiezioni3D(stampa)
+        return frequenze.astype(np.int64)
+    
+    
+    def fit(self, precedenti=False):
+        """
+        Fit binomiale e gaussiano della proiezione su ogni asse.
+        Calcola parametri, covarianze, χ², gradi di libertà e χ² ridotto, una riga per asse.
         
+        Se precedenti==True e un fit è già stato fatto, i parametri precedenti
+        sono usati come valori iniziali (l'ampiezza è ripresa dall'istogramma).
         
-
-    def simula3D(self, stampa):
         """
-        Simula la macchina di Galton 3D influenzata dalla correlazione tra gli assi X e Y
-        dalla matrice di correlazione.
+        risultati = []
         
-        Calcola la matrice di correlazione stimata dai passi simulati
+        for asse in range(self.nAssi):
+            proiez = self.marginale(asse)
+            
+            if precedenti and self.parBin is not None:
+                p0Bin = [self.parBin[asse, 0], self.parBin[asse, 1], np.max(proiez)]
+                p0Gau = [self.parGau[asse, 0], self.parGau[asse, 1], np.max(proiez)]
+            else:
+                p0Bin = [self.nPassi, self.probAssi[asse], np.max(proiez)]
+                p0Gau = [*momentiIstogramma(proiez), np.max(proiez)]
+            
+            risultati.append(fitBinomialeGaussiana(proiez, p0Bin, p0Gau, self.stimatore))
         
-        Calcola il coefficiente di correlazione di Pearson
+        fitBin = [r[0] for r in risultati]
+        fitGau = [r[1] for r in risultati]
         
+        self.parBin, self.covBin, self.chi2Bin, self.gdlBin = (np.array(v) for v in zip(*fitBin))
+        self.parGau, self.covGau, self.chi2Gau, self.gdlGau = (np.array(v) for v in zip(*fitGau))
+        
+        self.chi2RidBin = self.chi2Bin / self.gdlBin
+        self.chi2RidGau = self.chi2Gau / self.gdlGau
+    
+    
+    def erroriParametri(self):
         """
+        Errori standard di µ e 𝜎 dei fit gaussiani di ogni asse, usati da simulaPrecisione().
         
-        # decomposizione di Cholesky -> matrice triangolare inferiore
-        L = np.linalg.cholesky(self.matriceCorrelazione)
+        """
+        return np.sqrt(np.diagonal(self.covGau, axis1=1, axis2=2)[:, :2]).ravel()
+    
+    
+    def risultati(self):
+        """
+        Come GaltonBase.risultati(), con in più la lista marginali delle proiezioni su ogni asse.
         
+        """
+        risultati = super().risultati()
+        risultati["marginali"] = [self.marginale(asse) for asse in range(self.nAssi)]
         
-        passi_indipendenti = np.random.randn(self.nPalle, 2, self.nPassi)  # forma (nPalle, 2, nPassi)
-
-        # Applicazione della correlazione tramite la decomposizione di Cholesky
-        passi_correlati = np.einsum('ij,njp->nip', L, passi_indipendenti)  # forma (nPalle, 2, nPassi)
-
-        # suddivido
-        passiX = passi_correlati[:, 0, :] < self.probX   # forma (nPalle, nPassi)
-        passiY = passi_correlati[:, 1, :] < self.probY
-
+        return risultati
+    
+    
+    def proiezioniND(self, assi=None):
+        """
+        Visualizza le proiezioni dell'istogramma congiunto sugli assi scelti
+        (di default tutti) con i fit binomiale e gaussiano, e stampa i risultati dei fit.
         
-        self.risultatiX = np.sum(passiX, axis=1)
-        self.risultatiY = np.sum(passiY, axis=1)
+            proiezioniND(assi=[0, 2])
         
+        """
+        plt = pyplot()
         
-        passi_aggregati = passi_correlati.sum(axis=2)  # forma (nPalle, 2) - aggrega sui passi
+        if assi is None:
+            assi = range(self.nAssi)
+        assi = list(assi)
         
-        self.matriceCorrelazioneStimata = np.corrcoef(passi_aggregati.T)  # matrice stimata
+        centri = np.arange(self.nPassi + 1, dtype=float)
+        xFit = np.linspace(0, self.nPassi, 1000)
         
-
-        print("=" * 45)
-        print(" MATRICE DI CORRELAZIONE INSERITA ")
-        print("=" * 45)
-        print("\n".join(["[" + "  ".join([f"{val:.2f}" for val in row]) + "]" for row in self.matriceCorrelazione]))
-        print("\n")
-
-        print("=" * 45)
-        print(" MATRICE DI CORRELAZIONE STIMATA DAI PASSI ")
-        print("=" * 45)
-        print("\n".join(["[" + "  ".join([f"{val:.3f}" for val in row]) + "]" for row in self.matriceCorrelazioneStimata]))
-        print("=" * 45)
+        nColonne = min(len(assi), 2)
+        nRighe = (len(assi) + nColonne - 1) // nColonne
         
-        if stampa:
-            self.mostraTraiettoria3D(passiX, passiY)
+        fig, ax = plt.subplots(nRighe, nColonne, figsize=(7 * nColonne, 5 * nRighe), squeeze=False)
         
+        for k, asse in enumerate(assi):
+            a = ax[k // nColonne, k % nColonne]
+            
+            a.bar(centri, self.marginale(asse), width=1, color='skyblue', edgecolor='royalblue', alpha=0.7, label="Osservata")
+            a.plot(xFit, binomiale(xFit, *self.parBin[asse]), 'orange', label=f"Binomiale\n$n={self.parBin[asse, 0]:.1f}, p={self.parBin[asse, 1]:.2f}$")
+            a.plot(xFit, gaussiana(xFit, *self.parGau[asse]), 'blue', label=f"Gaussiana\n$\\mu={self.parGau[asse, 0]:.2f}, \\sigma={self.parGau[asse, 1]:.2f}$")
+            a.set_title(f"Proiezione asse {asse} (p={self.probAssi[asse]})")
+            a.set_xlabel(f"Passi sull'asse {asse}")
+            a.set_ylabel("Frequenza")
+            a.legend()
+        
+        # eventuale riquadro vuoto
+        for k in range(len(assi), nRighe * nColonne):
+            ax[k // nColonne, k % nColonne].axis("off")
+        
+        plt.suptitle(f"Distribuzione delle Proiezioni\nnPassi={self.nPassi},  nPalle={self.nPalle},  nAssi={self.nAssi}")
+        plt.tight_layout()
         
+        self.stampaFit(assi)
         
-    def mostra3D(self):
+        mostraFigura(self.nomeFigura("proiezioniND"))
+    
+    
+    def stampaFit(self, assi=None):
         """
-        Visualizza la distribuzione 3D delle palline come istogramma.
+        Stampa i risultati dei fit delle proiezioni sugli assi scelti (di default tutti).
         
         """
+        if assi is None:
+            assi = range(self.nAssi)
         
-        #----------------
-        # PLOT SENZA FIT
-        #----------------
-        
-        bordiBin = np.arange(-0.5, self.nPassi + 1, 1)
+        print("\n---\n")
+        print("Risultati dei fit:")
+        print("    asse |  p     |  n Bin    p Bin   |  µ        𝜎       |  χ²rid Bin  χ²rid Gau")
+        for asse in assi:
+            print("    {:<4} |  {:<5.3f} |  {:<7.2f}  {:<6.3f}  |  {:<7.2f}  {:<6.2f}  |  {:<9.2f}  {:<9.2f}".format(
+                asse, self.probAssi[asse], self.parBin[asse, 0], self.parBin[asse, 1],
+                self.parGau[asse, 0], self.parGau[asse, 1], self.chi2RidBin[asse], self.chi2RidGau[asse]))
+        print("\n---")
 
-        
-        istogramma, xBordi, yBordi = np.histogram2d(self.risultatiX, self.risultatiY, bins=[bordiBin, bordiBin])
-
-        
-        xPos, yPos = np.meshgrid(xBordi[:-1], yBordi[:-1], indexing="ij")
-        xPos = xPos.ravel()
-        yPos = yPos.ravel()
-        zPos = np.zeros_like(xPos)
 
-        dx = dy = 1  # larghezza dei bin
-        dz = istogramma.ravel()  # frequenze dell'istogramma
 
-        
-        fig = plt.figure(figsize=(12, 8))
-        ax = fig.add_subplot(111, projection='3d')
-        
-        # istogramma 3D 
-        ax.bar3d(xPos, yPos, zPos, dx, dy, dz, color='skyblue', edgecolor='royalblue', alpha=0.5, label='Istogramma Simulato')
+def lavoratoreSparso(galton, nPalle, seme):
+    """
+    Funzione eseguita da ogni processo di GaltonND.accumulaParallelo().
+    
+    Simula nPalle palline a blocchi con il proprio seme e restituisce
+    l'istogramma sparso (indici, conteggi) accumulato.
+    
+    """
+    galton.rng = creaGeneratore(seme, galton.bitgen)
+    galton.accumulaBlocchi(nPalle)
+    
+    return galton.indici, galton.conteggi
 
-        ax.set_title(f"Distribuzione 3D della Macchina di Galton\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
-        ax.set_xlabel("Passi verso DX in X")
-        ax.set_ylabel("Passi verso DX in Y")
-        ax.set_zlabel("Frequenza")
-        ax.legend()
 
-        plt.show()
-        
-        
-        #--------------
-        # PLOT CON FIT
-        #--------------
 
-        bordiBin = np.arange(-0.5, self.nPassi + 1, 1)
 
-        istogramma, xBordi, yBordi = np.histogram2d(self.risultatiX, self.risultatiY, bins=[bordiBin, bordiBin])
+#------------------------------------------------
+#    Repliche indipendenti della macchina 2D
+#------------------------------------------------
 
+class Repliche2D:
+    """
+    Classe per la simulazione di R repliche indipendenti della stessa macchina
+    di Galton 2D in un'unica computazione vettoriale: invece di R oggetti Galton2D
+    si ottengono direttamente gli istogrammi (R, nPassi+1) e, con i fit di tutte
+    le repliche insieme (fit.fitBinomialeGaussianaLotto()), i parametri (R, 3).
         
-        xPos, yPos = np.meshgrid(xBordi[:-1], yBordi[:-1], indexing="ij")
-        xPos = xPos.ravel()
-        yPos = yPos.ravel()
-        zPos = np.zeros_like(xPos)
-
-        dx = dy = 1  # larghezza dei bin
-        dz = istogramma.ravel()  # frequenze dell'istogramma
-
+        Repliche2D(nPassi, nPalle, probDX, repliche)
+    
+    Parametri
+    ---------
+        nPassi, nPalle, probDX: come in Galton2D, uguali per tutte le repliche
+        repliche:           numero R di repliche
+        motore:             motore di simulazione
+                                "istogramma" estrae gli istogrammi di tutte le repliche con una
+                                             sola multinomiale sulla binomiale, con costo
+                                             indipendente da nPalle
+                                "binomiale"  estrae il numero di passi a DX di ogni pallina,
+                                             per gruppi di repliche di al più DIM_BLOCCO palline
+        seed, rng, bitgen:  generatore di numeri casuali, come in GaltonBase
+        stimatore:          stimatore dei fit (vedi fit.STIMATORI), None -> nessun fit
+        istogrammi:         istogrammi delle repliche, forma (R, nPassi+1)
+        parBin, parGau, covBin, covGau, chi2Bin, chi2Gau, gdlBin, gdlGau, chi2RidBin, chi2RidGau:
+                            risultati dei fit, una riga per replica
+    
+    Metodi
+    ------
+        simula()        simula gli istogrammi di tutte le repliche
+        fit()           fit binomiale e gaussiano di tutte le repliche insieme
+        risultati()     dizionario con istogrammi e risultati dei fit
+    
+    """
+    
+    # motori di simulazione disponibili
+    MOTORI = ("istogramma", "binomiale")
+    
+    # attributi restituiti da risultati()
+    RISULTATI = ("nPalle", "istogrammi",
+                 "parBin", "parGau", "covBin", "covGau",
+                 "chi2Bin", "chi2Gau", "gdlBin", "gdlGau", "chi2RidBin", "chi2RidGau")
+    
+    def __init__(self, nPassi, nPalle, probDX, repliche, motore="istogramma", seed=None, rng=None, bitgen="PCG64",
+                 stimatore="momenti"):
+        """
+        Costruttore della classe Repliche2D.
+        Simula tutte le repliche ed esegue i fit, se lo stimatore non è None.
         
-        fig = plt.figure(figsize=(12, 8))
-        ax = fig.add_subplot(111, projection='3d')
+        """
+        if motore not in self.MOTORI:
+            raise ValueError(f"Motore di simulazione non valido: {motore}")
+        if stimatore is not None and stimatore not in STIMATORI:
+            raise ValueError(f"Stimatore dei fit non valido: {stimatore}")
         
-        # istogramma 3D 
-        ax.bar3d(xPos, yPos, zPos, dx, dy, dz, color='skyblue', edgecolor='royalblue', alpha=0.5, label='Istogramma Simulato')
-            
-        x_range = np.arange(-0.5, self.nPassi + 1, 0.5)
-        y_range = np.arange(-0.5, self.nPassi + 1, 0.5)
-        X, Y = np.meshgrid(x_range, y_range)
+        self.nPassi = nPassi
+        self.nPalle = nPalle
+        self.probDX = probDX
+        self.repliche = repliche
+        self.motore = motore
+        self.seed = seed
+        self.rng = rng if rng is not None else creaGeneratore(seed, bitgen)
+        self.stimatore = stimatore
+        self.istogrammi = None
+        
+        self.parBin, self.parGau = None, None
+        self.covBin, self.covGau = None, None
+        self.chi2Bin, self.chi2Gau = None, None
+        self.gdlBin, self.gdlGau = None, None
+        self.chi2RidBin, self.chi2RidGau = None, None
+        
+        self.simula()
+        
+        if self.stimatore is not None:
+            self.fit()
+    
+    
+    def simula(self):
+        """
+        Simula gli istogrammi di tutte le repliche con il motore scelto.
         
+        """
+        nBin = self.nPassi + 1
         
-        mean = [np.mean(self.risultatiX), np.mean(self.risultatiY)]
-        stdX = np.std(self.risultatiX)
-        stdY = np.std(self.risultatiY)
-        cov = self.matriceCorrelazione * (stdX * stdY)  # matrice di covarianza
+        if self.motore == "istogramma":
+            prob = pmfBinomiale(self.nPassi, self.probDX)
+            self.istogrammi = self.rng.multinomial(self.nPalle, prob / np.sum(prob), size=self.repliche)
+            return
         
-        # distribuzione normale multivariata
-        rv = multivariate_normal(mean, cov)
-        Z = rv.pdf(np.dstack((X, Y))) * self.nPalle  # densità di probabilità scalata per il numero di palline
+        # gruppi di repliche con al più DIM_BLOCCO palline, almeno una replica per gruppo
+        gruppo = max(DIM_BLOCCO // self.nPalle, 1)
+        self.istogrammi = np.empty((self.repliche, nBin), dtype=np.int64)
         
-        # distribuzione attesa
-        ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.6, label='Distribuzione Attesa')
-
-        ax.set_title(f"Distribuzione 3D della Macchina di Galton con fit\nnPassi={self.nPassi},  nPalle={self.nPalle},  probX={self.probX},  probY={self.probY}")
-        ax.set_xlabel("Passi verso DX in X")
-        ax.set_ylabel("Passi verso DX in Y")
-        ax.set_zlabel("Frequenza")
-        ax.legend()
-        plt.show()
\ No newline at end of file
+        for inizio in range(0, self.repliche, gruppo):
+            g = min(gruppo, self.repliche - inizio)
+            passiDX = self.rng.binomial(self.nPassi, self.probDX, (g, self.nPalle))
+            
+            # indice lineare (replica, bin): un solo bincount per tutto il gruppo
+            indici = passiDX + nBin * np.arange(g)[:, None]
+            self.istogrammi[inizio:inizio + g] = np.bincount(indici.ravel(), minlength=g * nBin).reshape(g, nBin)
+    
+    
+    def fit(self):
+        """
+        Fit binomiale e gaussiano di tutte le repliche insieme, partendo dai momenti
+        di ogni istogramma. Parametri (R, 3), covarianze (R, 3, 3), χ², χ² ridotti
+        e gradi di libertà (R,).
+        
+        """
+        fitBin, fitGau = fitBinomialeGaussianaLotto(self.istogrammi, stimatore=self.stimatore)
+        
+        self.parBin, self.covBin, self.chi2Bin, self.chi2RidBin, self.gdlBin = fitBin
+        self.parGau, self.covGau, self.chi2Gau, self.chi2RidGau, self.gdlGau = fitGau
+    
+    
+    def risultati(self):
+        """
+        Restituisce istogrammi e risultati dei fit di tutte le repliche:
+        un dizionario {nome: valore} con gli attributi elencati in RISULTATI.
+            
+            R = Repliche2D(20, 50000, 0.5, 1000)
+            R.risultati()["parGau"][:, 0]     # medie delle 1000 repliche
+        
+        """
+        return {nome: getattr(self, nome) for nome in self.RISULTATI}
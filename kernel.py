@@ -0,0 +1,227 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                       kernel                      #
+#   file con i kernel compilati passo per passo     #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import numpy as np
+from importlib.util import find_spec
+
+# Numba è opzionale: se non è installato si usano le versioni NumPy.
+# Viene importato solo al primo utilizzo di un kernel, dato che il suo
+# caricamento è lento
+NUMBA_DISPONIBILE = find_spec("numba") is not None
+
+# kernel compilati, creati da compilaKernel() al primo utilizzo
+KERNEL_NUMBA = {}
+
+
+
+#------------------------------------------
+#    Kernel compilati con Numba
+#------------------------------------------
+
+# I kernel sono definiti in kernelNumba.py, importato solo al primo utilizzo
+# dato che importa Numba.
+
+def compilaKernel():
+    """
+    Importa Numba e i kernel compilati di kernelNumba.py, letti dalla cache su
+    disco di Numba se già compilati da un processo precedente.
+
+    Restituisce:
+        dict:   {nome: kernel} per ogni kernel della sezione.
+
+    """
+    import kernelNumba
+    
+    return {"passiDestra": kernelNumba.passiDestraNumba,
+            "istogrammaPassi": kernelNumba.istogrammaPassiNumba,
+            "istogrammaPassi3D": kernelNumba.istogrammaPassi3DNumba,
+            "passiBooleani": kernelNumba.passiBooleaniNumba,
+            "accumulaTraiettorie": kernelNumba.accumulaTraiettorieNumba,
+            "occupazioneTraiettorie": kernelNumba.occupazioneTraiettorieNumba,
+            "levenbergMarquardt": kernelNumba.levenbergMarquardtNumba,
+            "newtonPoisson": kernelNumba.newtonPoissonNumba}
+
+
+def kernelNumba(nome):
+    """
+    Restituisce il kernel compilato chiamato nome, creando tutti i kernel al primo utilizzo.
+
+    """
+    if not KERNEL_NUMBA:
+        KERNEL_NUMBA.update(compilaKernel())
+    return KERNEL_NUMBA[nome]
+
+
+
+#------------------------------------------
+#    Versioni NumPy (senza Numba)
+#------------------------------------------
+
+def passiDestraNumpy(n, nPassi, p, rng):
+    return np.sum(rng.random((n, nPassi)) < p, axis=1)
+
+
+def istogrammaPassiNumpy(n, nPassi, p, rng, istogramma):
+    istogramma += np.bincount(passiDestraNumpy(n, nPassi, p, rng), minlength=nPassi + 1)
+    return istogramma
+
+
+def istogrammaPassi3DNumpy(n, nPassi, pX, pY, rng, istogramma):
+    risX = passiDestraNumpy(n, nPassi, pX, rng)
+    risY = passiDestraNumpy(n, nPassi, pY, rng)
+    istogramma += np.bincount(risX * (nPassi + 1) + risY,
+                              minlength=(nPassi + 1) ** 2).reshape(nPassi + 1, nPassi + 1)
+    return istogramma
+
+
+def passiBooleaniNumpy(n, nPassi, p, rng):
+    return rng.random((n, nPassi)) < p
+
+
+def accumulaTraiettorieNumpy(passi):
+    passi = np.where(passi, 1.0, -1.0)
+    passi[:, 0] = 0     # la traiettoria parte da 0 al primo piolo
+    return np.cumsum(passi, axis=1)
+
+
+def occupazioneTraiettorieNumpy(passi, occupazione):
+    nPassi = passi.shape[1]
+    colonne = accumulaTraiettorieNumpy(passi).astype(np.int64) + nPassi - 1
+    indici = colonne + np.arange(nPassi) * occupazione.shape[1]     # indice lineare (piolo, posizione)
+    occupazione += np.bincount(indici.ravel(), minlength=occupazione.size).reshape(occupazione.shape)
+    return occupazione
+
+
+
+#------------------------------------------
+#    Kernel utilizzati
+#------------------------------------------
+
+def passiDestra(n, nPassi, p, rng):
+    """
+    Simula il numero di passi verso destra di n palline.
+
+        passiDestra(n, nPassi, p, rng)
+
+    Parametri
+    ---------
+        n (int):        Numero di palline.
+        nPassi (int):   Numero di passi della macchina.
+        p (float):      Probabilità di andare a destra.
+        rng:            numpy.random.Generator da cui estrarre i numeri casuali.
+
+    Restituisce:
+        numpy.ndarray:  Numero di passi verso destra di ogni pallina, forma (n,).
+
+    """
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("passiDestra")(n, nPassi, p, rng)
+    return passiDestraNumpy(n, nPassi, p, rng)
+
+
+def istogrammaPassi(n, nPassi, p, rng, istogramma):
+    """
+    Simula n palline e somma i loro passi verso destra all'istogramma, modificato sul posto.
+    Con Numba non viene creato nessun array di dimensione n.
+
+        istogrammaPassi(n, nPassi, p, rng, istogramma)
+
+    Restituisce:
+        numpy.ndarray:  L'istogramma aggiornato, forma (nPassi+1,).
+
+    """
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("istogrammaPassi")(n, nPassi, p, rng, istogramma)
+    return istogrammaPassiNumpy(n, nPassi, p, rng, istogramma)
+
+
+def istogrammaPassi3D(n, nPassi, pX, pY, rng, istogramma):
+    """
+    Simula n palline lungo X e Y e le somma all'istogramma congiunto, modificato sul posto.
+
+        istogrammaPassi3D(n, nPassi, pX, pY, rng, istogramma)
+
+    Restituisce:
+        numpy.ndarray:  L'istogramma aggiornato, forma (nPassi+1, nPassi+1).
+
+    """
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("istogrammaPassi3D")(n, nPassi, pX, pY, rng, istogramma)
+    return istogrammaPassi3DNumpy(n, nPassi, pX, pY, rng, istogramma)
+
+
+def passiBooleani(n, nPassi, p, rng):
+    """
+    Simula i singoli passi di n palline senza passare per la matrice di float.
+
+    Restituisce:
+        numpy.ndarray:  Matrice booleana (n, nPassi) dei passi verso destra.
+
+    """
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("passiBooleani")(n, nPassi, p, rng)
+    return passiBooleaniNumpy(n, nPassi, p, rng)
+
+
+def accumulaTraiettorie(passi):
+    """
+    Calcola le posizioni delle palline piolo per piolo dalla matrice dei passi:
+    +1 per un passo a destra e -1 per uno a sinistra, partendo da 0.
+
+        accumulaTraiettorie(passi)
+
+    Restituisce:
+        numpy.ndarray:  Posizioni (n, nPassi) di ogni pallina.
+
+    """
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("accumulaTraiettorie")(passi)
+    return accumulaTraiettorieNumpy(passi)
+
+
+def occupazioneTraiettorie(passi, occupazione):
+    """
+    Somma all'occupazione, modificata sul posto, il numero di palline che passa per
+    ogni posizione ad ogni piolo. Le posizioni sono quelle di accumulaTraiettorie(),
+    spostate di nPassi-1 così da partire da 0. Chiamata su blocchi di palline
+    successivi costruisce l'occupazione senza conservare tutte le traiettorie.
+
+        occupazioneTraiettorie(passi, occupazione)
+
+    Parametri
+    ---------
+        passi (numpy.ndarray):       Matrice booleana (n, nPassi) dei passi verso destra.
+        occupazione (numpy.ndarray): Occupazione (nPassi, 2*nPassi-1) da aggiornare.
+
+    Restituisce:
+        numpy.ndarray:  L'occupazione aggiornata.
+
+    """
+    if NUMBA_DISPONIBILE:
+        return kernelNumba("occupazioneTraiettorie")(passi, occupazione)
+    return occupazioneTraiettorieNumpy(passi, occupazione)
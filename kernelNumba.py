@@ -0,0 +1,341 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                    kernelNumba                    #
+#     file con i kernel compilati con Numba         #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import math
+import numpy as np
+
+from numba import njit
+
+from util import EPSILON
+
+
+#------------------------------------------
+#    Kernel compilati con Numba
+#------------------------------------------
+
+# Il modulo viene importato da kernel.compilaKernel() solo al primo utilizzo
+# di un kernel. I kernel sono funzioni di modulo senza variabili libere, così
+# che Numba li ritrovi nella cache su disco (cache=True) in ogni nuovo processo
+# invece di ricompilarli: un kernel annidato in una funzione riceve ad ogni
+# esecuzione una nuova chiave e non viene mai letto dalla cache.
+
+# Ogni kernel di simulazione estrae i numeri casuali, li confronta con la
+# probabilità e accumula il risultato nello stesso ciclo, senza array intermedi.
+# Il numpy.random.Generator passato viene fatto avanzare come in NumPy.
+
+@njit(cache=True)
+def passiDestraNumba(n, nPassi, p, rng):
+    conteggi = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        c = 0
+        for _ in range(nPassi):
+            if rng.random() < p:
+                c += 1
+        conteggi[i] = c
+    return conteggi
+
+
+@njit(cache=True)
+def istogrammaPassiNumba(n, nPassi, p, rng, istogramma):
+    for _ in range(n):
+        c = 0
+        for _ in range(nPassi):
+            if rng.random() < p:
+                c += 1
+        istogramma[c] += 1
+    return istogramma
+
+
+@njit(cache=True)
+def istogrammaPassi3DNumba(n, nPassi, pX, pY, rng, istogramma):
+    for _ in range(n):
+        cX = 0
+        for _ in range(nPassi):
+            if rng.random() < pX:
+                cX += 1
+        cY = 0
+        for _ in range(nPassi):
+            if rng.random() < pY:
+                cY += 1
+        istogramma[cX, cY] += 1
+    return istogramma
+
+
+@njit(cache=True)
+def passiBooleaniNumba(n, nPassi, p, rng):
+    passi = np.empty((n, nPassi), dtype=np.bool_)
+    for i in range(n):
+        for j in range(nPassi):
+            passi[i, j] = rng.random() < p
+    return passi
+
+
+@njit(cache=True)
+def accumulaTraiettorieNumba(passi):
+    n, nPassi = passi.shape
+    traiet = np.zeros((n, nPassi))
+    for i in range(n):
+        for j in range(1, nPassi):
+            traiet[i, j] = traiet[i, j - 1] + (1.0 if passi[i, j] else -1.0)
+    return traiet
+
+
+@njit(cache=True)
+def occupazioneTraiettorieNumba(passi, occupazione):
+    n, nPassi = passi.shape
+    for i in range(n):
+        pos = nPassi - 1
+        occupazione[0, pos] += 1
+        for j in range(1, nPassi):
+            pos += 1 if passi[i, j] else -1
+            occupazione[j, pos] += 1
+    return occupazione
+
+
+# kernel dei fit: modello e jacobiano di fit.MODELLI nello stesso ciclo e
+# Levenberg-Marquardt e Newton sulla verosimiglianza di Poisson con sistemi
+# 3x3 risolti direttamente e passi riportati nei limiti di fit.LIMITI
+
+@njit(cache=True)
+def digammaNumba(x):
+    risultato = 0.0
+    if x < 0.5:
+        # riflessione: ψ(x) = ψ(1-x) - π/tan(πx)
+        risultato = -np.pi / np.tan(np.pi * x)
+        x = 1.0 - x
+    while x < 6.0:
+        # ricorrenza: ψ(x) = ψ(x+1) - 1/x
+        risultato -= 1.0 / x
+        x += 1.0
+    f = 1.0 / (x * x)
+    return (risultato + np.log(x) - 0.5 / x
+            - f * (1 / 12 - f * (1 / 120 - f * (1 / 252 - f * (1 / 240 - f / 132)))))
+
+
+@njit(cache=True)
+def modelloJacobianoNumba(modello, x, par, val, J, conJacobiano):
+    a, b, amp = par[0], par[1], par[2]
+
+    if modello == 0:
+        # binomiale, parametri (n, p, amp), in spazio logaritmico
+        p = min(max(b, 1e-12), 1 - 1e-12)
+        logP, log1P = np.log(p), np.log1p(-p)
+        lgN, psiN = math.lgamma(a + 1), digammaNumba(a + 1)
+        for i in range(len(x)):
+            m = a - x[i] + 1
+            if x[i] > a:
+                forma = 0.0     # oltre il supporto (x > n) la binomiale è nulla
+            else:
+                forma = np.exp(lgN - math.lgamma(x[i] + 1) - math.lgamma(m)
+                               + x[i] * logP + (a - x[i]) * log1P)
+            val[i] = amp * forma
+            if conJacobiano:
+                J[i, 2] = forma
+                if forma != 0:
+                    J[i, 0] = val[i] * (psiN - digammaNumba(m) + log1P)
+                    J[i, 1] = val[i] * (x[i] / p - (a - x[i]) / (1 - p))
+                else:
+                    J[i, 0] = 0.0
+                    J[i, 1] = 0.0
+    else:
+        # gaussiana, parametri (mu, sigma, amp)
+        sigma = max(b, 1e-12)
+        for i in range(len(x)):
+            z = (x[i] - a) / sigma
+            forma = np.exp(-0.5 * z * z)
+            val[i] = amp * forma
+            if conJacobiano:
+                J[i, 0] = val[i] * z / sigma
+                J[i, 1] = J[i, 0] * z
+                J[i, 2] = forma
+
+
+@njit(cache=True)
+def risolvi3Numba(M, g, soluzione):
+    # regola di Cramer per il sistema 3x3 M soluzione = g, False se singolare
+    det = (M[0, 0] * (M[1, 1] * M[2, 2] - M[1, 2] * M[2, 1])
+           - M[0, 1] * (M[1, 0] * M[2, 2] - M[1, 2] * M[2, 0])
+           + M[0, 2] * (M[1, 0] * M[2, 1] - M[1, 1] * M[2, 0]))
+    if det == 0 or not np.isfinite(det):
+        return False
+    for k in range(3):
+        a, b = (k + 1) % 3, (k + 2) % 3
+        soluzione[k] = (g[0] * (M[1, a] * M[2, b] - M[1, b] * M[2, a])
+                        + g[1] * (M[2, a] * M[0, b] - M[2, b] * M[0, a])
+                        + g[2] * (M[0, a] * M[1, b] - M[0, b] * M[1, a])) / det
+    return True
+
+
+@njit(cache=True)
+def levenbergMarquardtNumba(modello, x, y, p0, minimi, massimi, tolleranza, iterazioniMassime):
+    nPunti = len(x)
+    par = p0.copy()
+    nuovi = np.empty(3)
+    passo = np.empty(3)
+    val = np.empty(nPunti)
+    nuoviVal = np.empty(nPunti)
+    J = np.empty((nPunti, 3))
+    A = np.empty((3, 3))
+    g = np.empty(3)
+    M = np.empty((3, 3))
+
+    # l'ampiezza è lineare: si parte dal suo valore ottimo per la forma iniziale
+    par[2] = 1.0
+    modelloJacobianoNumba(modello, x, par, val, J, False)
+    prodotto, norma = 0.0, 0.0
+    for i in range(nPunti):
+        prodotto += val[i] * y[i]
+        norma += val[i] * val[i]
+    par[2] = prodotto / norma if norma > 0 else p0[2]
+
+    modelloJacobianoNumba(modello, x, par, val, J, True)
+    somma = 0.0
+    for i in range(nPunti):
+        somma += (y[i] - val[i]) ** 2
+    smorzamento = 1e-3
+
+    for _ in range(iterazioniMassime):
+        # equazioni normali JᵀJ passo = Jᵀ residui
+        for r in range(3):
+            g[r] = 0.0
+            for i in range(nPunti):
+                g[r] += J[i, r] * (y[i] - val[i])
+            for c in range(3):
+                A[r, c] = 0.0
+                for i in range(nPunti):
+                    A[r, c] += J[i, r] * J[i, c]
+
+        nuovaSomma = np.inf
+        while True:
+            for r in range(3):
+                for c in range(3):
+                    M[r, c] = A[r, c]
+                M[r, r] += smorzamento * (A[r, r] + tolleranza)
+
+            if risolvi3Numba(M, g, passo):
+                for k in range(3):
+                    nuovi[k] = min(max(par[k] + passo[k], minimi[k]), massimi[k])
+                
+                modelloJacobianoNumba(modello, x, nuovi, nuoviVal, J, False)
+                nuovaSomma = 0.0
+                for i in range(nPunti):
+                    nuovaSomma += (y[i] - nuoviVal[i]) ** 2
+
+            if nuovaSomma <= somma or smorzamento > 1e10:
+                break
+            smorzamento *= 10
+
+        if not nuovaSomma <= somma:
+            break   # nessun passo migliora: minimo raggiunto
+
+        convergenza = somma - nuovaSomma <= tolleranza * somma
+        if not convergenza:
+            convergenza = True
+            for k in range(3):
+                if abs(nuovi[k] - par[k]) > tolleranza * (abs(par[k]) + tolleranza):
+                    convergenza = False
+
+        par[:] = nuovi
+        somma = nuovaSomma
+        smorzamento = max(smorzamento / 10, 1e-12)
+        modelloJacobianoNumba(modello, x, par, val, J, True)
+
+        if convergenza:
+            break
+
+    return par, val, J
+
+
+@njit(cache=True)
+def logVerosimiglianzaNumba(y, val):
+    # logaritmo della verosimiglianza di Poisson dei bin, a meno di una costante
+    logL = 0.0
+    for i in range(len(y)):
+        if val[i] > 0:
+            logL += y[i] * np.log(val[i]) - val[i]
+        elif y[i] > 0:
+            return -np.inf
+    return logL
+
+
+@njit(cache=True)
+def newtonPoissonNumba(modello, x, y, p0, minimi, massimi, tolleranza, iterazioniMassime):
+    nPunti = len(x)
+    par = p0.copy()
+    nuovi = np.empty(3)
+    passo = np.empty(3)
+    val = np.empty(nPunti)
+    nuoviVal = np.empty(nPunti)
+    J = np.empty((nPunti, 3))
+    F = np.empty((3, 3))
+    g = np.empty(3)
+    
+    modelloJacobianoNumba(modello, x, par, val, J, True)
+    logL = logVerosimiglianzaNumba(y, val)
+    
+    for _ in range(iterazioniMassime):
+        # punteggio g = Σ (y/µ - 1) ∂µ e informazione di Fisher F = Σ ∂µ ∂µᵀ / µ
+        g[:] = 0.0
+        F[:, :] = 0.0
+        for i in range(nPunti):
+            if val[i] > EPSILON:    # come in fit.newtonPoissonNumpy()
+                for r in range(3):
+                    g[r] += (y[i] / val[i] - 1.0) * J[i, r]
+                    for c in range(3):
+                        F[r, c] += J[i, r] * J[i, c] / val[i]
+        
+        if not risolvi3Numba(F, g, passo):
+            break
+        
+        # il passo viene dimezzato finché la verosimiglianza non aumenta
+        t = 1.0
+        while True:
+            for k in range(3):
+                nuovi[k] = min(max(par[k] + t * passo[k], minimi[k]), massimi[k])
+            modelloJacobianoNumba(modello, x, nuovi, nuoviVal, J, False)
+            nuovaLogL = logVerosimiglianzaNumba(y, nuoviVal)
+            if nuovaLogL >= logL or t < 1e-3:
+                break
+            t *= 0.5
+        
+        if not nuovaLogL >= logL:
+            break   # nessun passo migliora: massimo raggiunto
+        
+        convergenza = True
+        for k in range(3):
+            if abs(nuovi[k] - par[k]) > tolleranza * (abs(par[k]) + tolleranza):
+                convergenza = False
+        
+        par[:] = nuovi
+        logL = nuovaLogL
+        modelloJacobianoNumba(modello, x, par, val, J, True)
+        
+        if convergenza:
+            break
+    
+    return par, val, J
@@ -38,10 +38,23 @@ from galton import Galton3Dcorr
 
 from util import NumPalAdeg
 from util import verificaMatriCorr
+from util import GENERATORI_BIT
 
-from studio2D import studio2D
-from studio3D import studio3D
-from studio3Dcorr import studio3Dcorr
+from figure import FORMATI_FIGURE
+from figure import esportaFigure
+
+from fit import STIMATORI
+
+from cache import attivaCache
+
+from pianificatore import CARTELLA_CHECKPOINT
+from pianificatore import configuraStudi
+
+# numero di palline del primo lotto con --precisione se --nPalle non è specificato
+PALLE_INIZIALI = 1000
+
+# i moduli degli studi (matplotlib, scipy, tqdm) sono importati
+# solo se viene richiesto il relativo studio
 
 
 
@@ -98,10 +111,24 @@ def parse_arguments():
     parser.add_argument('--probY',         '-py',               type=float,             help='Probabilità di andare a destra lungo Y ( 0 <= probX <= 1)')
     parser.add_argument('--matrice',        '-m',     nargs=4,  type=float,             help='Inserisci la matrice di correlazione (es. 1 0.9 0.9 1)')
     parser.add_argument('--margineErrore', '-me',               type=float,             help='Margine di errore per il calcolo del numero di palline da simulare (es. 0.05 per il 5%%)')
+    parser.add_argument('--workers',        '-w',     default=1, type=int,              help='Numero di processi tra cui dividere le palline (workers >= 1, default=1)')
+    parser.add_argument('--seed',           '-s',               type=int,               help='Seme del generatore di numeri casuali (default=seme casuale)')
+    parser.add_argument('--precisione',     '-pr',              type=float,             help='Errore standard da raggiungere su µ e 𝜎 dei fit gaussiani: le palline vengono aggiunte a lotti finché non è raggiunto (es. 0.01)')
+    parser.add_argument('--figure',         '-f',               type=str,               help='Cartella in cui salvare le figure invece di mostrarle (backend non interattivo, es. figure/)')
+    parser.add_argument('--formati',        '-fo',    nargs='+', default=['png'], choices=FORMATI_FIGURE, help='Formati delle figure salvate con --figure (default=png)')
+    parser.add_argument('--processiFigure', '-pf',    default=2, type=int,              help='Numero di processi che salvano le figure con --figure (0 = nessun processo aggiuntivo, default=2)')
+    parser.add_argument('--stimatore',      '-st',    default='momenti', choices=STIMATORI, help='Stimatore dei parametri dei fit: momenti raffinati con la verosimiglianza di Poisson, minimi quadrati o curve_fit per confronto (default=momenti)')
+    parser.add_argument('--bitgen',         '-bg',    default='PCG64', choices=GENERATORI_BIT, help='Generatore di bit del generatore di numeri casuali (default=PCG64)')
+    parser.add_argument('--archivio',       '-a',               type=str,               help='File in cui scrivere i singoli passi impacchettati in bit, da cui rileggere traiettorie e analisi (es. passi.bin)')
+    parser.add_argument('--cache',          '-c',               type=str,               help='Cartella della cache dei risultati: con --seed le configurazioni già simulate sono lette dal disco (es. cache/)')
+    parser.add_argument('--cacheMassima',   '-cm',    default=1024, type=float,         help='Dimensione massima della cache in MB, oltre la quale sono eliminati i risultati usati meno di recente (default=1024)')
     
     parser.add_argument('--studio2D',       '-s2d',             action='store_true',    help='Studio effettuato per la macchina di Galton 2D')
     parser.add_argument('--studio3D',       '-s3d',             action='store_true',    help='Studio effettuato per la macchina di Galton 3D')
     parser.add_argument('--studio3Dcorr',   '-s3dc',            action='store_true',    help='Studio effettuato per la macchina di Galton 3D correlata')
+    parser.add_argument('--processiStudio', '-ps',    default=1, type=int,              help='Numero di processi tra cui dividere i compiti degli studi, uno per punto della scansione (processiStudio >= 1, default=1)')
+    parser.add_argument('--checkpoint',     '-ck',    default=CARTELLA_CHECKPOINT, type=str, help=f'Cartella in cui gli studi salvano i compiti conclusi (default={CARTELLA_CHECKPOINT})')
+    parser.add_argument('--riprendi',       '-r',               action='store_true',    help='Riprende uno studio interrotto, senza ripetere i compiti salvati in --checkpoint')
     
     args = parser.parse_args()
     
@@ -116,8 +143,11 @@ def parse_arguments():
         parser.error("Devi selezionare uno e uno solo tra --dim2, --dim3, --dim3corr --studio2d, --studio3D e --studio3Dcorr.")
     
     if sum([args.studio2D, args.studio3D, args.studio3Dcorr]) == 0:
-        if (args.margineErrore is None and args.nPalle is None):
-            parser.error("Devi inserire un parametro tra --margineErrore e --nPalle.")
+        if (args.margineErrore is None and args.nPalle is None and args.precisione is None):
+            parser.error("Devi inserire un parametro tra --margineErrore, --nPalle e --precisione.")
+        
+        if args.precisione is not None and args.precisione <= 0:
+            parser.error("La precisione --precisione deve essere maggiore di 0.")
 
         if args.margineErrore is not None and args.nPalle is not None:
             print("Hai inserito sia --margineErrore che --nPalle, verrà data preferenza a quest'ultimo.")
@@ -139,11 +169,17 @@ def parse_arguments():
             parser.error("Il numero di passi della macchina deve essere maggiore di 0.")    
 
         if args.nPalle is None:
-            args.nPalle = NumPalAdeg(args.nPassi, args.probX, args.margineErrore, args.probY)
+            if args.precisione is not None:
+                args.nPalle = PALLE_INIZIALI    # primo lotto, poi aumentato fino alla precisione
+            else:
+                args.nPalle = NumPalAdeg(args.nPassi, args.probX, args.margineErrore, args.probY)
 
         if args.nPalle < 1:
             parser.error("Devi fornire un numero di palline --nPalle che sia maggiore di 0.")
 
+        if args.workers < 1:
+            parser.error("Il numero di processi --workers deve essere maggiore di 0.")
+
 
         if args.dim3:
             if args.probY is None:
@@ -169,7 +205,22 @@ def parse_arguments():
         if args.probY is not None and (args.probY < 0 or args.probY > 1):
             parser.error("La probabilità --probY deve essere compresa tra 0 e 1.")
 
-        print("Numero di palle utilizzato:",args.nPalle)
+        if args.precisione is not None:
+            print("Numero di palle iniziale:",args.nPalle)
+        else:
+            print("Numero di palle utilizzato:",args.nPalle)
+
+    if args.archivio is not None and args.workers > 1:
+        parser.error("L'archivio dei passi --archivio non è compatibile con --workers maggiore di 1.")
+
+    if args.processiFigure < 0:
+        parser.error("Il numero di processi --processiFigure non può essere negativo.")
+
+    if args.cacheMassima <= 0:
+        parser.error("La dimensione massima della cache --cacheMassima deve essere maggiore di 0.")
+
+    if args.processiStudio < 1:
+        parser.error("Il numero di processi --processiStudio deve essere almeno 1.")
 
     print("\nArgomenti inseriti controllati e utilizzabili.\n")
     
@@ -210,7 +261,8 @@ def argsFunzione(args):
     #-------------------------------------------
     
     if args.dim2:
-        Galton2D(args.nPassi, args.nPalle, args.probX)
+        Galton2D(args.nPassi, args.nPalle, args.probX, workers=args.workers, seed=args.seed, bitgen=args.bitgen,
+                 precisione=args.precisione, stimatore=args.stimatore, archivio=args.archivio)
     
     
     #-------------------------------------------
@@ -218,7 +270,8 @@ def argsFunzione(args):
     #-------------------------------------------
     
     if args.dim3:
-        Galton3D(args.nPassi, args.nPalle, args.probX, args.probY)
+        Galton3D(args.nPassi, args.nPalle, args.probX, args.probY, workers=args.workers, seed=args.seed, bitgen=args.bitgen,
+                 precisione=args.precisione, stimatore=args.stimatore, archivio=args.archivio)
     
     
     #-----------------------------------------------------
@@ -226,7 +279,8 @@ def argsFunzione(args):
     #-----------------------------------------------------
     
     if args.dim3corr:
-        Galton3Dcorr(args.nPassi, args.nPalle, args.probX, args.probY, args.matrice) 
+        Galton3Dcorr(args.nPassi, args.nPalle, args.probX, args.probY, args.matrice, workers=args.workers, seed=args.seed, bitgen=args.bitgen,
+                     precisione=args.precisione, stimatore=args.stimatore, archivio=args.archivio)
     
     
     
@@ -236,7 +290,8 @@ def argsFunzione(args):
     #--------------------------------------#
     
     if args.studio2D:
-        studio2D()
+        from studio2D import studio2D
+        studio2D(args.seed, args.stimatore)
     
     
     #--------------------------------------
@@ -245,7 +300,8 @@ def argsFunzione(args):
     
     
     if args.studio3D:
-        studio3D()
+        from studio3D import studio3D
+        studio3D(args.seed, args.stimatore)
     
     
     #--------------------------------------
@@ -253,7 +309,8 @@ def argsFunzione(args):
     #--------------------------------------
     
     if args.studio3Dcorr:
-        studio3Dcorr()
+        from studio3Dcorr import studio3Dcorr
+        studio3Dcorr(args.seed, args.stimatore)
 
     
 #------------#
@@ -268,6 +325,17 @@ def argsFunzione(args):
 def main():
     args = parse_arguments()
     
+    # le figure vengono salvate invece che mostrate
+    if args.figure is not None:
+        esportaFigure(args.figure, args.formati, args.processiFigure)
+    
+    # i risultati delle configurazioni già simulate con lo stesso seme sono letti dal disco
+    if args.cache is not None:
+        attivaCache(args.cache, int(args.cacheMassima * 1024**2))
+    
+    # i compiti degli studi conclusi sono salvati, e con --riprendi non ripetuti
+    configuraStudi(args.checkpoint, args.processiStudio, args.riprendi)
+    
     argsFunzione(args)
 
 
@@ -0,0 +1,191 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                       motori                      #
+#    file con i motori di simulazione dei passi     #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import numpy as np
+
+
+# parola di 64 bit tutti a 1
+TUTTI_UNO = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# numero di bit a 1 di ogni byte (usata se np.bitwise_count non è disponibile)
+BIT_PER_BYTE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+
+#------------------------------------------
+#    Generazione di bit casuali
+#------------------------------------------
+
+def paroleCasuali(forma, rng=np.random):
+    """
+    Genera parole uint64 di bit casuali direttamente dai byte del generatore.
+
+        paroleCasuali(forma, rng=np.random)
+
+    Parametri
+    ---------
+        forma (tuple):  Forma dell'array di parole.
+        rng:            Generatore di numeri casuali (deve fornire il metodo bytes).
+
+    Restituisce:
+        numpy.ndarray:  Array uint64 di bit casuali.
+
+    """
+    nParole = int(np.prod(forma))
+    return np.frombuffer(rng.bytes(8 * nParole), dtype="<u8").reshape(forma).astype(np.uint64)
+
+
+def bernoulliParole(forma, p, rng=np.random):
+    """
+    Genera prove di Bernoulli di probabilità p impacchettate a 64 per parola uint64.
+
+    Ogni prova confronta un numero uniforme U con p bit per bit, seguendo lo
+    sviluppo binario di p: alla prima cifra in cui il bit casuale differisce da
+    quello di p la prova è decisa (successo se il bit casuale è 0 e quello di p è 1).
+    Le 64 prove di una parola sono decise in parallelo e ad ogni cifra si estraggono
+    nuovi bit solo per le parole che hanno ancora prove indecise.
+
+    Costo: una prova singola si decide in media con 2 bit casuali, ma una parola
+    resta attiva finché l'ultima delle sue 64 prove non è decisa, circa
+    log2(64) + 1.3 cifre, per cui si estraggono circa 7 bit per passo. Decidere
+    le prove una per una richiederebbe indici per singola prova e cicli Python
+    sui bit, molto più lenti; i 7 bit restano comunque ben sotto i 64 di un float.
+
+    Parametri
+    ---------
+        forma (tuple):  Forma dell'array di parole.
+        p (float):      Probabilità di successo della singola prova.
+        rng:            Generatore di numeri casuali.
+
+    Restituisce:
+        numpy.ndarray:  Array uint64 in cui ogni bit a 1 è un successo.
+
+    """
+    nParole = int(np.prod(forma))
+
+    esito = np.zeros(nParole, dtype=np.uint64)
+    indecisi = np.full(nParole, TUTTI_UNO)
+    attive = np.arange(nParole)     # parole con almeno una prova indecisa
+
+    resto = float(p)
+
+    # lo sviluppo binario di un float è finito: quando resto == 0 le prove
+    # ancora indecise hanno U >= p e quindi sono insuccessi
+    while attive.size > 0 and resto > 0:
+        resto *= 2
+        bitP = resto >= 1
+        if bitP:
+            resto -= 1
+
+        casuali = paroleCasuali(attive.size, rng)
+        aperti = indecisi[attive]
+
+        if bitP:
+            decisi = aperti & ~casuali   # bit casuale 0 < bit di p 1 -> successo
+            esito[attive] |= decisi
+        else:
+            decisi = aperti & casuali    # bit casuale 1 > bit di p 0 -> insuccesso
+
+        aperti &= ~decisi
+        indecisi[attive] = aperti
+        attive = attive[aperti != 0]
+
+    return esito.reshape(forma)
+
+
+
+#------------------------------------------
+#    Passi impacchettati in bit
+#------------------------------------------
+
+def passiBit(n, nPassi, p, rng=np.random):
+    """
+    Simula i passi verso destra di n palline impacchettati in bit, 64 passi
+    per parola uint64. I bit oltre nPassi nell'ultima parola sono a zero.
+
+        passiBit(n, nPassi, p, rng=np.random)
+
+    Per p = 0.5 ogni bit casuale è direttamente un passo, altrimenti si usa
+    bernoulliParole().
+
+    Parametri
+    ---------
+        n (int):        Numero di palline.
+        nPassi (int):   Numero di passi della macchina.
+        p (float):      Probabilità di andare a destra.
+        rng:            Generatore di numeri casuali.
+
+    Restituisce:
+        numpy.ndarray:  Array uint64 di forma (n, ceil(nPassi/64)).
+
+    """
+    forma = (n, (nPassi + 63) // 64)
+
+    if p == 0.5:
+        parole = paroleCasuali(forma, rng)
+    else:
+        parole = bernoulliParole(forma, p, rng)
+
+    resto = nPassi % 64
+    if resto:
+        parole[:, -1] &= np.uint64((1 << resto) - 1)
+
+    return parole
+
+
+def contaBit(parole):
+    """
+    Conta i bit a 1 (popcount) di ogni parola uint64.
+
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(parole)
+
+    byte = parole.astype("<u8", copy=False).view(np.uint8).reshape(parole.shape + (8,))
+    return np.sum(BIT_PER_BYTE[byte], axis=-1)
+
+
+def contaPassi(parole):
+    """
+    Conta i passi verso destra di ogni pallina dalle parole di passiBit().
+
+    Restituisce:
+        numpy.ndarray:  Numero di passi verso destra, forma (n,).
+
+    """
+    return np.sum(contaBit(parole), axis=1, dtype=np.int64)
+
+
+def spacchettaPassi(parole, nPassi):
+    """
+    Converte le parole di passiBit() nella matrice booleana (n, nPassi) dei passi,
+    necessaria per le traiettorie.
+
+    """
+    byte = parole.astype("<u8", copy=False).view(np.uint8)
+    return np.unpackbits(byte, axis=1, count=nPassi, bitorder="little").astype(bool)
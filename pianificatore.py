@@ -0,0 +1,178 @@
+#####################################################
+#                                                   #
+#         Università degli Studi di Perugia         #
+#            Laurea Triennale in Fisica             #
+#                                                   #
+#        Metodi Computazionali per la Fisica        #
+#             Anno accademico 2024/2025             #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#        Elaborato finale di Filippo Tintori        #
+#                                                   #
+#              GitHub: filippo-tintori              #
+#   https://github.com/filippo-tintori/ProgettoMCF  #
+#                                                   #
+#---------------------------------------------------#
+#                                                   #
+#                   pianificatore                   #
+#   file con l'esecuzione degli studi in compiti    #
+#                                                   #
+#####################################################
+
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Aggiungo moduli aggiuntivi
+#--------------------------------
+
+import os
+import pickle
+
+from multiprocessing import Pool
+
+from cache import chiaveCache
+
+
+
+#------------------------------------------
+#    Impostazioni degli studi
+#------------------------------------------
+
+# cartella predefinita dei checkpoint dei compiti
+CARTELLA_CHECKPOINT = "checkpoint"
+
+# impostazioni con cui gli studi eseguono i loro compiti
+PIANIFICAZIONE = {"cartella": CARTELLA_CHECKPOINT, "processi": 1, "riprendi": False}
+
+def configuraStudi(cartella=CARTELLA_CHECKPOINT, processi=1, riprendi=False):
+    """
+    Imposta come gli studi eseguono i loro compiti (un punto della scansione
+    ciascuno): il numero di processi tra cui sono divisi e la cartella in cui
+    ogni compito concluso viene salvato. Con riprendi=True i compiti già salvati
+    non vengono ripetuti, così che uno studio interrotto riparta da dove si era
+    fermato; altrimenti i checkpoint di una parte vengono eliminati al suo avvio.
+
+        configuraStudi(cartella=CARTELLA_CHECKPOINT, processi=1, riprendi=False)
+
+    Parametri
+    ---------
+        cartella (str):     Cartella dei checkpoint, una sottocartella per parte dello studio.
+        processi (int):     Numero di processi che eseguono i compiti (1 -> nel processo principale).
+        riprendi (bool):    Riusa i compiti già conclusi.
+
+    """
+    if processi < 1:
+        raise ValueError(f"Numero di processi non valido: {processi}")
+
+    PIANIFICAZIONE.update(cartella=cartella, processi=int(processi), riprendi=bool(riprendi))
+
+
+
+#------------------------------------------
+#    Esecuzione dei compiti
+#------------------------------------------
+
+def leggiCheckpoint(percorso):
+    """
+    Legge il risultato di un compito concluso, None se il file è illeggibile.
+
+    """
+    try:
+        with open(percorso, "rb") as file:
+            return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def scriviCheckpoint(percorso, risultato):
+    """
+    Salva il risultato di un compito con un nome temporaneo e poi lo rinomina,
+    così che un compito interrotto durante la scrittura non risulti concluso.
+
+    """
+    temporaneo = f"{percorso}.{os.getpid()}.tmp"
+
+    with open(temporaneo, "wb") as file:
+        pickle.dump(risultato, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(temporaneo, percorso)
+
+
+def eseguiCompito(compito):
+    """
+    Esegue un compito nel processo che lo riceve e ne salva subito il risultato,
+    così che resti su disco anche se lo studio si interrompe prima della fine.
+
+    Restituisce:
+        tuple: (indice, risultato) del compito.
+
+    """
+    indice, funzione, argomenti, percorso = compito
+
+    risultato = funzione(*argomenti)
+    scriviCheckpoint(percorso, risultato)
+
+    return indice, risultato
+
+
+def eseguiCompiti(nome, funzione, compiti):
+    """
+    Esegue funzione(*argomenti) per ogni tupla di argomenti in compiti, divisi
+    tra i processi di configuraStudi(). Ogni compito concluso è salvato nella
+    sottocartella nome, con una chiave data da funzione, posizione e argomenti;
+    riprendendo lo studio i compiti già salvati sono letti invece che ripetuti.
+
+        eseguiCompiti("studio2Dpt2", istogramma2D, [(10, 10**5, 0.5, seme), ...])
+
+    Parametri
+    ---------
+        nome (str):         Nome della parte dello studio, cartella dei suoi checkpoint.
+        funzione:           Funzione di modulo (serializzabile) che esegue un compito.
+        compiti (list):     Tuple di argomenti, una per compito, indipendenti tra loro.
+
+    Restituisce:
+        list: Risultati dei compiti, nello stesso ordine di compiti.
+
+    """
+    from tqdm import tqdm
+
+    cartella = os.path.join(PIANIFICAZIONE["cartella"], nome)
+    os.makedirs(cartella, exist_ok=True)
+
+    # senza ripresa i compiti di un'esecuzione precedente non vanno riusati
+    if not PIANIFICAZIONE["riprendi"]:
+        for voce in os.scandir(cartella):
+            if voce.name.endswith(".pkl"):
+                os.remove(voce.path)
+
+    risultati = [None] * len(compiti)
+    daEseguire = []
+
+    for i, argomenti in enumerate(compiti):
+        chiave = chiaveCache(funzione=f"{funzione.__module__}.{funzione.__qualname__}", indice=i, argomenti=argomenti)
+        percorso = os.path.join(cartella, f"{chiave}.pkl")
+
+        risultato = leggiCheckpoint(percorso) if os.path.exists(percorso) else None
+
+        if risultato is None:
+            daEseguire.append((i, funzione, argomenti, percorso))
+        else:
+            risultati[i] = risultato
+
+    conclusi = len(compiti) - len(daEseguire)
+    if conclusi > 0:
+        print(f"{nome}: {conclusi} compiti su {len(compiti)} ripresi dai checkpoint")
+
+    processi = min(PIANIFICAZIONE["processi"], len(daEseguire))
+
+    if processi > 1:
+        with Pool(processi) as pool:
+            for i, risultato in tqdm(pool.imap_unordered(eseguiCompito, daEseguire), total=len(compiti), initial=conclusi):
+                risultati[i] = risultato
+    else:
+        for compito in tqdm(daEseguire, total=len(compiti), initial=conclusi):
+            i, risultato = eseguiCompito(compito)
+            risultati[i] = risultato
+
+    return risultati
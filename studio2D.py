@@ -27,8 +27,6 @@
 #--------------------------------
 
 import numpy as np
-import matplotlib.pyplot as plt
-from tqdm import tqdm
 
 from scipy.optimize import curve_fit
 from scipy.stats import norm
@@ -39,30 +37,42 @@ from scipy.stats import chi2
 # -
 
 from galton import Galton2D
+from galton import Repliche2D
+from fit import fitBinomialeGaussianaLotto
+from figure import pyplot
+from figure import nomeFigura
+from figure import mostraFigura
 from util import NumPalAdeg
 from util import gaussiana
 from util import binomiale
+from util import semeDerivato
+from pianificatore import eseguiCompiti
 
 #------------------------------------------
 #    Modifica dei plot in stile LaTeX
 #------------------------------------------
 
-plt.rcParams.update({
-    "text.usetex": True,
-    "font.family": "serif",
-    "font.serif": ["Latin Modern Roman"],
-    "font.size": 12,
-    "axes.titlesize": 14,
-    "axes.labelsize": 12,
-    "xtick.labelsize": 10,
-    "ytick.labelsize": 10,
-})
+plt = pyplot()
+
+
+#------------------------------------------
+#    Compiti dello studio
+#------------------------------------------
+
+def istogramma2D(nPassi, nPalle, probDX, seed):
+    """
+    Compito dello studio: istogramma di una configurazione della macchina 2D,
+    senza fit (eseguiti poi insieme su tutta la scansione).
+    
+    """
+    return Galton2D(nPassi, nPalle, probDX, False, stimatore=None, seed=seed).istogramma
+
 
 ###############
 #  STUDIO 2D  #
 ###############
 
-def studio2D():
+def studio2D(seed=None, stimatore="momenti"):
     print("Hai avviato lo studio della macchina di Galton 2D.\n")
     print("Verranno eseguite le simulazioni di diverse configurazioni di macchine di Galton.")
     print("Maggiori informazioni sono fornite nel file README.\n\n")
@@ -72,21 +82,21 @@ def studio2D():
     
     print("PARTE 1")
     
-    studio2Dpt1()
+    studio2Dpt1(seed, stimatore)
 
 
     print("\n----\n")
     
     print("PARTE 2")
     
-    studio2Dpt2()
+    studio2Dpt2(seed, stimatore)
     
     
     print("\n----\n")
      
     print("PARTE 3")
     
-    studio2Dpt3()
+    studio2Dpt3(seed, stimatore)
     
     print("\n-----")
 
@@ -95,9 +105,10 @@ def studio2D():
 #   Studio 2D parte 1
 #-----------------------
 
-def studio2Dpt1():
+def studio2Dpt1(seed=None, stimatore="momenti"):
     """
-    Si ripete la stessa simulazione per 1000 volte.
+    Si ripete la stessa simulazione per 1000 volte, con tutte le repliche
+    simulate e fittate insieme (Repliche2D).
     
     """
     ripet = 1000
@@ -107,11 +118,8 @@ def studio2Dpt1():
     
     n = NumPalAdeg(passi, prob, 0.01)
     
-    studio1 = np.empty(ripet)
-    Bin = np.empty(ripet)
-    
-    for i in tqdm(range(ripet)):
-        studio1[i] = Galton2D(passi, n, prob, False).parGau[0]
+    # medie dei fit gaussiani di tutte le ripetizioni
+    studio1 = Repliche2D(passi, n, prob, ripet, seed=semeDerivato(seed, 1), stimatore=stimatore).parGau[:, 0]
     
     hist, binBordi = np.histogram(studio1, bins=nbin)
     binCentri = (binBordi[:-1] + binBordi[1:]) / 2
@@ -175,7 +183,7 @@ def studio2Dpt1():
     
     plt.suptitle(f'Distribuzione delle medie stimate $\\mu$\nnPassi={passi},  nPalle={n},  probDX={prob}')
     plt.tight_layout()
-    plt.show()
+    mostraFigura(nomeFigura("studio2Dpt1_medie", nPassi=passi, nPalle=n, probDX=prob))
 
 
 
@@ -185,7 +193,7 @@ def studio2Dpt1():
 #-----------------------
 
 
-def studio2Dpt2():
+def studio2Dpt2(seed=None, stimatore="momenti"):
     """
     Si varia il numero di passi, mantenendo la probabilità invariata.
     
@@ -200,21 +208,14 @@ def studio2Dpt2():
     chi2Bin = np.empty((len(passi), 2))
     chi2Gau = np.empty((len(passi), 2))
     
-    parBin = np.empty((len(passi), 3))
-    parGau = np.empty((len(passi), 3))
+    # un compito per punto della scansione, salvato appena concluso
+    compiti = [(passi[i], NumPalAdeg(passi[i], 0.5, 0.01), 0.5, semeDerivato(seed, 2, i)) for i in range(len(passi))]
+    istogrammi = eseguiCompiti("studio2Dpt2", istogramma2D, compiti)
     
-    gdlBin = np.empty((len(passi)))
-    gdlGau = np.empty((len(passi)))
-    
-    
-    for i in tqdm(range(len(passi))):
-        G = Galton2D(passi[i], NumPalAdeg(passi[i], 0.5, 0.01), 0.5, False)
-        parBin[i] = G.parBin
-        parGau[i] = G.parGau
-        gdlBin[i] = G.gdlBin
-        gdlGau[i] = G.gdlGau
-        chi2Bin[i] = G.chi2Bin, G.chi2RidBin
-        chi2Gau[i] = G.chi2Gau, G.chi2RidGau
+    # fit di tutti gli istogrammi insieme
+    fitBin, fitGau = fitBinomialeGaussianaLotto(istogrammi, stimatore=stimatore)
+    parBin, _, chi2Bin[:, 0], chi2Bin[:, 1], gdlBin = fitBin
+    parGau, _, chi2Gau[:, 0], chi2Gau[:, 1], gdlGau = fitGau
     
     print("\n" + "-" * 45)
     print("Test del χ² per la Binomiale\n")
@@ -278,7 +279,7 @@ def studio2Dpt2():
     
     plt.suptitle(f"Evoluzione dei parametri al variare del numero di passi\nprobDX={0.5}")
     plt.tight_layout()
-    plt.show()
+    mostraFigura(nomeFigura("studio2Dpt2_parametri", probDX=0.5))
     
     # -----
     # GRAFICO DI CONFRONTO TRA DISTRIBUZIONI
@@ -306,7 +307,7 @@ def studio2Dpt2():
     
     plt.suptitle("Evoluzione delle distribuzioni al variare del numero di passi\nprobDX=0.5")
     plt.tight_layout()
-    plt.show()
+    mostraFigura(nomeFigura("studio2Dpt2_distribuzioni", probDX=0.5))
 
 
 #-----------------------
@@ -314,7 +315,7 @@ def studio2Dpt2():
 #-----------------------
 
 
-def studio2Dpt3():
+def studio2Dpt3(seed=None, stimatore="momenti"):
     """
     Si varia il la probabilità, mantenendo invariati il numero di passi.
     
@@ -331,20 +332,14 @@ def studio2Dpt3():
     chi2Bin = np.empty((len(prob), 2))
     chi2Gau = np.empty((len(prob), 2))
     
-    parBin = np.empty((len(prob), 3))
-    parGau = np.empty((len(prob), 3))
-    
-    gdlBin = np.empty((len(prob)))
-    gdlGau = np.empty((len(prob)))
+    # un compito per punto della scansione, salvato appena concluso
+    compiti = [(passi, NumPalAdeg(passi, prob[i], 0.01), prob[i], semeDerivato(seed, 3, i)) for i in range(len(prob))]
+    istogrammi = eseguiCompiti("studio2Dpt3", istogramma2D, compiti)
     
-    for i in tqdm(range(len(prob))):
-        G = Galton2D(passi, NumPalAdeg(passi, prob[i], 0.01), prob[i], False)
-        parBin[i] = G.parBin
-        parGau[i] = G.parGau
-        gdlBin[i] = G.gdlBin
-        gdlGau[i] = G.gdlGau
-        chi2Bin[i] = G.chi2Bin, G.chi2RidBin
-        chi2Gau[i] = G.chi2Gau, G.chi2RidGau
+    # fit di tutti gli istogrammi insieme
+    fitBin, fitGau = fitBinomialeGaussianaLotto(istogrammi, stimatore=stimatore)
+    parBin, _, chi2Bin[:, 0], chi2Bin[:, 1], gdlBin = fitBin
+    parGau, _, chi2Gau[:, 0], chi2Gau[:, 1], gdlGau = fitGau
     
     print("\n" + "-" * 45)
     print("Test del χ² per la Binomiale\n")
@@ -409,7 +404,7 @@ def studio2Dpt3():
     
     plt.suptitle(f"Evoluzione dei parametri al variare della probabilità di andare a DX\nnPassi={passi}")
     plt.tight_layout()
-    plt.show()
+    mostraFigura(nomeFigura("studio2Dpt3_parametri", nPassi=passi))
     
     # -----
     # GRAFICO DI CONFRONTO TRA DISTRIBUZIONI
@@ -437,4 +432,4 @@ def studio2Dpt3():
     
     plt.suptitle(f"Evoluzione delle distribuzioni al variare della probabilità di andare a DX\nnPassi={passi}")
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    mostraFigura(nomeFigura("studio2Dpt3_distribuzioni", nPassi=passi))
\ No newline at end of file
@@ -27,20 +27,44 @@
 #--------------------------------
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 # -
 # Moduli propri
 # -
 
 from galton import Galton3D
+from fit import fitBinomialeGaussianaLotto
+from figure import pyplot
+from figure import nomeFigura
+from figure import mostraFigura
 from util import NumPalAdeg
+from util import semeDerivato
+from pianificatore import eseguiCompiti
+
+# matplotlib con lo stile LaTeX dei grafici
+plt = pyplot()
+
+
+#------------------------------------------
+#    Compiti dello studio
+#------------------------------------------
+
+def marginali3D(nPassi, nPalle, probX, probY, seed):
+    """
+    Compito dello studio: proiezioni lungo X e lungo Y di una configurazione
+    della macchina 3D, senza fit (eseguiti poi insieme su tutta la scansione).
+    
+    """
+    G = Galton3D(nPassi, nPalle, probX, probY, False, stimatore=None, seed=seed)
+    
+    return G.marginale(0), G.marginale(1)
+
 
 ###############
 #  STUDIO 3D  #
 ###############
 
-def studio3D():
+def studio3D(seed=None, stimatore="momenti"):
     print("Hai avviato lo studio della macchina di Galton 3D\n")
     print("Maggiori informazioni sono fornite nel file README.\n\n")
     
@@ -49,21 +73,21 @@ def studio3D():
     
     print("PARTE 1")
     
-    studio3Dpt1()
+    studio3Dpt1(seed, stimatore)
     
     print("\n----\n")
     
     
     print("PARTE 2")
     
-    studio3Dpt2()
+    studio3Dpt2(seed, stimatore)
     
     print("\n----\n")
     
     
     print("PARTE 3")
     
-    studio3Dpt3()
+    studio3Dpt3(seed, stimatore)
     
     print("\n-----")
         
@@ -74,7 +98,7 @@ def studio3D():
 #   Studio 3D parte 1
 #-----------------------
 
-def studio3Dpt1():
+def studio3Dpt1(seed=None, stimatore="momenti"):
     """
     Si varia il numero di passi, mantenendo inviati probX e probY.
     
@@ -98,37 +122,18 @@ def studio3Dpt1():
     chi2GauX = np.empty((len(passi), 2))
     chi2GauY = np.empty((len(passi), 2))
     
-    parBinX = np.empty((len(passi), 3))
-    parBinY = np.empty((len(passi), 3))
-    
-    parGauX = np.empty((len(passi), 3))
-    parGauY = np.empty((len(passi), 3))
+    # un compito per punto della scansione, salvato appena concluso
+    compiti = [(passi[i], NumPalAdeg(passi[i], px, 0.01, py), px, py, semeDerivato(seed, 1, i)) for i in range(len(passi))]
+    proiezioniX, proiezioniY = map(list, zip(*eseguiCompiti("studio3Dpt1", marginali3D, compiti)))
     
-    gdlBinX = np.empty((len(passi)))
-    gdlBinY = np.empty((len(passi)))
+    # i quattro fit di tutte le simulazioni, eseguiti insieme
+    fitBinX, fitGauX = fitBinomialeGaussianaLotto(proiezioniX, stimatore=stimatore)
+    fitBinY, fitGauY = fitBinomialeGaussianaLotto(proiezioniY, stimatore=stimatore)
     
-    gdlGauX = np.empty((len(passi)))
-    gdlGauY = np.empty((len(passi)))
-
-    for i in range(len(passi)):
-        print(f"Numero di passi: {passi[i]}")
-        
-        G = Galton3D(passi[i], NumPalAdeg(passi[i], px, 0.01, py), px, py, False)
-        
-        chi2BinX[i] = G.chi2BinX, G.chi2RidBinX
-        chi2BinY[i] = G.chi2BinY, G.chi2RidBinY
-        chi2GauX[i] = G.chi2GauX, G.chi2RidGauX
-        chi2GauY[i] = G.chi2GauY, G.chi2RidGauY
-        
-        parBinX[i] = G.parBinX
-        parBinY[i] = G.parBinY
-        parGauX[i] = G.parGauX
-        parGauY[i] = G.parGauY
-        
-        gdlBinX[i] = G.gdlBinX
-        gdlBinY[i] = G.gdlBinY
-        gdlGauX[i] = G.gdlGauX
-        gdlGauY[i] = G.gdlGauY
+    parBinX, _, chi2BinX[:, 0], chi2BinX[:, 1], gdlBinX = fitBinX
+    parBinY, _, chi2BinY[:, 0], chi2BinY[:, 1], gdlBinY = fitBinY
+    parGauX, _, chi2GauX[:, 0], chi2GauX[:, 1], gdlGauX = fitGauX
+    parGauY, _, chi2GauY[:, 0], chi2GauY[:, 1], gdlGauY = fitGauY
     
     print("\nTabella 1: Parametri Binomiali X\n")
     print("{:<8} {:<10} {:<10} {:<10} {:<10}".format("Passi", "n", "p", "GdL", "χ²rid"))
@@ -186,13 +191,13 @@ def studio3Dpt1():
     
     plt.suptitle(f"Variazione del $\\tilde{{\\chi}}^2$ in funzione del numero di passi\nprobX={px}, probY={py}")
     plt.tight_layout()
-    plt.show()
+    mostraFigura(nomeFigura("studio3Dpt1_chi2", probX=px, probY=py))
         
 #-----------------------
 #   Studio 3D parte 2
 #-----------------------
 
-def studio3Dpt2():
+def studio3Dpt2(seed=None, stimatore="momenti"):
     """
     Si varia probX, mantenendo inviati il numero di passi e probY.
     
@@ -216,37 +221,18 @@ def studio3Dpt2():
     chi2GauX = np.empty((len(px), 2))
     chi2GauY = np.empty((len(px), 2))
     
-    parBinX = np.empty((len(px), 3))
-    parBinY = np.empty((len(px), 3))
-    
-    parGauX = np.empty((len(px), 3))
-    parGauY = np.empty((len(px), 3))
+    # un compito per punto della scansione, salvato appena concluso
+    compiti = [(passi, NumPalAdeg(passi, px[i], 0.01, py), px[i], py, semeDerivato(seed, 2, i)) for i in range(len(px))]
+    proiezioniX, proiezioniY = map(list, zip(*eseguiCompiti("studio3Dpt2", marginali3D, compiti)))
     
-    gdlBinX = np.empty((len(px)))
-    gdlBinY = np.empty((len(px)))
+    # i quattro fit di tutte le simulazioni, eseguiti insieme
+    fitBinX, fitGauX = fitBinomialeGaussianaLotto(proiezioniX, stimatore=stimatore)
+    fitBinY, fitGauY = fitBinomialeGaussianaLotto(proiezioniY, stimatore=stimatore)
     
-    gdlGauX = np.empty((len(px)))
-    gdlGauY = np.empty((len(px)))
-
-    for i in range(len(px)):
-        print(f"Probabilità probX: {px[i]}")
-        
-        G = Galton3D(passi, NumPalAdeg(passi, px[i], 0.01, py), px[i], py, False)
-        
-        chi2BinX[i] = G.chi2BinX, G.chi2RidBinX
-        chi2BinY[i] = G.chi2BinY, G.chi2RidBinY
-        chi2GauX[i] = G.chi2GauX, G.chi2RidGauX
-        chi2GauY[i] = G.chi2GauY, G.chi2RidGauY
-        
-        parBinX[i] = G.parBinX
-        parBinY[i] = G.parBinY
-        parGauX[i] = G.parGauX
-        parGauY[i] = G.parGauY
-        
-        gdlBinX[i] = G.gdlBinX
-        gdlBinY[i] = G.gdlBinY
-        gdlGauX[i] = G.gdlGauX
-        gdlGauY[i] = G.gdlGauY
+    parBinX, _, chi2BinX[:, 0], chi2BinX[:, 1], gdlBinX = fitBinX
+    parBinY, _, chi2BinY[:, 0], chi2BinY[:, 1], gdlBinY = fitBinY
+    parGauX, _, chi2GauX[:, 0], chi2GauX[:, 1], gdlGauX = fitGauX
+    parGauY, _, chi2GauY[:, 0], chi2GauY[:, 1], gdlGauY = fitGauY
         
     print("\nTabella 1: Parametri Binomiali X\n")
     print("{:<8} {:<10} {:<10} {:<10} {:<10}".format("probX", "n", "p", "GdL", "χ²rid"))
@@ -304,7 +290,7 @@ def studio3Dpt2():
     
     plt.suptitle(f"Variazione del $\\tilde{{\\chi}}^2$ in funzione della probabilità di spostamento lungo X\nnPassi={passi}, probY={py}")
     plt.tight_layout()
-    plt.show()
+    mostraFigura(nomeFigura("studio3Dpt2_chi2", nPassi=passi, probY=py))
         
     
 
@@ -312,7 +298,7 @@ def studio3Dpt2():
 #   Studio 3D parte 3
 #-----------------------
 
-def studio3Dpt3():
+def studio3Dpt3(seed=None, stimatore="momenti"):
     """
     Si varia probY, mantenendo invariati probY e il numero di passi.
     
@@ -337,37 +323,18 @@ def studio3Dpt3():
     chi2GauX = np.empty((len(py), 2))
     chi2GauY = np.empty((len(py), 2))
     
-    parBinX = np.empty((len(py), 3))
-    parBinY = np.empty((len(py), 3))
+    # un compito per punto della scansione, salvato appena concluso
+    compiti = [(passi, NumPalAdeg(passi, px, 0.01, py[i]), px, py[i], semeDerivato(seed, 3, i)) for i in range(len(py))]
+    proiezioniX, proiezioniY = map(list, zip(*eseguiCompiti("studio3Dpt3", marginali3D, compiti)))
     
-    parGauX = np.empty((len(py), 3))
-    parGauY = np.empty((len(py), 3))
+    # i quattro fit di tutte le simulazioni, eseguiti insieme
+    fitBinX, fitGauX = fitBinomialeGaussianaLotto(proiezioniX, stimatore=stimatore)
+    fitBinY, fitGauY = fitBinomialeGaussianaLotto(proiezioniY, stimatore=stimatore)
     
-    gdlBinX = np.empty((len(py)))
-    gdlBinY = np.empty((len(py)))
-    
-    gdlGauX = np.empty((len(py)))
-    gdlGauY = np.empty((len(py)))
-    
-    for i in range(len(py)):
-        print(f"Probabilità probY: {py[i]}")
-        
-        G = Galton3D(passi, NumPalAdeg(passi, px, 0.01, py[i]), px, py[i], False)
-        
-        chi2BinX[i] = G.chi2BinX, G.chi2RidBinX
-        chi2BinY[i] = G.chi2BinY, G.chi2RidBinY
-        chi2GauX[i] = G.chi2GauX, G.chi2RidGauX
-        chi2GauY[i] = G.chi2GauY, G.chi2RidGauY
-        
-        parBinX[i] = G.parBinX
-        parBinY[i] = G.parBinY
-        parGauX[i] = G.parGauX
-        parGauY[i] = G.parGauY
-        
-        gdlBinX[i] = G.gdlBinX
-        gdlBinY[i] = G.gdlBinY
-        gdlGauX[i] = G.gdlGauX
-        gdlGauY[i] = G.gdlGauY
+    parBinX, _, chi2BinX[:, 0], chi2BinX[:, 1], gdlBinX = fitBinX
+    parBinY, _, chi2BinY[:, 0], chi2BinY[:, 1], gdlBinY = fitBinY
+    parGauX, _, chi2GauX[:, 0], chi2GauX[:, 1], gdlGauX = fitGauX
+    parGauY, _, chi2GauY[:, 0], chi2GauY[:, 1], gdlGauY = fitGauY
     
     print("\nTabella 1: Parametri Binomiali X\n")
     print("{:<8} {:<10} {:<10} {:<10} {:<10}".format("probY", "n", "p", "GdL", "χ²rid"))
@@ -426,4 +393,4 @@ def studio3Dpt3():
     
     plt.suptitle(f"Variazione del $\\tilde{{\\chi}}^2$ in funzione della probabilità di spostamento lungo Y\nnPassi={passi}, probX={px}")
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    mostraFigura(nomeFigura("studio3Dpt3_chi2", nPassi=passi, probX=px))
\ No newline at end of file
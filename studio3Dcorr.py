@@ -34,13 +34,29 @@ import numpy as np
 
 from galton import Galton3Dcorr
 from util import NumPalAdeg
+from util import semeDerivato
+from pianificatore import eseguiCompiti
+
+
+#------------------------------------------
+#    Compiti dello studio
+#------------------------------------------
+
+def macchinaCorrelata(nPassi, nPalle, px, py, matrice, seed, stimatore):
+    """
+    Compito dello studio: macchina 3D correlata con i suoi fit. Restituisce solo
+    risultati() (istogramma, fit e correlazione stimata), da cui lo studio disegna
+    i grafici, così che checkpoint e processi non trasferiscano i risultati per pallina.
+    
+    """
+    return Galton3Dcorr(nPassi, nPalle, px, py, matrice, False, grafici=False, seed=seed, stimatore=stimatore).risultati()
 
 
 ####################
 #  STUDIO 3D CORR  #
 ####################
 
-def studio3Dcorr():
+def studio3Dcorr(seed=None, stimatore="momenti"):
     
     # 1. Nessuna correlazione (indipendenza)
     M1 = np.array([[1, 0.1],
@@ -82,8 +98,15 @@ def studio3Dcorr():
     matrStim = np.empty((len(M), 2, 2))  # Matrici di correlazione stimate
     
     
-    for i in range(len(M)):
-        G = Galton3Dcorr(nPassi, nPalle, px, py, M[i], False)
+    # un compito per matrice di correlazione, salvato appena concluso
+    compiti = [(nPassi, nPalle, px, py, M[i], semeDerivato(seed, i), stimatore) for i in range(len(M))]
+    
+    for i, risultati in enumerate(eseguiCompiti("studio3Dcorr", macchinaCorrelata, compiti)):
+        G = Galton3Dcorr.daRisultati(risultati, nPassi=nPassi, probX=px, probY=py,
+                                     matriceCorrelazione=M[i], seed=semeDerivato(seed, i), stimatore=stimatore)
+        G.mostraMatrice()
+        G.proiezioni3D(False)
+        
         matr[i] = G.matriceCorrelazione
         matrStim[i] = G.matriceCorrelazioneStimata
         parBinX[i] = G.parBinX
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+# i moduli del progetto sono nella cartella principale, non in un pacchetto
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
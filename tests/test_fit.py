@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Fit binomiale e gaussiano
+#--------------------------------
+
+import numpy as np
+import pytest
+
+import fit
+from util import binomiale
+
+
+def istogramma(nPassi, nPalle, p, seme=1):
+    """
+    Istogramma delle posizioni finali di nPalle palline con nPassi passi.
+
+    """
+    rng = np.random.default_rng(seme)
+    return np.bincount(rng.binomial(nPassi, p, nPalle), minlength=nPassi + 1).astype(float)
+
+
+@pytest.fixture(params=[True, False], ids=["numba", "numpy"])
+def motore(request, monkeypatch):
+    """
+    Esegue il test con i kernel compilati (se Numba è installato) e con numpy.
+
+    """
+    if request.param and not fit.NUMBA_DISPONIBILE:
+        pytest.skip("Numba non disponibile")
+    monkeypatch.setattr(fit, "NUMBA_DISPONIBILE", request.param)
+
+
+def test_binomiale_nulla_oltre_n():
+    x = np.arange(23, dtype=float)
+    valori = binomiale(x, 20.5, 0.999, 1000)
+
+    assert np.all(valori[21:] == 0)
+    assert np.all(np.isfinite(valori))
+
+
+@pytest.mark.parametrize("stimatore", ["momenti", "minimiQuadrati"])
+def test_binomiale_p_vicino_a_1(motore, stimatore):
+    frequenze = istogramma(20, 1000, 0.999)
+    p0 = fit.stimaMomenti("binomiale", frequenze)
+
+    par, cov, chi2, gdl = fit.fitModello("binomiale", frequenze, p0, stimatore)
+
+    # con n non intero la binomiale non è normalizzata sui valori interi: si
+    # controlla il numero di palline della curva invece dell'ampiezza, che per
+    # p vicino a 1 (solo 3-4 bin utili) è determinato al percento
+    assert par[0] == pytest.approx(20, abs=0.5)
+    assert par[1] == pytest.approx(0.999, abs=0.002)
+    assert np.sum(binomiale(np.arange(21), *par)) == pytest.approx(1000, rel=0.02)
+    assert gdl > 0 and chi2 / gdl < 10
+
+
+def test_lotto_p_vicino_a_1(motore):
+    frequenze = np.stack([istogramma(20, 1000, p, seme) for seme, p in enumerate((0.99, 0.995, 0.999))])
+
+    par, cov, chi2, chi2Rid, gdl = fit.fitLotto("binomiale", frequenze)
+
+    assert par[:, 0] == pytest.approx(20, abs=0.5)
+    assert np.array([np.sum(binomiale(np.arange(21), *p)) for p in par]) == pytest.approx(1000, rel=0.02)
+    assert np.all(gdl > 0) and np.all(chi2Rid < 10)
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+@pytest.mark.parametrize("p0", [[200, 1.5, 1.0], [150, 0.9, 1.0], [400, 0.1, 1.0]])
+def test_passi_nel_dominio(motore, p0):
+    # partendo lontano dai dati i passi restano nel dominio (vedi fit.LIMITI)
+    # e il fit o converge o è rifiutato, senza overflow
+    frequenze = istogramma(200, 1000, 0.5)
+
+    try:
+        par, cov, chi2, gdl = fit.fitModello("binomiale", frequenze, p0, "minimiQuadrati")
+    except ValueError:
+        return
+
+    assert 0 < par[1] < 1 and par[0] > 0 and par[2] >= 0
+
+
+def test_istogramma_degenere():
+    frequenze = np.zeros(21)
+    frequenze[20] = 1000
+
+    with pytest.raises(ValueError):
+        fit.fitModello("binomiale", frequenze, [20, 0.9, 1000], "momenti")
+    with pytest.raises(ValueError):
+        fit.fitLotto("binomiale", frequenze[None])
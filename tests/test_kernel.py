@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+#--------------------------------
+#    Kernel compilati con Numba
+#--------------------------------
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+pytest.importorskip("numba")
+
+CARTELLA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# fit di una macchina con gli stimatori di default e minimi quadrati, poi
+# il numero di versioni dei kernel dei fit lette dalla cache su disco
+CODICE = """
+import kernelNumba
+from galton import Galton2D
+
+Galton2D(20, 1000, 0.5, False, grafici=False, seed=1)
+Galton2D(20, 1000, 0.5, False, grafici=False, seed=1, stimatore="minimiQuadrati")
+
+print(sum(kernelNumba.newtonPoissonNumba.stats.cache_hits.values()),
+      sum(kernelNumba.levenbergMarquardtNumba.stats.cache_hits.values()))
+"""
+
+
+def eseguiProcesso():
+    esito = subprocess.run([sys.executable, "-c", CODICE], cwd=CARTELLA,
+                           capture_output=True, text=True, check=True)
+    return [int(valore) for valore in esito.stdout.split()[-2:]]
+
+
+def test_kernel_fit_letti_dalla_cache():
+    # il primo processo compila (o legge) i kernel, il secondo deve leggerli dalla cache
+    eseguiProcesso()
+    newton, levenbergMarquardt = eseguiProcesso()
+
+    assert newton > 0
+    assert levenbergMarquardt > 0
@@ -26,7 +26,11 @@
 #--------------------------------
 
 import numpy as np
-from scipy.special import comb
+
+from functools import lru_cache
+
+# le funzioni di scipy sono importate solo dalle funzioni che le usano,
+# così che importare util non carichi scipy
 
 
 
@@ -34,29 +38,82 @@ from scipy.special import comb
 #    Funzioni per la Distribuzione Binomiale
 #----------------------------------------------
 
-def binomiale(x, n, p, amp):
+# valori minimi di p, 1-p e sigma per restare nel dominio delle distribuzioni
+# quando i fit esplorano parametri non fisici
+EPSILON = 1e-12
+
+# numero massimo di distribuzioni binomiali su griglia intera tenute in memoria
+PMF_MASSIME = 128
+
+def logBinomiale(x, n, p):
     """
-    Funzione per calcolare la distribuzione binomiale amplificata.
-    Prova con il metodo esatto di "comb" e se fallisce usa il metodo
-    approssimato.
+    Logaritmo della distribuzione binomiale, con i fattoriali estesi a valori
+    reali tramite il logaritmo della funzione gamma: nessun overflow anche per
+    n grande e nessun ramo diverso per x interi o reali. Oltre il supporto,
+    per x > n, la distribuzione è nulla (-inf) come per scipy.special.comb:
+    gammaln() vi proseguirebbe con valori finiti e, per n < x < n+1, il fattore
+    (1-p)^(n-x) darebbe ai fit con p vicino a 1 una massa enorme oltre n.
+
+    """
+    from scipy.special import gammaln
     
+    p = np.minimum(np.maximum(p, EPSILON), 1 - EPSILON)
+    dentro = x <= n
+
+    logaritmo = (gammaln(n + 1) - gammaln(x + 1) - gammaln(np.where(dentro, n - x + 1, 1))
+                 + x * np.log(p) + (n - x) * np.log1p(-p))
+
+    return np.where(dentro, logaritmo, -np.inf)
+
+
+@lru_cache(maxsize=PMF_MASSIME)
+def pmfBinomiale(n, p):
+    """
+    Distribuzione binomiale sui valori interi 0, 1, ..., n. Le ultime PMF_MASSIME
+    distribuzioni calcolate restano in memoria, così che le probabilità esatte
+    ripetute con gli stessi (n, p) diventino una lettura della tabella. Va usata
+    solo con i parametri (nPassi, prob) delle macchine: i parametri dei fit,
+    diversi ad ogni chiamata, riempirebbero la cache di tabelle usate una volta.
+
+        pmfBinomiale(n, p)
+
     Parametri
     ---------
-        x (int):     Numero di successi osservati.
         n (int):     Numero totale di prove.
         p (float):   Probabilità di successo in una singola prova.
-        amp (float): Fattore di amplificazione per la distribuzione.
-    
+
+
     Restituisce:
-        float:   Valore della distribuzione binomiale normalizzata moltiplicata per il fattore di amplificazione.
+        numpy.ndarray: Probabilità dei valori 0, ..., n, in sola lettura perché condivisa.
+
     """
+    pmf = np.exp(logBinomiale(np.arange(n + 1, dtype=float), n, p))
+    pmf.flags.writeable = False
+
+    return pmf
+
+
+def binomiale(x, n, p, amp):
+    """
+    Funzione per calcolare la distribuzione binomiale amplificata, vettoriale
+    in x e calcolata in spazio logaritmico. È usata con i parametri dei fit,
+    per cui non passa dalla tabella di pmfBinomiale().
     
-    try:
-        b = amp * comb(n, x, exact=True) * (p ** x) * ((1 - p) ** (n - x))    # modalità esatta
-    except:
-        b = amp * comb(n, x, exact=False) * (p ** x) * ((1 - p) ** (n - x))   # approssimazione
+        binomiale(x, n, p, amp)
     
-    return b
+    Parametri
+    ---------
+        x (numpy.ndarray):  Numero di successi osservati (anche non interi).
+        n (int):            Numero totale di prove.
+        p (float):          Probabilità di successo in una singola prova.
+        amp (float):        Fattore di amplificazione per la distribuzione.
+    
+    Restituisce:
+        numpy.ndarray:   Valori della distribuzione binomiale normalizzata moltiplicata per il fattore di amplificazione.
+    """
+    x = np.asarray(x, dtype=float)
+
+    return amp * np.exp(logBinomiale(x, n, p))
 
 
 
@@ -83,8 +140,163 @@ def gaussiana(x, mu, sigma, amp):
         float:          Valore della distribuzione gaussiana normalizzata per il valore di X.
         
     """
-    sigma = max(sigma, 1e-6)
-    return amp * np.exp(-0.5 * ((x - mu) / sigma) ** 2)
+    sigma = np.maximum(sigma, 1e-6)
+    return amp * np.exp(-0.5 * ((np.asarray(x, dtype=float) - mu) / sigma) ** 2)
+
+
+
+
+#----------------------------------------------
+#    Momenti calcolati da istogrammi e somme
+#----------------------------------------------
+
+def momentiIstogramma(frequenze):
+    """
+    Calcola media e deviazione standard di valori interi 0, 1, ..., len(frequenze)-1
+    a partire dal loro istogramma.
+
+        momentiIstogramma(frequenze)
+
+    Parametri
+    ---------
+        frequenze (numpy.ndarray): Frequenze di ogni valore intero.
+
+
+    Restituisce:
+        tuple: (media, deviazione standard), equivalenti a np.mean e np.std dei valori.
+
+    """
+    valori = np.arange(len(frequenze))
+    nTot = np.sum(frequenze)
+
+    media = np.sum(valori * frequenze) / nTot
+    devStd = np.sqrt(np.sum((valori - media) ** 2 * frequenze) / nTot)
+
+    return media, devStd
+
+
+def correlazioneMomenti(momenti):
+    """
+    Calcola la matrice di correlazione 2x2 di due variabili a partire dalle loro
+    somme accumulate, così da poterla stimare anche simulando a blocchi.
+
+        correlazioneMomenti(momenti)
+
+    Parametri
+    ---------
+        momenti (numpy.ndarray): [n, Σa, Σb, Σa², Σb², Σab]
+
+
+    Restituisce:
+        numpy.ndarray: Matrice di correlazione stimata, equivalente a np.corrcoef.
+
+    """
+    n, sa, sb, saa, sbb, sab = momenti
+
+    covAB = sab / n - (sa / n) * (sb / n)
+    varA = saa / n - (sa / n) ** 2
+    varB = sbb / n - (sb / n) ** 2
+
+    r = np.clip(covAB / np.sqrt(varA * varB), -1, 1)
+
+    return np.array([[1.0, r],
+                     [r, 1.0]])
+
+
+
+
+def sommaGruppi(matrice, lato):
+    """
+    Somma gli elementi di una matrice 2D a gruppi quadrati lato x lato, completando
+    la matrice con zeri fino a un multiplo di lato.
+
+        sommaGruppi(matrice, lato)
+
+    Parametri
+    ---------
+        matrice (numpy.ndarray):    Matrice 2D, ad esempio un istogramma congiunto.
+        lato (int):                 Lato dei gruppi.
+
+
+    Restituisce:
+        numpy.ndarray: Matrice delle somme, forma (ceil(righe/lato), ceil(colonne/lato)).
+
+    """
+    righe, colonne = matrice.shape
+    gRighe, gColonne = -(-righe // lato), -(-colonne // lato)
+
+    completa = np.zeros((gRighe * lato, gColonne * lato), dtype=matrice.dtype)
+    completa[:righe, :colonne] = matrice
+
+    return completa.reshape(gRighe, lato, gColonne, lato).sum(axis=(1, 3))
+
+
+
+
+#------------------------------------------------
+#    Distribuzione normale bivariata standard
+#------------------------------------------------
+
+def normaleBivariataCdf(h, k, rho):
+    """
+    Calcola P(Z1 < h, Z2 < k) per una normale bivariata standard con correlazione rho,
+    integrando la densità rispetto alla correlazione:
+
+        Φ2(h, k; rho) = Φ(h) Φ(k) + ∫_0^rho φ2(h, k; r) dr
+
+    Parametri
+    ---------
+        h, k (float):   Soglie delle due componenti.
+        rho (float):    Coefficiente di correlazione.
+
+
+    Restituisce:
+        float:  Probabilità congiunta, crescente in rho.
+
+    """
+    from scipy.stats import norm
+    from scipy.integrate import quad
+
+    def densita(r):
+        return np.exp(-(h * h - 2 * r * h * k + k * k) / (2 * (1 - r * r))) / (2 * np.pi * np.sqrt(1 - r * r))
+
+    integrale, _ = quad(densita, 0, rho)
+
+    return norm.cdf(h) * norm.cdf(k) + integrale
+
+
+def correlazioneSoglie(pCongiunta, h, k):
+    """
+    Stima la correlazione rho di una normale bivariata standard a partire dalla
+    frequenza osservata di P(Z1 < h, Z2 < k), invertendo normaleBivariataCdf().
+
+    Parametri
+    ---------
+        pCongiunta (float): Frequenza osservata dei casi con Z1 < h e Z2 < k.
+        h, k (float):       Soglie delle due componenti.
+
+
+    Restituisce:
+        numpy.ndarray: Matrice di correlazione stimata 2x2.
+
+    """
+    from scipy.optimize import brentq
+
+    estremo = 1 - 1e-12
+
+    def scarto(r):
+        return normaleBivariataCdf(h, k, r) - pCongiunta
+
+    # la probabilità congiunta è crescente in rho: fuori dall'intervallo si satura a ±1
+    if scarto(-estremo) >= 0:
+        r = -1.0
+    elif scarto(estremo) <= 0:
+        r = 1.0
+    else:
+        r = brentq(scarto, -estremo, estremo)
+
+    return np.array([[1.0, r],
+                     [r, 1.0]])
 
 
 
@@ -135,6 +347,62 @@ def verificaMatriCorr(matrice):
 
 
 
+#------------------------------------------
+#    Generatore di numeri casuali
+#------------------------------------------
+
+# generatori di bit selezionabili
+GENERATORI_BIT = ("PCG64", "SFC64", "Philox")
+
+def creaGeneratore(seed=None, bitgen="PCG64"):
+    """
+    Crea un numpy.random.Generator con il generatore di bit scelto.
+
+        creaGeneratore(seed=None, bitgen="PCG64")
+
+    Parametri
+    ---------
+        seed (int o SeedSequence, opzionale): Seme del generatore (None -> seme casuale).
+        bitgen (str): Generatore di bit tra "PCG64", "SFC64" e "Philox".
+
+
+    Restituisce:
+        numpy.random.Generator: Generatore di numeri casuali.
+
+    """
+    if bitgen not in GENERATORI_BIT:
+        raise ValueError(f"Generatore di bit non valido: {bitgen} (scegliere tra {', '.join(GENERATORI_BIT)})")
+
+    return np.random.Generator(getattr(np.random, bitgen)(seed))
+
+
+def semeDerivato(seed, *indici):
+    """
+    Seme di una delle simulazioni di uno studio, derivato con numpy.random.SeedSequence
+    dal seme dello studio e dagli indici della simulazione: simulazioni diverse hanno
+    semi indipendenti e, ripetendo lo studio con lo stesso seme, ognuna riceve lo stesso
+    seme e può essere letta dalla cache su disco.
+
+        semeDerivato(seed, parte, i)
+
+    Parametri
+    ---------
+        seed (int): Seme dello studio (None -> seme casuale).
+        indici:     Interi che identificano la simulazione nello studio.
+
+
+    Restituisce:
+        int: Seme della simulazione, None se seed è None.
+
+    """
+    if seed is None:
+        return None
+
+    return int(np.random.SeedSequence([seed, *indici]).generate_state(1)[0])
+
+
+
+
 #------------------------------------------
 #    Stima del Numero di palline adeguate
 #------------------------------------------